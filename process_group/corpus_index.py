@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Corpus Index - FactSet Pipeline v3.6.1
+MD 語料欄式索引 - 每個 MD 檔案一列的已解析欄位
+
+- 由 process_cli 在完整解析 (process / generate-csv) 時逐筆累加並整批寫出
+- 每列: 代號、名稱、內容雜湊、大小/mtime、MD日期、品質評分、EPS/營收 32 格、
+  來源 url、search_query、驗證狀態、是否納入報告
+- 有 pyarrow 時寫 Parquet，否則退回 CSV；讀取端一次載入為 DataFrame，
+  quarantine / md_cleaner / stats 以欄位篩選取代逐檔重新解析
+- 以 檔名 + 大小 + mtime 判斷列是否仍對應目前檔案；mtime 不同時 (git checkout、
+  快取還原) 比對內容雜湊，內容未變即更新 mtime 並寫回索引；
+  變更過的檔案由呼叫端自行補解析
+"""
+
+import os
+import hashlib
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401 - pandas 的 Parquet 引擎
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+try:
+    from parsed_record import GRID_KEYS
+except ImportError:
+    from process_group.parsed_record import GRID_KEYS
+
+
+class CorpusIndex:
+    """MD 語料欄式索引 (增量彙總器，具 add 方法)"""
+
+    DEFAULT_INDEX_DIR = os.path.join('cache', 'process')
+    INDEX_NAME = 'md_corpus_index'
+
+    BASE_COLUMNS = [
+        'filename', 'company_code', 'company_name', 'content_hash', 'file_size', 'file_mtime_ns',
+        'md_date', 'content_date', 'extracted_date', 'quality_score', 'yaml_quality_score',
+        'analyst_count', 'target_price', 'has_eps_data', 'has_target_price',
+        'url', 'search_query', 'content_validation_passed', 'validation_status', 'in_report'
+    ]
+    COLUMNS = BASE_COLUMNS + list(GRID_KEYS)
+
+    REVENUE_AVG_COLUMNS = [f'revenue_{year}_avg' for year in ('2025', '2026', '2027', '2028')]
+    EPS_AVG_COLUMNS = [f'eps_{year}_avg' for year in ('2025', '2026', '2027', '2028')]
+
+    def __init__(self, md_dir: str = "data/md", index_dir: Optional[str] = None, report_generator=None):
+        self.md_dir = md_dir
+        self.index_dir = index_dir or self.DEFAULT_INDEX_DIR
+        # 與詳細報告相同的 MD日期 / 納入判斷 (未提供時退回簡化邏輯)
+        self.report_generator = report_generator
+        self._rows: List[Tuple] = []
+
+    # -- 路徑 ----------------------------------------------------------------
+
+    @classmethod
+    def index_paths(cls, index_dir: Optional[str] = None) -> Tuple[str, str]:
+        index_dir = index_dir or cls.DEFAULT_INDEX_DIR
+        return (os.path.join(index_dir, f'{cls.INDEX_NAME}.parquet'),
+                os.path.join(index_dir, f'{cls.INDEX_NAME}.csv'))
+
+    # -- 建立 ----------------------------------------------------------------
+
+    def add(self, record: Dict[str, Any]) -> None:
+        """累加一筆精簡記錄"""
+        filename = record.get('filename') or ''
+        try:
+            st = os.stat(os.path.join(self.md_dir, filename))
+            file_size, file_mtime_ns = st.st_size, st.st_mtime_ns
+        except OSError:
+            file_size, file_mtime_ns = -1, -1
+
+        yaml_data = record.get('yaml_data') or {}
+        validation_result = record.get('validation_result') or {}
+        extracted_date = record.get('extracted_date')
+
+        row = (
+            filename,
+            str(record.get('company_code') or ''),
+            record.get('company_name') or '',
+            record.get('content_hash') or '',
+            file_size,
+            file_mtime_ns,
+            self._md_date(record),
+            record.get('content_date') or '',
+            extracted_date.isoformat() if isinstance(extracted_date, datetime) else str(extracted_date or ''),
+            self._to_float(record.get('quality_score')),
+            self._to_float(yaml_data.get('quality_score')),
+            int(record.get('analyst_count') or 0),
+            self._to_float(record.get('target_price')),
+            bool(record.get('has_eps_data')),
+            bool(record.get('has_target_price')),
+            yaml_data.get('url') or '',
+            yaml_data.get('search_query') or '',
+            bool(record.get('content_validation_passed', True)),
+            validation_result.get('overall_status') or '',
+            self._in_report(record),
+            *(self._to_float(record.get(key)) for key in GRID_KEYS)
+        )
+        self._rows.append(row)
+
+    def _md_date(self, record: Dict[str, Any]) -> str:
+        if self.report_generator is not None:
+            return self.report_generator._get_md_date_with_priority(record)
+        yaml_data = record.get('yaml_data') or {}
+        return str(yaml_data.get('md_date') or record.get('content_date') or '').replace('/', '-')
+
+    def _in_report(self, record: Dict[str, Any]) -> bool:
+        if self.report_generator is not None:
+            return bool(self.report_generator._should_include_in_report_v351_updated(record))
+        return bool(record.get('content_validation_passed', True))
+
+    @staticmethod
+    def _to_float(value) -> Optional[float]:
+        if value is None or value == '':
+            return None
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame.from_records(self._rows, columns=self.COLUMNS)
+
+    def save(self) -> str:
+        """寫出索引 (Parquet 優先，否則 CSV)；以暫存檔置換，讀取端不會看到寫一半的檔案"""
+        return self._write_frame(self.to_frame(), self.index_dir)
+
+    @classmethod
+    def _write_frame(cls, df: pd.DataFrame, index_dir: str) -> str:
+        os.makedirs(index_dir, exist_ok=True)
+        parquet_path, csv_path = cls.index_paths(index_dir)
+
+        if PARQUET_AVAILABLE:
+            path, stale_path = parquet_path, csv_path
+            tmp_path = path + '.tmp'
+            df.to_parquet(tmp_path, index=False)
+        else:
+            path, stale_path = csv_path, parquet_path
+            tmp_path = path + '.tmp'
+            df.to_csv(tmp_path, index=False, encoding='utf-8')
+        os.replace(tmp_path, path)
+
+        # 避免讀取端載入另一種格式的舊索引
+        if os.path.exists(stale_path):
+            os.remove(stale_path)
+        return path
+
+    # -- 讀取 ----------------------------------------------------------------
+
+    @classmethod
+    def load(cls, index_dir: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """載入索引；不存在或損毀時回傳 None"""
+        parquet_path, csv_path = cls.index_paths(index_dir)
+        try:
+            if os.path.exists(parquet_path) and PARQUET_AVAILABLE:
+                df = pd.read_parquet(parquet_path)
+            elif os.path.exists(csv_path):
+                df = pd.read_csv(csv_path, encoding='utf-8',
+                                 dtype={'company_code': str, 'filename': str, 'content_hash': str,
+                                        'md_date': str, 'content_date': str, 'extracted_date': str,
+                                        'url': str, 'search_query': str, 'validation_status': str},
+                                 keep_default_na=False, na_values=[''])
+            else:
+                return None
+        except Exception as e:
+            print(f"⚠️ 無法讀取語料索引: {e}")
+            return None
+
+        missing = [column for column in cls.COLUMNS if column not in df.columns]
+        if missing:
+            print(f"⚠️ 語料索引欄位不符 (缺少 {len(missing)} 欄)，需重新建立")
+            return None
+
+        for column in ('md_date', 'content_date', 'extracted_date', 'url', 'search_query', 'validation_status'):
+            df[column] = df[column].fillna('')
+        return df
+
+    @classmethod
+    def load_fresh(cls, md_dir: str = "data/md",
+                   index_dir: Optional[str] = None) -> Tuple[Optional[pd.DataFrame], List[str]]:
+        """載入索引並與目前目錄比對
+
+        回傳 (仍有效的列, 需重新解析的檔名)；索引不存在時回傳 (None, [])。
+        已刪除檔案的列直接丟棄。
+        """
+        df = cls.load(index_dir)
+        if df is None:
+            return None, []
+
+        current = {}
+        with os.scandir(md_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.md') and entry.is_file():
+                    st = entry.stat()
+                    current[entry.name] = (st.st_size, st.st_mtime_ns)
+
+        current_df = pd.DataFrame.from_records(
+            [(name, size, mtime_ns) for name, (size, mtime_ns) in current.items()],
+            columns=['filename', '_size', '_mtime_ns']
+        )
+        merged = df.merge(current_df, on='filename', how='inner')
+        same_size = merged['file_size'] == merged['_size']
+        fresh_mask = same_size & (merged['file_mtime_ns'] == merged['_mtime_ns'])
+
+        # 內容未變但 mtime 不同 (例如 git checkout / 快取還原)，比對內容雜湊後視為有效
+        recheck = same_size & ~fresh_mask & (merged['content_hash'].fillna('') != '')
+        if recheck.any():
+            unchanged = [
+                index for index, filename, content_hash
+                in zip(merged.index[recheck], merged.loc[recheck, 'filename'], merged.loc[recheck, 'content_hash'])
+                if cls._content_matches(os.path.join(md_dir, filename), content_hash)
+            ]
+            if unchanged:
+                merged.loc[unchanged, 'file_mtime_ns'] = merged.loc[unchanged, '_mtime_ns']
+                fresh_mask = fresh_mask | merged.index.isin(unchanged)
+                cls._refresh_mtimes(df, merged.loc[unchanged], index_dir)
+
+        fresh = merged[fresh_mask].drop(columns=['_size', '_mtime_ns']).reset_index(drop=True)
+
+        fresh_names = set(fresh['filename'])
+        stale = sorted(name for name in current if name not in fresh_names)
+        return fresh, stale
+
+    @staticmethod
+    def _content_matches(file_path: str, content_hash: str) -> bool:
+        """檔案內容的 sha1 是否等於索引的 content_hash (record_stream.slim_record 以 UTF-8 內容計算)"""
+        try:
+            with open(file_path, 'rb') as f:
+                raw = f.read()
+        except OSError:
+            return False
+        if hashlib.sha1(raw).hexdigest() == content_hash:
+            return True
+        # md_parser 以文字模式讀取，CRLF 已轉為 \n
+        try:
+            text = raw.decode('utf-8')
+        except UnicodeDecodeError:
+            return False
+        normalized = text.replace('\r\n', '\n').replace('\r', '\n')
+        return normalized != text and hashlib.sha1(normalized.encode('utf-8')).hexdigest() == content_hash
+
+    @classmethod
+    def _refresh_mtimes(cls, df: pd.DataFrame, unchanged: pd.DataFrame, index_dir: Optional[str]) -> None:
+        """寫回新的 mtime，下次執行直接以 大小 + mtime 命中"""
+        new_mtimes = dict(zip(unchanged['filename'], unchanged['_mtime_ns']))
+        updated = df.copy()
+        mask = updated['filename'].isin(new_mtimes)
+        updated.loc[mask, 'file_mtime_ns'] = updated.loc[mask, 'filename'].map(new_mtimes)
+        try:
+            cls._write_frame(updated, index_dir or cls.DEFAULT_INDEX_DIR)
+            print(f"🗂️ 語料索引: {len(new_mtimes)} 個檔案內容未變 (mtime 已更新)")
+        except Exception as e:
+            print(f"⚠️ 語料索引 mtime 寫回失敗: {e}")
+
+    # -- 常用欄位篩選 ----------------------------------------------------------
+
+    @classmethod
+    def has_revenue_and_eps(cls, df: pd.DataFrame) -> pd.Series:
+        """與 quarantine CSV 偵測相同: 任一年度有營收平均值 且 任一年度有 EPS 平均值"""
+        return df[cls.REVENUE_AVG_COLUMNS].notna().any(axis=1) & df[cls.EPS_AVG_COLUMNS].notna().any(axis=1)
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Extraction Engine - FactSet Pipeline v3.6.1
+MDParser 的預編譯正則擷取引擎
+
+- 所有固定模式在建構時編譯一次
+- 動態表格列模式依年份數量快取
+- 每份文件的內容區域 (內文、EPS 表格、營收表格) 只定位一次
+"""
+
+import re
+from typing import Dict, List, Optional, Pattern, Tuple
+
+
+class ContentRegions:
+    """單一文件的內容區域 (延遲計算，只定位一次)"""
+
+    def __init__(self, engine: 'ExtractionEngine', content: str):
+        self.content = content
+        self._engine = engine
+        self._cache: Dict[str, object] = {}
+
+    def _get(self, key: str, factory):
+        if key not in self._cache:
+            self._cache[key] = factory()
+        return self._cache[key]
+
+    @property
+    def body(self) -> str:
+        """移除 YAML frontmatter 後的實際內容"""
+        return self._get('body', lambda: self._engine.strip_frontmatter(self.content))
+
+    @property
+    def body_mentions_cmoney(self) -> bool:
+        """內文是否提及 CMoney (日期可信度計算用)"""
+        return self._get('body_mentions_cmoney',
+                         lambda: 'cmoney' in self.body.lower() or 'CMoney' in self.body)
+
+    @property
+    def date_candidates(self) -> List[int]:
+        """內文中 "YYYY年" / "YYYY-" / "YYYY/" 的起點 (年份開頭日期模式共用)"""
+        return self._get('date_candidates',
+                         lambda: [m.start() for m in self._engine.date_anchor_regex.finditer(self.body)])
+
+    @property
+    def eps_candidates(self) -> List[int]:
+        """全文中 "YYYY年" / "YYYY eps" 的起點 (年份開頭 EPS 模式共用)"""
+        return self._get('eps_candidates',
+                         lambda: [m.start() for m in self._engine.eps_anchor_regex.finditer(self.content)])
+
+    @property
+    def eps_table(self) -> Optional[str]:
+        """市場預估 EPS 表格 HTML"""
+        return self._get('eps_table', lambda: self._engine.find_table(self._engine.eps_table_regex, self.content))
+
+    @property
+    def eps_table_years(self) -> List[str]:
+        return self._get('eps_table_years', lambda: self._engine.table_years(self.eps_table))
+
+    @property
+    def revenue_table(self) -> Optional[str]:
+        """市場預估營收表格 HTML"""
+        return self._get('revenue_table', lambda: self._engine.find_table(self._engine.revenue_table_regex, self.content))
+
+    @property
+    def revenue_table_years(self) -> List[str]:
+        return self._get('revenue_table_years', lambda: self._engine.table_years(self.revenue_table))
+
+
+class ExtractionEngine:
+    """預編譯正則擷取引擎"""
+
+    TABLE_LABELS = r'(最高值|最低值|平均值|中位數)'
+
+    # 以年份開頭的模式：先單次掃描候選起點，再只在候選位置比對
+    YEAR_LEAD = r'(\d{4})'
+    DATE_ANCHOR = r'(?=\d{4}[年\-/])'
+    DATE_ANCHOR_TAILS = ('年', '-', '/')
+    EPS_ANCHOR = r'(?=\d{4}\s*(?:年|eps))'
+    EPS_ANCHOR_TAILS = ('年', r'\s*年', r'\s*eps')
+
+    FINANCIAL_KEYWORDS = [
+        'eps', '每股盈餘', '營收', '獲利', '淨利', '毛利', '目標價', '分析師',
+        '預估', '評等', 'factset', 'bloomberg', '股價', '市值'
+    ]
+
+    def __init__(self, date_patterns: List[str], eps_patterns: List[str],
+                 target_price_patterns: List[str], revenue_patterns: List[str],
+                 analyst_patterns: List[str], metadata_patterns: Dict[str, str]):
+        # 固定模式 (旗標與原本 re.findall 呼叫一致)
+        self.date_regexes = [re.compile(p, re.MULTILINE | re.DOTALL) for p in date_patterns]
+        self.eps_regexes = [re.compile(p, re.IGNORECASE) for p in eps_patterns]
+        self.target_price_regexes = [re.compile(p, re.IGNORECASE) for p in target_price_patterns]
+        self.revenue_regexes = [re.compile(p, re.IGNORECASE) for p in revenue_patterns]
+        self.analyst_regexes = [re.compile(p, re.IGNORECASE) for p in analyst_patterns]
+        self.metadata_regexes = {
+            name: re.compile(p, re.MULTILINE | re.IGNORECASE) for name, p in metadata_patterns.items()
+        }
+
+        self.date_anchor_regex = re.compile(self.DATE_ANCHOR)
+        self.eps_anchor_regex = re.compile(self.EPS_ANCHOR, re.IGNORECASE)
+        self.date_anchored = [self._is_year_led(p, self.DATE_ANCHOR_TAILS) for p in date_patterns]
+        self.eps_anchored = [self._is_year_led(p, self.EPS_ANCHOR_TAILS) for p in eps_patterns]
+
+        # 區域定位
+        self.eps_table_regex = re.compile(r'市場預估EPS.*?<table[^>]*>.*?</table>', re.DOTALL)
+        self.revenue_table_regex = re.compile(r'市場預估營收.*?<table[^>]*>.*?</table>', re.DOTALL)
+        self.first_row_regex = re.compile(r'<tr>(.*?)</tr>', re.DOTALL | re.IGNORECASE)
+        self.html_tag_regex = re.compile(r'<[^>]+>')
+        self.year_regex = re.compile(r'(\d{4})')
+
+        # 內容品質評估
+        self.chinese_char_regex = re.compile(r'[\u4e00-\u9fff]')
+        self.number_regex = re.compile(r'\d+\.?\d*')
+        self.financial_keyword_regexes = [re.compile(k, re.IGNORECASE) for k in self.FINANCIAL_KEYWORDS]
+
+        # 數值清理
+        self.parenthesized_regex = re.compile(r'\([^)]*\)')
+
+        # 動態表格列模式快取: (種類, 年份數量) -> 編譯後模式
+        self._row_regex_cache: Dict[Tuple[str, int], Pattern] = {}
+
+        # 最近一份文件的區域 (同一份內容在各擷取器間共用)
+        self._last_regions: Optional[ContentRegions] = None
+
+    def regions(self, content: str) -> ContentRegions:
+        """取得文件區域；同一個內容物件只定位一次"""
+        if self._last_regions is None or self._last_regions.content is not content:
+            self._last_regions = ContentRegions(self, content)
+        return self._last_regions
+
+    @classmethod
+    def _is_year_led(cls, pattern: str, anchor_tails: Tuple[str, ...]) -> bool:
+        """模式是否必定從錨點位置開始 (可改用候選起點比對)"""
+        if not pattern.startswith(cls.YEAR_LEAD):
+            return False
+        return pattern[len(cls.YEAR_LEAD):].startswith(anchor_tails)
+
+    @staticmethod
+    def findall_at(regex: Pattern, text: str, candidates: List[int]) -> list:
+        """與 regex.findall(text) 結果相同，但只在候選起點嘗試比對
+
+        候選起點必須涵蓋所有可能的比對起點 (由錨點保證)。
+        """
+        results = []
+        last_end = 0
+        for pos in candidates:
+            if pos < last_end:
+                continue
+            match = regex.match(text, pos)
+            if match is None:
+                continue
+            if regex.groups == 0:
+                results.append(match.group(0))
+            elif regex.groups == 1:
+                results.append(match.group(1))
+            else:
+                results.append(match.groups(''))
+            last_end = match.end()
+        return results
+
+    def date_matches(self, regions: ContentRegions) -> List[list]:
+        """各日期模式在內文中的 findall 結果 (依模式順序)"""
+        body = regions.body
+        results = []
+        for regex, anchored in zip(self.date_regexes, self.date_anchored):
+            if anchored:
+                results.append(self.findall_at(regex, body, regions.date_candidates))
+            else:
+                results.append(regex.findall(body))
+        return results
+
+    def eps_matches(self, regions: ContentRegions) -> List[list]:
+        """各 EPS 模式在全文中的 findall 結果 (依模式順序)"""
+        content = regions.content
+        results = []
+        for regex, anchored in zip(self.eps_regexes, self.eps_anchored):
+            if anchored:
+                results.append(self.findall_at(regex, content, regions.eps_candidates))
+            else:
+                results.append(regex.findall(content))
+        return results
+
+    @staticmethod
+    def strip_frontmatter(content: str) -> str:
+        """移除 YAML frontmatter，只返回實際內容"""
+        if content.startswith('---'):
+            end_pos = content.find('---', 3)
+            if end_pos != -1:
+                return content[end_pos + 3:].strip()
+        return content
+
+    @staticmethod
+    def find_table(table_regex: Pattern, content: str) -> Optional[str]:
+        match = table_regex.search(content)
+        return match.group(0) if match else None
+
+    def table_years(self, table_html: Optional[str]) -> List[str]:
+        """從表格標題列提取年份列表 (2023-2030，去重並保持順序)"""
+        if not table_html:
+            return []
+
+        first_row_match = self.first_row_regex.search(table_html)
+        if not first_row_match:
+            return []
+
+        clean_row = self.html_tag_regex.sub('', first_row_match.group(1))
+        ordered_years = []
+        for year in self.year_regex.findall(clean_row):
+            if 2023 <= int(year) <= 2030 and year not in ordered_years:
+                ordered_years.append(year)
+        return ordered_years
+
+    def _row_regex(self, kind: str, num_years: int) -> Pattern:
+        key = (kind, num_years)
+        regex = self._row_regex_cache.get(key)
+        if regex is None:
+            if kind == 'stats':
+                td_patterns = r'\s*<td[^>]*>([^<]+)</td>' * num_years
+                regex = re.compile(rf'<tr>\s*<td[^>]*>{self.TABLE_LABELS}</td>{td_patterns}',
+                                   re.IGNORECASE | re.DOTALL)
+            elif kind == 'html_values':
+                td_patterns = r'<td[^>]*>([0-9,]+(?:\.[0-9]+)?)[^<]*</td>\s*' * num_years
+                regex = re.compile(rf'<tr>\s*<td[^>]*>{self.TABLE_LABELS}</td>\s*{td_patterns}',
+                                   re.IGNORECASE | re.DOTALL)
+            elif kind == 'markdown_values':
+                md_td_pattern = r'[^|]*\|\s*([0-9]+\.?[0-9]*)' * num_years
+                regex = re.compile(rf'\|\s*{self.TABLE_LABELS}{md_td_pattern}')
+            else:
+                raise ValueError(f"未知的表格列模式: {kind}")
+            self._row_regex_cache[key] = regex
+        return regex
+
+    def stats_row_regex(self, num_years: int) -> Pattern:
+        """統計表格列 (最高值/最低值/平均值/中位數 + 每年一格)"""
+        return self._row_regex('stats', num_years)
+
+    def html_value_row_regex(self, num_years: int) -> Pattern:
+        return self._row_regex('html_values', num_years)
+
+    def markdown_value_row_regex(self, num_years: int) -> Pattern:
+        return self._row_regex('markdown_values', num_years)
@@ -539,11 +539,16 @@ class KeywordAnalyzer:
                 if cleaned_query:
                     query_patterns.append(cleaned_query)
         
-        # 2. 從檔案內容中提取 metadata 中的查詢模式
+        # 2. 從檔案內容中提取 metadata 中的查詢模式 (精簡記錄: 解析時已擷取)
         content = company_data.get('content', '')
         if content:
             metadata_patterns = self._extract_query_patterns_from_content_metadata(content)
             query_patterns.extend(metadata_patterns)
+        else:
+            for raw_query in company_data.get('front_matter_queries', []):
+                cleaned_pattern = self._clean_query_pattern(raw_query)
+                if cleaned_pattern:
+                    query_patterns.append(cleaned_pattern)
         
         # 去重但保持順序
         unique_patterns = []
@@ -13,6 +13,8 @@ from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
 import statistics
 
+import pandas as pd
+
 # 導入現有的MD解析器以確保日期提取邏輯一致
 try:
     from md_parser import MDParser
@@ -127,7 +129,15 @@ class MDFileCleanupManager:
         successful_extractions = 0
         failed_extractions = 0
         
-        for filename in os.listdir(self.md_dir):
+        # 語料索引: 未變更的檔案直接使用已解析欄位，只重新解析變更過的檔案
+        indexed_files, filenames = self._scan_from_corpus_index()
+        if indexed_files:
+            md_files.extend(indexed_files)
+            total_files += len(indexed_files)
+            successful_extractions += sum(1 for file_info in indexed_files if file_info.md_date)
+            failed_extractions += sum(1 for file_info in indexed_files if not file_info.md_date)
+        
+        for filename in filenames:
             if not filename.endswith('.md'):
                 continue
                 
@@ -155,6 +165,47 @@ class MDFileCleanupManager:
         
         return md_files
 
+    def _scan_from_corpus_index(self) -> Tuple[List[MDFileInfo], List[str]]:
+        """由語料索引建立檔案資訊；回傳 (索引內的檔案, 需重新解析的檔名)"""
+        try:
+            from corpus_index import CorpusIndex
+            df, stale_files = CorpusIndex.load_fresh(self.md_dir)
+        except Exception as e:
+            print(f"⚠️ 語料索引無法載入: {e}")
+            df, stale_files = None, []
+
+        if df is None:
+            return [], os.listdir(self.md_dir)
+
+        print(f"🗂️ 語料索引: {len(df)} 個檔案免解析，{len(stale_files)} 個檔案需重新解析")
+        now = datetime.now()
+        md_dates = pd.to_datetime(df['content_date'], format='%Y/%m/%d', errors='coerce')
+        extracted_dates = pd.to_datetime(df['extracted_date'].str.slice(0, 19), format='%Y-%m-%dT%H:%M:%S',
+                                         errors='coerce')
+
+        indexed_files = []
+        for row, md_date, extracted_date in zip(df.itertuples(index=False), md_dates, extracted_dates):
+            md_date = md_date.to_pydatetime() if pd.notna(md_date) else None
+            extracted_date = extracted_date.to_pydatetime() if pd.notna(extracted_date) else None
+            reference_date = md_date or extracted_date
+            company_code, company_name = self._parse_filename(row.filename)
+            indexed_files.append(MDFileInfo(
+                filepath=os.path.join(self.md_dir, row.filename),
+                filename=row.filename,
+                file_size=int(row.file_size),
+                file_mtime=datetime.fromtimestamp(row.file_mtime_ns / 1e9),
+                md_date=md_date,
+                extracted_date=extracted_date,
+                quality_score=None if pd.isna(row.yaml_quality_score) else float(row.yaml_quality_score),
+                company_code=company_code,
+                company_name=company_name,
+                age_days=(now - reference_date).days if reference_date else 0,
+                deletion_candidate=False,
+                preservation_reason=None,
+                date_extraction_method="corpus_index" if md_date else ("corpus_index_yaml" if extracted_date else "no_date_found")
+            ))
+        return indexed_files, stale_files
+
     def _extract_file_info(self, filepath: str) -> MDFileInfo:
         """提取單個MD檔案的資訊"""
         filename = os.path.basename(filepath)
@@ -14,10 +14,15 @@ from datetime import datetime
 from typing import Dict, Any, List, Optional, Tuple
 import statistics
 import json
+import hashlib
 try:
     from quality_analyzer_simplified import QualityAnalyzerSimplified
 except ImportError:
     from process_group.quality_analyzer_simplified import QualityAnalyzerSimplified
+try:
+    from extraction_engine import ExtractionEngine
+except ImportError:
+    from process_group.extraction_engine import ExtractionEngine
 
 # Set UTF-8 encoding for Windows console (only if not already set)
 if sys.platform == 'win32' and hasattr(sys.stdout, 'buffer'):
@@ -68,8 +73,9 @@ class MDParser:
             r'(\d{4})\s*年\s*[:：]?\s*([0-9]+\.?[0-9]*)',
             r'(\d{4})\s*eps\s*[預估預測估算]*\s*[:：]\s*([0-9]+\.?[0-9]*)',
             r'eps\s*(\d{4})\s*[:：]\s*([0-9]+\.?[0-9]*)',
-            r'平均值[^|]*(\d{4})[^|]*\|\s*([0-9]+\.?[0-9]*)',
-            r'中位數[^|]*(\d{4})[^|]*\|\s*([0-9]+\.?[0-9]*)',
+            # 先確認 "|" 後接數字再回溯年份，避免長內容中的災難性回溯
+            r'平均值(?=[^|]*\|\s*[0-9])[^|]*(\d{4})[^|]*\|\s*([0-9]+\.?[0-9]*)',
+            r'中位數(?=[^|]*\|\s*[0-9])[^|]*(\d{4})[^|]*\|\s*([0-9]+\.?[0-9]*)',
         ]
         
         self.target_price_patterns = [
@@ -90,9 +96,20 @@ class MDParser:
             r'(\d+)\s*analysts?',
         ]
 
+        # 預編譯擷取引擎 (所有模式只編譯一次，文件區域只定位一次)
+        self.engine = ExtractionEngine(
+            date_patterns=self.date_patterns,
+            eps_patterns=self.eps_patterns,
+            target_price_patterns=self.target_price_patterns,
+            revenue_patterns=self.revenue_patterns,
+            analyst_patterns=self.analyst_patterns,
+            metadata_patterns=self.metadata_patterns
+        )
+
         # 載入觀察名單並進行嚴格驗證
         self.watch_list_mapping = self._load_watch_list_mapping_enhanced()
         self.validation_enabled = len(self.watch_list_mapping) > 0
+        self.watch_list_fingerprint = self._compute_watch_list_fingerprint(self.watch_list_mapping)
 
         # 初始化品質分析器 (用於版本遷移時重新計算分數)
         self.quality_analyzer = QualityAnalyzerSimplified()
@@ -100,6 +117,9 @@ class MDParser:
         # 強制重新掃描標記 (用於修復已遷移但分數不正確的檔案)
         self.force_rescan = False
 
+        # 解析結果快取 (ParseCache，由呼叫端啟用)
+        self.parse_cache = None
+
         print(f"MDParser v{self.version} 初始化完成")
         print(f"觀察名單驗證: {'啟用' if self.validation_enabled else '停用'} ({len(self.watch_list_mapping)} 家公司)")
 
@@ -217,6 +237,25 @@ class MDParser:
         print("系統將在無驗證模式下運行")
         return {}
 
+    def _compute_watch_list_fingerprint(self, mapping: Dict[str, str]) -> str:
+        """觀察名單指紋 (名單變更時解析快取需失效)"""
+        payload = json.dumps(sorted(mapping.items()), ensure_ascii=False)
+        return hashlib.md5(payload.encode('utf-8')).hexdigest()
+
+    def enable_parse_cache(self, cache_path: Optional[str] = None):
+        """啟用持久化解析快取"""
+        try:
+            from parse_cache import ParseCache
+        except ImportError:
+            from process_group.parse_cache import ParseCache
+
+        self.parse_cache = ParseCache(
+            parser_version=self.version,
+            watchlist_fingerprint=self.watch_list_fingerprint,
+            cache_path=cache_path
+        )
+        return self.parse_cache
+
     def _check_and_migrate_version(self, file_path: str, yaml_data: Dict, force_rescan: bool = False) -> bool:
         """
         檢查 MD 檔案版本，若過時則更新 metadata
@@ -532,6 +571,20 @@ class MDParser:
         return round(min(score, 10), 2)
 
     def parse_md_file(self, file_path: str) -> Dict[str, Any]:
+        """v3.6.1 增強版 MD 檔案解析 (支援解析快取)"""
+        if self.parse_cache is not None and not self.force_rescan:
+            cached = self.parse_cache.get(file_path)
+            if cached is not None:
+                return cached
+
+        result = self._parse_md_file_uncached(file_path)
+
+        if self.parse_cache is not None:
+            self.parse_cache.put(file_path, result)
+
+        return result
+
+    def _parse_md_file_uncached(self, file_path: str) -> Dict[str, Any]:
         """v3.6.1 增強版 MD 檔案解析"""
         try:
             # 讀取檔案內容
@@ -652,8 +705,8 @@ class MDParser:
                         yaml_content = content[3:end_pos].strip()
                         
                         # 使用正則表達式提取查詢相關欄位
-                        for field_name, pattern in self.metadata_patterns.items():
-                            matches = re.findall(pattern, yaml_content, re.MULTILINE | re.IGNORECASE)
+                        for field_name, regex in self.engine.metadata_regexes.items():
+                            matches = regex.findall(yaml_content)
                             for match in matches:
                                 if match.strip():
                                     cleaned_keywords = self._clean_and_split_keywords(match.strip())
@@ -766,23 +819,19 @@ class MDParser:
         
         try:
             # 中文字符比例
-            chinese_chars = len(re.findall(r'[\u4e00-\u9fff]', content))
+            chinese_chars = len(self.engine.chinese_char_regex.findall(content))
             if metrics['content_length'] > 0:
                 metrics['chinese_char_ratio'] = round(chinese_chars / metrics['content_length'], 3)
             
             # 財務關鍵字計數
-            financial_keywords = [
-                'eps', '每股盈餘', '營收', '獲利', '淨利', '毛利', '目標價', '分析師', 
-                '預估', '評等', 'factset', 'bloomberg', '股價', '市值'
-            ]
-            for keyword in financial_keywords:
-                metrics['financial_keyword_count'] += len(re.findall(keyword, content, re.IGNORECASE))
+            for keyword_regex in self.engine.financial_keyword_regexes:
+                metrics['financial_keyword_count'] += len(keyword_regex.findall(content))
             
             # 表格計數
             metrics['table_count'] = content.count('|')
             
             # 數字計數
-            metrics['number_count'] = len(re.findall(r'\d+\.?\d*', content))
+            metrics['number_count'] = len(self.engine.number_regex.findall(content))
             
             # 結構評分 (0-10)
             structure_score = 0
@@ -1172,12 +1221,11 @@ class MDParser:
     # Keep all other existing methods unchanged
     def _extract_content_date_bulletproof(self, content: str) -> Optional[str]:
         """絕對防彈的日期提取 - 排除 YAML frontmatter"""
-        actual_content = self._get_content_without_yaml(content)
+        regions = self.engine.regions(content)
+        actual_content = regions.body
         found_dates = []
         
-        for i, pattern in enumerate(self.date_patterns):
-            matches = re.findall(pattern, actual_content, re.MULTILINE | re.DOTALL)
-            
+        for i, (pattern, matches) in enumerate(zip(self.date_patterns, self.engine.date_matches(regions))):
             if matches:
                 for match in matches:
                     try:
@@ -1186,7 +1234,10 @@ class MDParser:
                             
                             if self._validate_date(year, month, day):
                                 date_str = f"{year}/{int(month)}/{int(day)}"
-                                confidence = self._calculate_date_confidence(pattern, match, actual_content, i)
+                                confidence = self._calculate_date_confidence(
+                                    pattern, match, actual_content, i,
+                                    mentions_cmoney=regions.body_mentions_cmoney
+                                )
                                 
                                 found_dates.append({
                                     'date': date_str,
@@ -1208,15 +1259,7 @@ class MDParser:
 
     def _get_content_without_yaml(self, content: str) -> str:
         """移除 YAML frontmatter，只返回實際內容"""
-        try:
-            if content.startswith('---'):
-                end_pos = content.find('---', 3)
-                if end_pos != -1:
-                    actual_content = content[end_pos + 3:].strip()
-                    return actual_content
-        except Exception as e:
-            pass
-        return content
+        return self.engine.regions(content).body
 
     def _validate_date(self, year: str, month: str, day: str) -> bool:
         """驗證日期的合理性"""
@@ -1233,9 +1276,12 @@ class MDParser:
         except (ValueError, TypeError):
             return False
 
-    def _calculate_date_confidence(self, pattern: str, match: tuple, content: str, pattern_index: int) -> float:
+    def _calculate_date_confidence(self, pattern: str, match: tuple, content: str, pattern_index: int,
+                                   mentions_cmoney: Optional[bool] = None) -> float:
         """計算日期匹配的可信度"""
         confidence = 5.0
+        if mentions_cmoney is None:
+            mentions_cmoney = 'cmoney' in content.lower() or 'CMoney' in content
         
         if pattern_index == 0:
             confidence += 6.0
@@ -1245,7 +1291,7 @@ class MDParser:
             confidence += 5.0
         elif pattern_index <= 6:
             confidence += 4.0
-        elif 'cmoney' in content.lower() or 'CMoney' in content:
+        elif mentions_cmoney:
             confidence += 2.5
         elif '鉅亨網' in pattern:
             confidence += 2.0
@@ -1303,29 +1349,7 @@ class MDParser:
     def _extract_table_years(self, table_html: str) -> List[str]:
         """從表格標題列提取年份列表"""
         try:
-            # 尋找第一個 tr (標題列)
-            first_row_match = re.search(r'<tr>(.*?)</tr>', table_html, re.DOTALL | re.IGNORECASE)
-            if not first_row_match:
-                return []
-            
-            row_content = first_row_match.group(1)
-            # 移除所有 HTML 標籤
-            clean_row = re.sub(r'<[^>]+>', '', row_content)
-            # 尋找所有 4 位數字 (年份)
-            years = re.findall(r'(\d{4})', clean_row)
-            
-            # 過濾合理的年份範圍 (2023-2030)
-            valid_years = [y for y in years if 2023 <= int(y) <= 2030]
-            
-            # 去重並保持順序
-            seen = set()
-            ordered_years = []
-            for y in valid_years:
-                if y not in seen:
-                    ordered_years.append(y)
-                    seen.add(y)
-            
-            return ordered_years
+            return self.engine.table_years(table_html)
         except Exception as e:
             print(f"⚠️ 提取表格年份失敗: {e}")
             return []
@@ -1340,8 +1364,7 @@ class MDParser:
         else:
             eps_data.update(self._extract_eps_from_table(content))
 
-        for pattern in self.eps_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+        for matches in self.engine.eps_matches(self.engine.regions(content)):
             for match in matches:
                 try:
                     year = match[0]
@@ -1361,12 +1384,13 @@ class MDParser:
         """從表格中提取 EPS 資料 (增強版：動態年份)"""
         eps_data = {'2025': [], '2026': [], '2027': [], '2028': []}
         
-        # 1. 定位表格並提取年份
-        table_html = self._find_eps_table_html(content)
+        # 1. 定位表格並提取年份 (每份文件只定位一次)
+        regions = self.engine.regions(content)
+        table_html = regions.eps_table
         if not table_html:
             return eps_data
             
-        table_years = self._extract_table_years(table_html)
+        table_years = regions.eps_table_years
         if not table_years:
             return eps_data
             
@@ -1375,10 +1399,9 @@ class MDParser:
         # 2. 根據年份數量提取數據
         # Markdown 表格模式
         if '|' in content:
-            md_td_pattern = "".join([r'[^|]*\|\s*([0-9]+\.?[0-9]*)' for _ in range(num_years)])
-            md_row_pattern = rf'\|\s*(最高值|最低值|平均值|中位數){md_td_pattern}'
+            md_row_regex = self.engine.markdown_value_row_regex(num_years)
             
-            for match in re.findall(md_row_pattern, content):
+            for match in md_row_regex.findall(content):
                 label = match[0]
                 values = match[1:]
                 for year, val_str in zip(table_years, values):
@@ -1390,10 +1413,9 @@ class MDParser:
                         except: continue
 
         # HTML 表格模式
-        td_patterns = "".join([r'<td[^>]*>([0-9,]+(?:\.[0-9]+)?)[^<]*</td>\s*' for _ in range(num_years)])
-        html_row_pattern = rf'<tr>\s*<td[^>]*>(最高值|最低值|平均值|中位數)</td>\s*{td_patterns}'
+        html_row_regex = self.engine.html_value_row_regex(num_years)
         
-        for match in re.findall(html_row_pattern, table_html, re.IGNORECASE | re.DOTALL):
+        for match in html_row_regex.findall(table_html):
             label = match[0]
             values = match[1:]
             for year, val_str in zip(table_years, values):
@@ -1408,7 +1430,8 @@ class MDParser:
 
     def _extract_eps_table_stats(self, content: str) -> Dict[str, Dict[str, float]]:
         """從 EPS 表格提取統計值 (動態年份)"""
-        table_html = self._find_eps_table_html(content)
+        regions = self.engine.regions(content)
+        table_html = regions.eps_table
         if not table_html:
             return {}
 
@@ -1416,16 +1439,14 @@ class MDParser:
         stats: Dict[str, Dict[str, float]] = {}
 
         # 動態提取年份
-        table_years = self._extract_table_years(table_html)
+        table_years = regions.eps_table_years
         if not table_years:
             return {}
 
-        num_years = len(table_years)
-        # 構建對應年份數量的 td 模式
-        td_patterns = "".join([r'\s*<td[^>]*>([^<]+)</td>' for _ in range(num_years)])
-        row_pattern = rf'<tr>\s*<td[^>]*>(最高值|最低值|平均值|中位數)</td>{td_patterns}'
+        # 對應年份數量的列模式 (已快取編譯)
+        row_regex = self.engine.stats_row_regex(len(table_years))
         
-        for match in re.findall(row_pattern, table_html, re.IGNORECASE | re.DOTALL):
+        for match in row_regex.findall(table_html):
             label = match[0]
             values = match[1:]
             for year, raw in zip(table_years, values):
@@ -1437,29 +1458,15 @@ class MDParser:
 
     def _find_eps_table_html(self, content: str) -> Optional[str]:
         """定位市場預估 EPS 表格"""
-        eps_table_match = re.search(
-            r'市場預估EPS.*?<table[^>]*>.*?</table>',
-            content,
-            re.DOTALL
-        )
-        if eps_table_match:
-            return eps_table_match.group(0)
-        return None
+        return self.engine.regions(content).eps_table
 
     def _find_revenue_table_html(self, content: str) -> Optional[str]:
         """定位市場預估營收表格"""
-        revenue_table_match = re.search(
-            r'市場預估營收.*?<table[^>]*>.*?</table>',
-            content,
-            re.DOTALL
-        )
-        if revenue_table_match:
-            return revenue_table_match.group(0)
-        return None
+        return self.engine.regions(content).revenue_table
 
     def _parse_numeric_value(self, value: str, min_val: float = 0) -> Optional[float]:
         """解析表格中的數值"""
-        value = re.sub(r'\([^)]*\)', '', value)
+        value = self.engine.parenthesized_regex.sub('', value)
         value = value.replace(',', '').strip()
         try:
             number = float(value)
@@ -1472,22 +1479,21 @@ class MDParser:
 
     def _extract_revenue_table_stats(self, content: str) -> Dict[str, Dict[str, float]]:
         """從營收表格提取統計值 (動態年份)"""
-        table_html = self._find_revenue_table_html(content)
+        regions = self.engine.regions(content)
+        table_html = regions.revenue_table
         if not table_html:
             return {}
 
         label_map = {'最高值': 'high', '最低值': 'low', '平均值': 'avg', '中位數': 'median'}
         stats: Dict[str, Dict[str, float]] = {}
 
-        table_years = self._extract_table_years(table_html)
+        table_years = regions.revenue_table_years
         if not table_years:
             return {}
 
-        num_years = len(table_years)
-        td_patterns = "".join([r'\s*<td[^>]*>([^<]+)</td>' for _ in range(num_years)])
-        row_pattern = rf'<tr>\s*<td[^>]*>(最高值|最低值|平均值|中位數)</td>{td_patterns}'
+        row_regex = self.engine.stats_row_regex(len(table_years))
         
-        for match in re.findall(row_pattern, table_html, re.IGNORECASE | re.DOTALL):
+        for match in row_regex.findall(table_html):
             label = match[0]
             values = match[1:]
             for year, raw in zip(table_years, values):
@@ -1513,11 +1519,11 @@ class MDParser:
 
     def _extract_target_price(self, content: str) -> Optional[float]:
         """提取目標價格"""
-        for pattern in self.target_price_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            if matches:
+        for regex in self.engine.target_price_regexes:
+            match = regex.search(content)
+            if match:
                 try:
-                    price = float(matches[0])
+                    price = float(match.group(1))
                     if 0 < price < 10000:
                         return price
                 except ValueError:
@@ -1526,11 +1532,11 @@ class MDParser:
 
     def _extract_analyst_count(self, content: str) -> int:
         """提取分析師數量"""
-        for pattern in self.analyst_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            if matches:
+        for regex in self.engine.analyst_regexes:
+            match = regex.search(content)
+            if match:
                 try:
-                    count = int(matches[0])
+                    count = int(match.group(1))
                     if 0 < count < 1000:
                         return count
                 except ValueError:
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Parse Cache - FactSet Pipeline v3.6.1
+MD 解析結果的持久化快取 (SQLite)
+
+每個 MD 檔案以 路徑 + 大小 + mtime + 內容雜湊 + 解析器版本 + 觀察名單指紋 為鍵，
+未變更的檔案直接回傳已儲存的結構化結果，不再經過正則解析。
+"""
+
+import os
+import sqlite3
+import pickle
+import hashlib
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+
+
+class ParseCache:
+    """MDParser.parse_md_file 的增量快取"""
+
+    DEFAULT_CACHE_PATH = os.path.join("cache", "process", "parse_cache.sqlite3")
+
+    # 不寫入快取的欄位 (大型原始內容，命中時從檔案重新讀取)
+    EXCLUDED_FIELDS = ('content',)
+
+    def __init__(self, parser_version: str, watchlist_fingerprint: str = "",
+                 cache_path: Optional[str] = None):
+        self.cache_path = cache_path or self.DEFAULT_CACHE_PATH
+        # 解析器版本或觀察名單變更時，舊紀錄自動失效
+        self.namespace = f"{parser_version}|{watchlist_fingerprint}"
+
+        self.stats = {
+            'hits': 0,
+            'hash_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'errors': 0
+        }
+
+        cache_dir = os.path.dirname(self.cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.cache_path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS parse_cache (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                namespace TEXT NOT NULL,
+                result BLOB NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        # 清除其他版本留下的紀錄
+        self._conn.execute("DELETE FROM parse_cache WHERE namespace != ?", (self.namespace,))
+        self._conn.commit()
+
+    @staticmethod
+    def hash_content(raw: bytes) -> str:
+        """計算檔案內容雜湊"""
+        return hashlib.sha1(raw).hexdigest()
+
+    @staticmethod
+    def _cache_key(file_path: str) -> str:
+        return os.path.normpath(os.path.abspath(file_path))
+
+    def _read_file(self, file_path: str) -> Tuple[os.stat_result, bytes]:
+        with open(file_path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            raw = f.read()
+        return st, raw
+
+    def get(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """取得快取結果；未命中回傳 None"""
+        key = self._cache_key(file_path)
+        try:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, content_hash, result FROM parse_cache "
+                "WHERE path = ? AND namespace = ?",
+                (key, self.namespace)
+            ).fetchone()
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+
+            size, mtime_ns, content_hash, blob = row
+            st, raw = self._read_file(file_path)
+
+            if st.st_size == size and st.st_mtime_ns == mtime_ns:
+                self.stats['hits'] += 1
+            elif st.st_size == size and self.hash_content(raw) == content_hash:
+                # 內容未變但 mtime 不同 (例如 git checkout)，更新 mtime 後視為命中
+                self._conn.execute(
+                    "UPDATE parse_cache SET mtime_ns = ? WHERE path = ?",
+                    (st.st_mtime_ns, key)
+                )
+                self._conn.commit()
+                self.stats['hash_hits'] += 1
+            else:
+                self.stats['misses'] += 1
+                return None
+
+            result = pickle.loads(blob)
+            content = raw.decode('utf-8')
+            result['content'] = content
+            result['content_length'] = len(content)
+            result['file_mtime'] = datetime.fromtimestamp(st.st_mtime)
+            return result
+
+        except Exception as e:
+            print(f"⚠️ 解析快取讀取失敗 {os.path.basename(file_path)}: {e}")
+            self.stats['errors'] += 1
+            return None
+
+    def put(self, file_path: str, result: Dict[str, Any]) -> bool:
+        """儲存解析結果 (以檔案目前的狀態為鍵)"""
+        if result.get('error'):
+            return False
+
+        key = self._cache_key(file_path)
+        try:
+            st, raw = self._read_file(file_path)
+            payload = {k: v for k, v in result.items() if k not in self.EXCLUDED_FIELDS}
+            blob = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO parse_cache "
+                "(path, size, mtime_ns, content_hash, namespace, result, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, st.st_size, st.st_mtime_ns, self.hash_content(raw),
+                 self.namespace, blob, datetime.now().isoformat())
+            )
+            self._conn.commit()
+            self.stats['stores'] += 1
+            return True
+
+        except Exception as e:
+            print(f"⚠️ 解析快取寫入失敗 {os.path.basename(file_path)}: {e}")
+            self.stats['errors'] += 1
+            return False
+
+    def prune_missing(self) -> int:
+        """移除已不存在的檔案紀錄"""
+        removed = 0
+        try:
+            rows = self._conn.execute("SELECT path FROM parse_cache").fetchall()
+            for (path,) in rows:
+                if not os.path.exists(path):
+                    self._conn.execute("DELETE FROM parse_cache WHERE path = ?", (path,))
+                    removed += 1
+            if removed:
+                self._conn.commit()
+        except Exception as e:
+            print(f"⚠️ 解析快取清理失敗: {e}")
+        return removed
+
+    def clear(self) -> None:
+        """清空快取"""
+        self._conn.execute("DELETE FROM parse_cache")
+        self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """取得命中統計"""
+        total_hits = self.stats['hits'] + self.stats['hash_hits']
+        total = total_hits + self.stats['misses']
+        return {
+            **self.stats,
+            'total_lookups': total,
+            'hit_rate': round(total_hits / total * 100, 1) if total > 0 else 0.0,
+            'cache_path': self.cache_path
+        }
+
+    def close(self) -> None:
+        try:
+            self._conn.close()
+        except Exception:
+            pass
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Parsed Record - FactSet Pipeline v3.6.1
+MD 解析結果的精簡型別記錄 (slots dataclass)
+
+- 常用欄位為 slots 屬性，不再每筆各帶一個約 60 鍵的 dict
+- EPS / 營收 2025-2028 的 高/低/平均/中位數 共 32 格存成固定長度 float 陣列 (None = NaN)
+- 其他較少使用的欄位 (yaml_data、validation_result...) 放在 extra
+- 同時提供 dict 相容介面 (get / [] / in / items / update)，
+  既有以 .get('eps_2025_high') 讀取的分析器與報告不需修改
+"""
+
+import math
+from array import array
+from collections.abc import MutableMapping
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+GRID_METRICS = ('eps', 'revenue')
+GRID_YEARS = ('2025', '2026', '2027', '2028')
+GRID_STATS = ('high', 'low', 'avg', 'median')
+
+# 'eps_2025_high' ... 'revenue_2028_median'，順序即陣列索引
+GRID_KEYS: Tuple[str, ...] = tuple(
+    f'{metric}_{year}_{stat}'
+    for metric in GRID_METRICS for year in GRID_YEARS for stat in GRID_STATS
+)
+GRID_INDEX: Dict[str, int] = {key: index for index, key in enumerate(GRID_KEYS)}
+
+_NAN = float('nan')
+_UNSET = object()   # slot 欄位未設定 (對應 dict 中不存在的鍵)
+
+
+def grid_index(metric: str, year: str, stat: str) -> int:
+    return GRID_INDEX[f'{metric}_{year}_{stat}']
+
+
+def _empty_grid() -> array:
+    return array('d', [_NAN] * len(GRID_KEYS))
+
+
+@dataclass(slots=True, eq=False)
+class ParsedRecord(MutableMapping):
+    """精簡 MD 解析記錄；同時是 dict 相容的 mapping"""
+
+    filename: str = _UNSET
+    company_code: str = _UNSET
+    company_name: str = _UNSET
+    data_source: str = _UNSET
+    content_date: str = _UNSET
+    extracted_date: Any = _UNSET
+    quality_score: float = _UNSET
+    target_price: Optional[float] = _UNSET
+    analyst_count: int = _UNSET
+    has_eps_data: bool = _UNSET
+    has_target_price: bool = _UNSET
+    content_validation_passed: bool = _UNSET
+    grid: array = field(default_factory=_empty_grid)
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ParsedRecord':
+        record = cls()
+        for key, value in data.items():
+            record[key] = value
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    # -- EPS / 營收 陣列 ------------------------------------------------------
+
+    def grid_value(self, index: int) -> Optional[float]:
+        value = self.grid[index]
+        return None if math.isnan(value) else value
+
+    # -- dict 相容介面 --------------------------------------------------------
+
+    def __getitem__(self, key: str) -> Any:
+        index = GRID_INDEX.get(key)
+        if index is not None:
+            return self.grid_value(index)
+        if key in _SLOT_FIELDS:
+            value = getattr(self, key)
+            if value is _UNSET:
+                raise KeyError(key)
+            return value
+        return self.extra[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        index = GRID_INDEX.get(key)
+        if index is not None:
+            value = self.grid[index]
+            return default if math.isnan(value) else value
+        if key in _SLOT_FIELDS:
+            value = getattr(self, key)
+            return default if value is _UNSET else value
+        return self.extra.get(key, default)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        index = GRID_INDEX.get(key)
+        if index is not None:
+            self.grid[index] = _NAN if value is None else float(value)
+        elif key in _SLOT_FIELDS:
+            setattr(self, key, value)
+        else:
+            self.extra[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        index = GRID_INDEX.get(key)
+        if index is not None:
+            self.grid[index] = _NAN
+        elif key in _SLOT_FIELDS:
+            if getattr(self, key) is _UNSET:
+                raise KeyError(key)
+            setattr(self, key, _UNSET)
+        else:
+            del self.extra[key]
+
+    def __contains__(self, key: object) -> bool:
+        if key in GRID_INDEX:
+            return True
+        if key in _SLOT_FIELDS:
+            return getattr(self, key) is not _UNSET
+        return key in self.extra
+
+    def __iter__(self) -> Iterator[str]:
+        for name in _SLOT_FIELDS:
+            if getattr(self, name) is not _UNSET:
+                yield name
+        yield from GRID_KEYS
+        yield from self.extra
+
+    def __len__(self) -> int:
+        set_slots = sum(1 for name in _SLOT_FIELDS if getattr(self, name) is not _UNSET)
+        return set_slots + len(GRID_KEYS) + len(self.extra)
+
+    def __repr__(self) -> str:
+        return (f"ParsedRecord({self.get('company_code')} {self.get('company_name')}, "
+                f"{self.get('filename')}, quality={self.get('quality_score')})")
+
+
+_SLOT_FIELDS = frozenset(
+    name for name in ParsedRecord.__dataclass_fields__ if name not in ('grid', 'extra')
+)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Pattern Yield Store - FactSet Pipeline v3.6.1
+查詢模式成效資料庫 - 由 Process Group 寫入，Search Group 啟動時讀取
+
+- 依 查詢模板 × 公司 記錄: 回傳結果數、抓取數、MD 檔案數、驗證通過數、
+  含 EPS 資料檔案數與平均品質評分
+- 檔案數/驗證/品質來自 MD 語料；回傳/抓取數來自搜尋端 progress.json (若存在)
+  與搜尋 workflow 各批次提交的快照 data/search_stats/progress_batch*.json
+  (process job 不會還原搜尋端快取，只能讀取已提交的快照)
+- 輸出為單一 JSON (data/reports/pattern_yield_latest.json)，隨報告一起提交，
+  SearchEngine 以此排序或剔除對該公司無效的查詢模式
+"""
+
+import os
+import re
+import glob
+import json
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+
+class PatternYieldStore:
+    """查詢模式成效統計 (模板 × 公司)"""
+
+    DEFAULT_STORE_PATH = os.path.join('data', 'reports', 'pattern_yield_latest.json')
+    DEFAULT_PROGRESS_PATH = os.path.join('cache', 'search', 'progress.json')
+    SEARCH_STATS_GLOB = os.path.join('data', 'search_stats', 'progress_*.json')
+    COUNTERS = ('returned', 'fetched', 'files', 'valid', 'eps_files')
+
+    def __init__(self, store_path: Optional[str] = None):
+        self.store_path = store_path or self.DEFAULT_STORE_PATH
+        self.version = "3.6.1"
+        self.updated_at = ''
+        self.patterns: Dict[str, Dict[str, Any]] = {}
+        self.companies: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    # -- 模板標準化 --------------------------------------------------------
+
+    @staticmethod
+    def to_template(query: str, symbol: str = '', name: str = '') -> str:
+        """查詢字串 -> 模板: 去除引號、公司代號/名稱換成 {symbol}/{name}"""
+        template = re.sub(r'["\']', '', str(query or ''))
+        if symbol:
+            template = re.sub(rf'(?<!\d){re.escape(str(symbol))}(?!\d)', '{symbol}', template)
+        if name:
+            template = template.replace(name, '{name}')
+        return re.sub(r'\s+', ' ', template).strip()
+
+    @staticmethod
+    def _empty_entry() -> Dict[str, Any]:
+        return {'returned': 0, 'fetched': 0, 'files': 0, 'valid': 0, 'eps_files': 0, 'quality_sum': 0.0}
+
+    @staticmethod
+    def yield_score(entry: Dict[str, Any]) -> float:
+        """成效分數: 平均品質 × 驗證通過率 × 使用量加權"""
+        files = entry.get('files', 0)
+        if not files:
+            return 0.0
+        avg_quality = entry.get('avg_quality', entry.get('quality_sum', 0) / files)
+        valid_rate = entry.get('valid', 0) / files
+        return round(avg_quality * valid_rate * (1 + min(files, 100) / 100), 3)
+
+    # -- 建立 (Process Group) ----------------------------------------------
+
+    def build(self, processed_companies: List[Dict[str, Any]],
+              progress_path: Optional[str] = None) -> 'PatternYieldStore':
+        """由解析後的 MD 資料 (與搜尋端 progress.json) 重新計算"""
+        companies: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        names: Dict[str, str] = {}
+
+        for company_data in processed_companies:
+            symbol = str(company_data.get('company_code') or '')
+            name = company_data.get('company_name') or ''
+            yaml_data = company_data.get('yaml_data') or {}
+            query = yaml_data.get('search_query') or ''
+            if not symbol or not query:
+                continue
+            names[symbol] = name
+
+            template = self.to_template(query, symbol, name)
+            entry = companies.setdefault(symbol, {}).setdefault(template, self._empty_entry())
+            entry['files'] += 1
+            entry['fetched'] += 1
+            if company_data.get('content_validation_passed', True):
+                entry['valid'] += 1
+            if company_data.get('has_eps_data'):
+                entry['eps_files'] += 1
+            entry['quality_sum'] += float(company_data.get('quality_score') or 0)
+
+        # 搜尋端統計: 每個查詢實際回傳/抓取的結果數
+        for symbol, query_stats in self._load_search_stats(progress_path).items():
+            for query, stats in query_stats.items():
+                template = self.to_template(query, symbol, names.get(symbol, ''))
+                entry = companies.setdefault(symbol, {}).setdefault(template, self._empty_entry())
+                entry['returned'] = max(entry['returned'], int(stats.get('returned', 0)))
+                entry['fetched'] = max(entry['fetched'], int(stats.get('fetched', 0)))
+
+        self.companies = {}
+        self.patterns = {}
+        for symbol, templates in companies.items():
+            for template, entry in templates.items():
+                finished = self._finish_entry(entry)
+                self.companies.setdefault(symbol, {})[template] = finished
+
+                total = self.patterns.setdefault(template, {**self._empty_entry(), 'company_count': 0})
+                for counter in self.COUNTERS:
+                    total[counter] += entry[counter]
+                total['quality_sum'] += entry['quality_sum']
+                total['company_count'] += 1
+
+        self.patterns = {template: self._finish_entry(entry) for template, entry in self.patterns.items()}
+        self.updated_at = datetime.now().isoformat()
+        return self
+
+    def _finish_entry(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        finished = {key: value for key, value in entry.items() if key != 'quality_sum'}
+        finished['avg_quality'] = round(entry['quality_sum'] / entry['files'], 2) if entry['files'] else 0.0
+        finished['yield_score'] = self.yield_score(finished)
+        return finished
+
+    def _load_search_stats(self, progress_path: Optional[str]) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """合併所有進度檔的 pattern_stats (同一查詢取各計數最大值)
+
+        指定路徑只讀該檔；預設讀本機 progress.json 與已提交的批次快照
+        """
+        if progress_path:
+            paths = [progress_path]
+        else:
+            paths = [self.DEFAULT_PROGRESS_PATH] + sorted(glob.glob(self.SEARCH_STATS_GLOB))
+
+        merged: Dict[str, Dict[str, Dict[str, int]]] = {}
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    progress = json.load(f)
+            except Exception as e:
+                print(f"⚠️ 無法讀取搜尋進度檔 {path}: {e}")
+                continue
+            for symbol, entry in progress.items():
+                if not isinstance(entry, dict) or not isinstance(entry.get('pattern_stats'), dict):
+                    continue
+                symbol_stats = merged.setdefault(symbol, {})
+                for query, stats in entry['pattern_stats'].items():
+                    if not isinstance(stats, dict):
+                        continue
+                    current = symbol_stats.setdefault(query, {})
+                    for counter, value in stats.items():
+                        try:
+                            current[counter] = max(current.get(counter, 0), int(value))
+                        except (TypeError, ValueError):
+                            continue
+        return merged
+
+    # -- 讀寫 ----------------------------------------------------------------
+
+    def save(self) -> str:
+        store_dir = os.path.dirname(self.store_path)
+        if store_dir:
+            os.makedirs(store_dir, exist_ok=True)
+        with open(self.store_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': self.version,
+                'updated_at': self.updated_at,
+                'patterns': self.patterns,
+                'companies': self.companies
+            }, f, ensure_ascii=False, indent=1, sort_keys=True)
+        return self.store_path
+
+    @classmethod
+    def load(cls, store_path: Optional[str] = None) -> Optional['PatternYieldStore']:
+        """讀取已儲存的統計; 檔案不存在或損毀時回傳 None"""
+        store = cls(store_path)
+        if not os.path.exists(store.store_path):
+            return None
+        try:
+            with open(store.store_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"⚠️ 無法讀取查詢模式成效檔 {store.store_path}: {e}")
+            return None
+        store.version = data.get('version', store.version)
+        store.updated_at = data.get('updated_at', '')
+        store.patterns = data.get('patterns', {})
+        store.companies = data.get('companies', {})
+        return store
+
+    def get_pattern(self, template: str) -> Optional[Dict[str, Any]]:
+        return self.patterns.get(template)
+
+    def get_company(self, symbol: str) -> Dict[str, Dict[str, Any]]:
+        return self.companies.get(str(symbol), {})
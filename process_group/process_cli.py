@@ -9,15 +9,56 @@ import argparse
 import json
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 import traceback
 
+from record_stream import ContentDateStats, slim_record, tee_records
+
+# 平行解析 worker 狀態 (每個 worker 行程各自初始化一次)
+_worker_md_parser = None
+_worker_quality_analyzer = None
+
+
+def _init_parse_worker(force_rescan: bool = False):
+    """Worker 初始化：每個行程只建立一次 MDParser (觀察名單只載入一次)
+
+    force_rescan 需與主行程一致，否則 force-rescan 在平行模式下不會重算/遷移品質評分
+    """
+    global _worker_md_parser, _worker_quality_analyzer
+
+    from md_parser import MDParser
+    _worker_md_parser = MDParser()
+    _worker_md_parser.force_rescan = force_rescan
+
+    try:
+        from quality_analyzer import QualityAnalyzer
+        _worker_quality_analyzer = QualityAnalyzer()
+    except ImportError:
+        _worker_quality_analyzer = None
+
+
+def _parse_worker(task: Tuple[str, bool]) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]], Optional[str]]:
+    """Worker 任務：解析單一 MD 檔案並 (可選) 進行品質分析"""
+    md_file, with_quality = task
+    try:
+        parsed_data = _worker_md_parser.parse_md_file(md_file)
+        quality_data = None
+        if with_quality and _worker_quality_analyzer:
+            quality_data = _worker_quality_analyzer.analyze(parsed_data)
+        return parsed_data, quality_data, None
+    except Exception as e:
+        return None, None, str(e)
+
+
 class ProcessCLI:
     """Process CLI v3.6.1-modified - 增強內容日期處理整合"""
     
-    def __init__(self):
+    def __init__(self, use_parse_cache: bool = True, workers: int = 1):
         self.version = "3.6.1-modified"
+        self.use_parse_cache = use_parse_cache
+        self.workers = max(1, workers or 1)
         
         # 初始化所有模組 (graceful degradation)
         self.md_scanner = None
@@ -52,6 +93,15 @@ class ProcessCLI:
             print(f"[ERROR] MDParser failed: {e}")
             sys.exit(1)
 
+        # 2b. Parse Cache (optional) - 未變更的檔案直接使用快取結果
+        if self.use_parse_cache:
+            try:
+                parse_cache = self.md_parser.enable_parse_cache()
+                print(f"[OK] ParseCache enabled ({parse_cache.cache_path})")
+            except Exception as e:
+                print(f"[WARN] ParseCache failed: {e} (will parse all files)")
+                self.md_parser.parse_cache = None
+
         # 3. Quality Analyzer (optional)
         try:
             from quality_analyzer import QualityAnalyzer
@@ -281,7 +331,7 @@ class ProcessCLI:
         with open(output_path, "w", encoding="utf-8") as f:
             json.dump(payload, f, ensure_ascii=True, indent=2)
 
-    def process_all_md_files(self, upload_sheets=True, **kwargs) -> bool:
+    def process_all_md_files(self, upload_sheets=True, dry_run=False, **kwargs) -> bool:
         """MODIFIED: 處理所有 MD 檔案 - 增強內容日期統計"""
         print(f"\n=== 完整處理所有 MD 檔案 (v{self.version}) ===")
         
@@ -296,56 +346,23 @@ class ProcessCLI:
             
             print(f"📁 找到 {len(md_files)} 個 MD 檔案")
             
-            # 2. 解析每個檔案
+            # 2. 串流解析: 逐檔解析 + 品質分析，只保留精簡記錄 (不含原始內容)
             print("📖 解析 MD 檔案...")
-            processed_companies = []
-            content_date_stats = {
-                'total_processed': 0,
-                'successful_date_extraction': 0,
-                'failed_date_extraction': 0,
-                'low_quality_due_to_missing_date': 0
-            }
-            
-            for i, md_file in enumerate(md_files, 1):
-                try:
-                    print(f"   處理中 ({i}/{len(md_files)}): {os.path.basename(md_file)}")
-                    
-                    # 使用修改版 MD Parser
-                    parsed_data = self.md_parser.parse_md_file(md_file)
-                    
-                    # ENHANCED: 統計內容日期提取情況
-                    content_date = parsed_data.get('content_date', '')
-                    quality_score = parsed_data.get('quality_score', 0)
-                    
-                    content_date_stats['total_processed'] += 1
-                    
-                    if content_date and content_date.strip():
-                        content_date_stats['successful_date_extraction'] += 1
-                    else:
-                        content_date_stats['failed_date_extraction'] += 1
-                        if quality_score <= 1:
-                            content_date_stats['low_quality_due_to_missing_date'] += 1
-                    
-                    # 品質分析 (如果可用)
-                    if self.quality_analyzer:
-                        quality_data = self.quality_analyzer.analyze(parsed_data)
-                        parsed_data.update(quality_data)
-                    
-                    processed_companies.append(parsed_data)
-                    
-                except Exception as e:
-                    print(f"   ⚠️ 解析失敗: {os.path.basename(md_file)} - {e}")
-                    continue
+            content_date_stats = ContentDateStats()
+            corpus_index = self._new_corpus_index()
+            processed_companies = list(tee_records(self._iter_records(md_files, verbose=True),
+                                                   content_date_stats, *corpus_index))
             
+            self._print_parse_cache_stats()
+            self._save_corpus_index(corpus_index)
+
             # ENHANCED: 顯示內容日期統計
-            success_rate = (content_date_stats['successful_date_extraction'] / content_date_stats['total_processed'] * 100) if content_date_stats['total_processed'] > 0 else 0
-            
             print(f"\n📊 內容日期提取統計:")
-            print(f"   總處理檔案: {content_date_stats['total_processed']}")
-            print(f"   成功提取日期: {content_date_stats['successful_date_extraction']}")
-            print(f"   失敗提取日期: {content_date_stats['failed_date_extraction']}")
-            print(f"   成功率: {success_rate:.1f}%")
-            print(f"   低品質(缺日期): {content_date_stats['low_quality_due_to_missing_date']}")
+            print(f"   總處理檔案: {content_date_stats.total_processed}")
+            print(f"   成功提取日期: {content_date_stats.successful_date_extraction}")
+            print(f"   失敗提取日期: {content_date_stats.failed_date_extraction}")
+            print(f"   成功率: {content_date_stats.success_rate:.1f}%")
+            print(f"   低品質(缺日期): {content_date_stats.low_quality_due_to_missing_date}")
             
             if not processed_companies:
                 print("❌ 沒有成功處理的公司資料")
@@ -365,6 +382,9 @@ class ProcessCLI:
                     print(f"⚠️ 查詢模式分析失敗: {e}")
                     keyword_analysis = None
             
+            # 3b. 查詢模式成效資料庫 (供 Search Group 排序/剔除查詢模式)
+            self._save_pattern_yield(processed_companies)
+            
             # 4. 觀察名單分析 (v3.6.1)
             watchlist_analysis = None
             if self.watchlist_analyzer:
@@ -423,7 +443,8 @@ class ProcessCLI:
                 print("☁️ 上傳到 Google Sheets...")
                 try:
                     upload_success = self.sheets_uploader.upload_all_reports(
-                        portfolio_summary, detailed_report, pattern_summary, watchlist_summary
+                        portfolio_summary, detailed_report, pattern_summary, watchlist_summary,
+                        dry_run=dry_run
                     )
                     if upload_success:
                         print("✅ Google Sheets 上傳成功")
@@ -448,6 +469,130 @@ class ProcessCLI:
             traceback.print_exc()
             return False
 
+    def _iter_parse_results(self, md_files: List[str], with_quality: bool = True) -> Iterator[Tuple[str, Optional[Dict[str, Any]], Optional[Dict[str, Any]], Optional[str]]]:
+        """依原始順序逐一產出解析結果 (md_file, parsed_data, quality_data, error)
+
+        workers > 1 時，未命中快取的檔案交由 ProcessPoolExecutor 平行解析，
+        快取查詢與寫入仍在主行程進行。
+        """
+        if self.workers <= 1 or len(md_files) <= 1:
+            for md_file in md_files:
+                try:
+                    yield md_file, self.md_parser.parse_md_file(md_file), None, None
+                except Exception as e:
+                    yield md_file, None, None, str(e)
+            return
+
+        parse_cache = self.md_parser.parse_cache
+        use_cache = parse_cache is not None and not self.md_parser.force_rescan
+
+        cached_results = {}
+        if use_cache:
+            for md_file in md_files:
+                cached = parse_cache.get(md_file)
+                if cached is not None:
+                    cached_results[md_file] = cached
+
+        pending_files = [f for f in md_files if f not in cached_results]
+        if not pending_files:
+            for md_file in md_files:
+                yield md_file, cached_results[md_file], None, None
+            return
+
+        workers = min(self.workers, len(pending_files))
+        print(f"⚙️ 平行解析: {len(pending_files)} 個檔案, {workers} 個 worker (快取命中 {len(cached_results)})")
+
+        chunksize = max(1, len(pending_files) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_parse_worker,
+                                 initargs=(bool(self.md_parser.force_rescan),)) as executor:
+            tasks = [(md_file, with_quality) for md_file in pending_files]
+            pool_results = executor.map(_parse_worker, tasks, chunksize=chunksize)
+
+            for md_file in md_files:
+                if md_file in cached_results:
+                    yield md_file, cached_results[md_file], None, None
+                    continue
+
+                parsed_data, quality_data, error = next(pool_results)
+                if parsed_data is not None and parse_cache is not None:
+                    parse_cache.put(md_file, parsed_data)
+                yield md_file, parsed_data, quality_data, error
+
+    def _iter_records(self, md_files: List[str], with_quality: bool = True,
+                      verbose: bool = False) -> Iterator[Dict[str, Any]]:
+        """串流管線: 解析 -> 品質分析 -> 精簡記錄；原始內容在此階段即釋放"""
+        parse_results = self._iter_parse_results(md_files, with_quality=with_quality)
+
+        for i, (md_file, parsed_data, quality_data, parse_error) in enumerate(parse_results, 1):
+            try:
+                if verbose:
+                    print(f"   處理中 ({i}/{len(md_files)}): {os.path.basename(md_file)}")
+
+                if parse_error:
+                    raise RuntimeError(parse_error)
+
+                # 品質分析 (如果可用，平行模式已在 worker 中完成；需要原始內容)
+                if with_quality and self.quality_analyzer and quality_data is None:
+                    quality_data = self.quality_analyzer.analyze(parsed_data)
+
+                yield slim_record(parsed_data, quality_data if with_quality else None)
+
+            except Exception as e:
+                print(f"   ⚠️ 解析失敗: {os.path.basename(md_file)} - {e}")
+                continue
+
+    def _new_corpus_index(self) -> List[Any]:
+        """完整解析時一併建立語料索引 (以 tee_records 彙總器形式，失敗時回傳空清單)"""
+        try:
+            from corpus_index import CorpusIndex
+            return [CorpusIndex(md_dir=self.md_scanner.md_dir, report_generator=self.report_generator)]
+        except Exception as e:
+            print(f"⚠️ 語料索引無法建立: {e}")
+            return []
+
+    def _save_corpus_index(self, corpus_index: List[Any]) -> Optional[str]:
+        """寫出語料索引 (cache/process/md_corpus_index.*)"""
+        for index in corpus_index:
+            try:
+                saved_path = index.save()
+                print(f"🗂️ 語料索引: {len(index)} 個檔案 ({saved_path})")
+                return saved_path
+            except Exception as e:
+                print(f"⚠️ 語料索引寫入失敗: {e}")
+        return None
+
+    def _load_corpus_index(self):
+        """載入語料索引 (仍有效的列, 索引後變更的檔名)；不可用時回傳 (None, [])"""
+        try:
+            from corpus_index import CorpusIndex
+            return CorpusIndex.load_fresh(self.md_scanner.md_dir)
+        except Exception as e:
+            print(f"⚠️ 語料索引無法載入: {e}")
+            return None, []
+
+    def _save_pattern_yield(self, processed_companies: List[Dict[str, Any]]) -> Optional[str]:
+        """更新查詢模式成效資料庫 (data/reports/pattern_yield_latest.json)"""
+        try:
+            from pattern_yield_store import PatternYieldStore
+            store = PatternYieldStore().build(processed_companies)
+            saved_path = store.save()
+            print(f"✅ 查詢模式成效資料庫: {len(store.patterns)} 個模式, {len(store.companies)} 家公司 ({saved_path})")
+            return saved_path
+        except Exception as e:
+            print(f"⚠️ 查詢模式成效資料庫更新失敗: {e}")
+            return None
+
+    def _print_parse_cache_stats(self) -> None:
+        """顯示解析快取命中統計"""
+        parse_cache = getattr(self.md_parser, 'parse_cache', None)
+        if parse_cache is None:
+            return
+
+        stats = parse_cache.get_stats()
+        hits = stats['hits'] + stats['hash_hits']
+        print(f"⚡ 解析快取: 命中 {hits}/{stats['total_lookups']} ({stats['hit_rate']}%), "
+              f"重新解析 {stats['misses']}, 寫入 {stats['stores']}")
+
     def analyze_content_date_extraction(self, **kwargs) -> bool:
         """ENHANCED: 專門分析內容日期提取情況"""
         print(f"\n=== 內容日期提取分析 (v{self.version}) ===")
@@ -556,14 +701,7 @@ class ProcessCLI:
             
             print(f"📁 處理 {len(md_files)} 個檔案進行查詢模式分析")
             
-            processed_companies = []
-            for md_file in md_files:
-                try:
-                    parsed_data = self.md_parser.parse_md_file(md_file)
-                    processed_companies.append(parsed_data)
-                except Exception as e:
-                    print(f"⚠️ 解析失敗: {os.path.basename(md_file)}")
-                    continue
+            processed_companies = list(self._iter_records(md_files, with_quality=False))
             
             # 進行查詢模式分析
             keyword_analysis = self.keyword_analyzer.analyze_query_patterns(processed_companies)
@@ -607,14 +745,7 @@ class ProcessCLI:
             
             print(f"📁 處理 {len(md_files)} 個檔案進行觀察名單分析")
             
-            processed_companies = []
-            for md_file in md_files:
-                try:
-                    parsed_data = self.md_parser.parse_md_file(md_file)
-                    processed_companies.append(parsed_data)
-                except Exception as e:
-                    print(f"⚠️ 解析失敗: {os.path.basename(md_file)}")
-                    continue
+            processed_companies = list(self._iter_records(md_files, with_quality=False))
             
             # 進行觀察名單分析
             watchlist_analysis = self.watchlist_analyzer.analyze_watchlist_coverage(processed_companies)
@@ -649,7 +780,7 @@ class ProcessCLI:
             traceback.print_exc()
             return False
 
-    def generate_keyword_summary(self, upload_sheets=True, **kwargs) -> bool:
+    def generate_keyword_summary(self, upload_sheets=True, dry_run=False, **kwargs) -> bool:
         """生成查詢模式統計報告 (v3.6.1)"""
         print(f"\n=== 生成查詢模式統計報告 (v{self.version}) ===")
         
@@ -660,16 +791,10 @@ class ProcessCLI:
         try:
             # 獲取分析結果
             md_files = self.md_scanner.scan_all_md_files()
-            processed_companies = []
-            
-            for md_file in md_files:
-                try:
-                    parsed_data = self.md_parser.parse_md_file(md_file)
-                    processed_companies.append(parsed_data)
-                except:
-                    continue
+            processed_companies = list(self._iter_records(md_files, with_quality=False))
             
             keyword_analysis = self.keyword_analyzer.analyze_query_patterns(processed_companies)
+            self._save_pattern_yield(processed_companies)
             
             # 生成報告
             keyword_summary = self.report_generator.generate_keyword_summary(keyword_analysis)
@@ -680,7 +805,7 @@ class ProcessCLI:
             # 上傳 (如果需要)
             if upload_sheets and self.sheets_uploader:
                 try:
-                    self.sheets_uploader.upload_keyword_summary(keyword_summary)
+                    self.sheets_uploader.upload_keyword_summary(keyword_summary, dry_run=dry_run)
                     print("✅ 已上傳到 Google Sheets")
                 except Exception as e:
                     print(f"⚠️ Google Sheets 上傳失敗: {e}")
@@ -693,7 +818,7 @@ class ProcessCLI:
             traceback.print_exc()
             return False
 
-    def generate_watchlist_summary(self, upload_sheets=True, **kwargs) -> bool:
+    def generate_watchlist_summary(self, upload_sheets=True, dry_run=False, **kwargs) -> bool:
         """生成觀察名單統計報告 (v3.6.1)"""
         print(f"\n=== 生成觀察名單統計報告 (v{self.version}) ===")
         
@@ -704,14 +829,7 @@ class ProcessCLI:
         try:
             # 獲取分析結果
             md_files = self.md_scanner.scan_all_md_files()
-            processed_companies = []
-            
-            for md_file in md_files:
-                try:
-                    parsed_data = self.md_parser.parse_md_file(md_file)
-                    processed_companies.append(parsed_data)
-                except:
-                    continue
+            processed_companies = list(self._iter_records(md_files, with_quality=False))
             
             watchlist_analysis = self.watchlist_analyzer.analyze_watchlist_coverage(processed_companies)
             
@@ -724,7 +842,7 @@ class ProcessCLI:
             # 上傳 (如果需要)
             if upload_sheets and self.sheets_uploader:
                 try:
-                    self.sheets_uploader.upload_watchlist_summary(watchlist_summary)
+                    self.sheets_uploader.upload_watchlist_summary(watchlist_summary, dry_run=dry_run)
                     print("✅ 已上傳到 Google Sheets")
                 except Exception as e:
                     print(f"⚠️ Google Sheets 上傳失敗: {e}")
@@ -765,7 +883,10 @@ class ProcessCLI:
             total_files = len(md_files)
             failed_count = 0
 
-            for i, md_file in enumerate(md_files, 1):
+            corpus_index = self._new_corpus_index()
+            parse_results = self._iter_parse_results(md_files, with_quality=False)
+
+            for i, (md_file, parsed_data, _, parse_error) in enumerate(parse_results, 1):
                 try:
                     # Progress bar display
                     progress_pct = (i / total_files) * 100
@@ -775,8 +896,12 @@ class ProcessCLI:
 
                     print(f"\r   [{bar}] {progress_pct:>5.1f}% ({i}/{total_files}) - {os.path.basename(md_file)[:40]:<40}", end='', flush=True)
 
-                    parsed_data = self.md_parser.parse_md_file(md_file)
-                    processed_companies.append(parsed_data)
+                    if parse_error:
+                        raise RuntimeError(parse_error)
+                    record = slim_record(parsed_data)
+                    for index in corpus_index:
+                        index.add(record)
+                    processed_companies.append(record)
                 except Exception as e:
                     failed_count += 1
                     continue
@@ -788,6 +913,8 @@ class ProcessCLI:
                 print(f" (失敗: {failed_count})")
             else:
                 print()
+            self._print_parse_cache_stats()
+            self._save_corpus_index(corpus_index)
 
             if not processed_companies:
                 print("❌ 沒有成功處理的公司資料")
@@ -813,7 +940,7 @@ class ProcessCLI:
             traceback.print_exc()
             return False
 
-    def force_rescan_all_md_files(self, upload_sheets: bool = True) -> bool:
+    def force_rescan_all_md_files(self, upload_sheets: bool = True, dry_run: bool = False) -> bool:
         """強制重新掃描所有 MD 檔案 (即使版本相同也重新計算 quality_score)
 
         用途:
@@ -836,7 +963,7 @@ class ProcessCLI:
             print(f"✅ 已啟用強制掃描模式")
 
             # 調用完整的處理流程
-            success = self.process_all_md_files(upload_sheets=upload_sheets)
+            success = self.process_all_md_files(upload_sheets=upload_sheets, dry_run=dry_run)
 
             # 還原強制掃描模式
             self.md_parser.force_rescan = False
@@ -870,8 +997,21 @@ class ProcessCLI:
             print(f"   最新檔案: {stats.get('newest_file', 'N/A')}")
             print(f"   最舊檔案: {stats.get('oldest_file', 'N/A')}")
 
+            # 語料索引: 全部檔案的內容日期/品質統計 (不需重新解析)
+            index_df, stale_files = self._load_corpus_index()
+            if index_df is not None and len(index_df):
+                with_date = int((index_df['content_date'] != '').sum())
+                low_quality = int(((index_df['content_date'] == '') & (index_df['quality_score'].fillna(0) <= 1)).sum())
+                print(f"\n📅 內容日期提取統計 (語料索引, {len(index_df)} 個檔案):")
+                print(f"   成功率: {with_date / len(index_df) * 100:.1f}% ({with_date}/{len(index_df)})")
+                print(f"   低品質(缺日期): {low_quality}")
+                print(f"   平均品質評分: {index_df['quality_score'].mean():.2f}")
+                print(f"   納入報告: {int(index_df['in_report'].sum())}")
+                if stale_files:
+                    print(f"   索引建立後變更/新增: {len(stale_files)} 個檔案 (執行 process 或 generate-csv 更新)")
+
             # 快速內容日期統計
-            if md_files:
+            elif md_files:
                 print(f"\n📅 內容日期提取快速統計 (抽樣前10個檔案):")
                 sample_files = md_files[:10]
                 sample_stats = {'with_date': 0, 'without_date': 0, 'low_quality': 0}
@@ -930,6 +1070,9 @@ def main():
   python process_cli.py keyword-summary             # 生成查詢模式報告
   python process_cli.py watchlist-summary           # 生成觀察名單報告
   python process_cli.py stats                       # 顯示統計資訊
+  python process_cli.py process --no-parse-cache    # 不使用解析快取，重新解析所有檔案
+  python process_cli.py process --workers 4         # 使用 4 個行程平行解析
+  python process_cli.py process --dry-run           # 只列出 Google Sheets 上傳計畫的請求數，不送出
 
 v3.6.1-modified 增強功能:
   ✅ 缺少內容日期的檔案顯示低品質評分而非排除
@@ -937,6 +1080,9 @@ v3.6.1-modified 增強功能:
   ✅ 標準化查詢模式分析和報告
   ✅ 觀察名單覆蓋率分析和報告
   ✅ 輕量級 CSV 生成 (generate-csv) 用於 Quarantine 偵測
+  ✅ 解析快取 (cache/process/parse_cache.sqlite3)，未變更的檔案不重新解析
+  ✅ 語料索引 (cache/process/md_corpus_index.*)，供 quarantine / md_cleaner / stats 使用
+  ✅ Google Sheets 增量同步，所有工作表合併為單一 batchUpdate (cache/process/sheets_snapshot)
         """
     )
     
@@ -963,12 +1109,14 @@ v3.6.1-modified 增強功能:
     parser.add_argument('--min-usage', type=int, default=1, help='查詢模式最小使用次數')
     parser.add_argument('--include-missing', action='store_true', help='包含缺失公司資訊')
     parser.add_argument('--dry-run', action='store_true', help='預覽模式，不實際執行')
+    parser.add_argument('--no-parse-cache', action='store_true', help='停用解析快取，重新解析所有檔案')
+    parser.add_argument('--workers', type=int, default=1, help='平行解析行程數 (預設 1 = 序列處理)')
     
     args = parser.parse_args()
     
     # 初始化 CLI
     try:
-        cli = ProcessCLI()
+        cli = ProcessCLI(use_parse_cache=not args.no_parse_cache, workers=args.workers)
     except Exception as e:
         print(f"❌ ProcessCLI 初始化失敗: {e}")
         sys.exit(1)
@@ -982,13 +1130,13 @@ v3.6.1-modified 增強功能:
             success = cli.validate_setup()
 
         elif args.command == 'process':
-            success = cli.process_all_md_files(upload_sheets=upload_sheets)
+            success = cli.process_all_md_files(upload_sheets=upload_sheets, dry_run=args.dry_run)
 
         elif args.command == 'generate-csv':
             success = cli.generate_csv_only()
 
         elif args.command == 'force-rescan':
-            success = cli.force_rescan_all_md_files(upload_sheets=upload_sheets)
+            success = cli.force_rescan_all_md_files(upload_sheets=upload_sheets, dry_run=args.dry_run)
 
         elif args.command == 'analyze-content-date':
             success = cli.analyze_content_date_extraction()
@@ -1000,10 +1148,10 @@ v3.6.1-modified 增強功能:
             success = cli.analyze_watchlist_only()
 
         elif args.command == 'keyword-summary':
-            success = cli.generate_keyword_summary(upload_sheets=upload_sheets)
+            success = cli.generate_keyword_summary(upload_sheets=upload_sheets, dry_run=args.dry_run)
 
         elif args.command == 'watchlist-summary':
-            success = cli.generate_watchlist_summary(upload_sheets=upload_sheets)
+            success = cli.generate_watchlist_summary(upload_sheets=upload_sheets, dry_run=args.dry_run)
 
         elif args.command == 'stats':
             success = cli.show_stats()
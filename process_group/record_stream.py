@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Record Stream - FactSet Pipeline v3.6.1
+串流式處理管線 - 解析結果逐筆轉為精簡記錄
+
+- 解析 + 品質分析後立即丟棄原始內容 (~200 KB/檔) 與除錯資訊，
+  轉為 ParsedRecord (slots + EPS/營收 float 陣列，dict 相容)
+- 報告需要的 front matter 查詢欄位先行擷取，分析器不再讀取原始內容
+- 統計以增量彙總器逐筆累加，不需保留完整清單
+- 丟棄原始內容前記錄內容雜湊，供語料索引 (corpus_index) 判斷檔案是否變更
+"""
+
+import re
+import hashlib
+from typing import Dict, Any, List, Optional, Iterable, Iterator
+
+from parsed_record import ParsedRecord
+
+
+# 報告與分析器都不會讀取的大型欄位
+HEAVY_FIELDS = ('content', 'debug_info')
+
+# KeywordAnalyzer 會從 front matter 擷取的查詢欄位
+FRONT_MATTER_QUERY_FIELDS = ('search_query', 'keywords', 'search_terms')
+
+
+def extract_front_matter_queries(content: str) -> List[str]:
+    """擷取 front matter 中的查詢欄位原始值"""
+    if not content or not content.startswith('---'):
+        return []
+    end_pos = content.find('---', 3)
+    if end_pos == -1:
+        return []
+
+    front_matter = content[3:end_pos]
+    queries = []
+    for field_name in FRONT_MATTER_QUERY_FIELDS:
+        for match in re.findall(rf'{field_name}:\s*(.+?)(?:\n|$)', front_matter, re.MULTILINE | re.IGNORECASE):
+            if match.strip():
+                queries.append(match.strip())
+    return queries
+
+
+def slim_record(parsed_data: Dict[str, Any], quality_data: Optional[Dict[str, Any]] = None) -> ParsedRecord:
+    """解析結果 -> 精簡記錄 (不含原始內容)"""
+    record = ParsedRecord()
+    for key, value in parsed_data.items():
+        if key not in HEAVY_FIELDS:
+            record[key] = value
+    if quality_data:
+        record.update(quality_data)
+    if 'content' in parsed_data:
+        content = parsed_data.get('content') or ''
+        record['front_matter_queries'] = extract_front_matter_queries(content)
+        record['content_hash'] = hashlib.sha1(content.encode('utf-8')).hexdigest()
+    return record
+
+
+class ContentDateStats:
+    """內容日期提取統計 - 增量彙總"""
+
+    def __init__(self):
+        self.total_processed = 0
+        self.successful_date_extraction = 0
+        self.failed_date_extraction = 0
+        self.low_quality_due_to_missing_date = 0
+
+    def add(self, record: Dict[str, Any]) -> None:
+        content_date = record.get('content_date', '')
+        self.total_processed += 1
+        if content_date and str(content_date).strip():
+            self.successful_date_extraction += 1
+        else:
+            self.failed_date_extraction += 1
+            if record.get('quality_score', 0) <= 1:
+                self.low_quality_due_to_missing_date += 1
+
+    @property
+    def success_rate(self) -> float:
+        if not self.total_processed:
+            return 0.0
+        return self.successful_date_extraction / self.total_processed * 100
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            'total_processed': self.total_processed,
+            'successful_date_extraction': self.successful_date_extraction,
+            'failed_date_extraction': self.failed_date_extraction,
+            'low_quality_due_to_missing_date': self.low_quality_due_to_missing_date
+        }
+
+
+def tee_records(records: Iterable[ParsedRecord], *aggregators) -> Iterator[ParsedRecord]:
+    """逐筆記錄交給各增量彙總器 (具 add 方法)，並原樣往下傳遞"""
+    for record in records:
+        for aggregator in aggregators:
+            aggregator.add(record)
+        yield record
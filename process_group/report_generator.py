@@ -8,12 +8,15 @@ Enhanced MD日期 handling with reliable metadata source
 import json
 import os
 import re
+import numpy as np
 import pandas as pd
 import urllib.parse
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import pytz
 
+from parsed_record import GRID_KEYS, ParsedRecord
+
 class ReportGenerator:
     """報告生成器 v3.6.1-updated - 使用 Search Group 的 md_date 欄位"""
 
@@ -25,32 +28,28 @@ class ReportGenerator:
         # 設定台北時區
         self.taipei_tz = pytz.timezone('Asia/Taipei')
         
-        # 投資組合摘要欄位
+        # EPS / 營收 欄位 (報告欄名, 記錄欄位, 陣列索引)，順序同 GRID_KEYS
+        metric_labels = {'eps': 'EPS', 'revenue': '營收'}
+        stat_labels = {'high': '最高值', 'low': '最低值', 'avg': '平均值', 'median': '中位數'}
+        self.grid_columns = []
+        for index, key in enumerate(GRID_KEYS):
+            metric, year, stat = key.split('_')
+            self.grid_columns.append((f"{year}{metric_labels[metric]}{stat_labels[stat]}", key, index))
+        
+        grid_labels = [column for column, _, _ in self.grid_columns]
+
+        # 投資組合摘要欄位 (EPS / 營收欄位由 GRID_KEYS 的年度清單產生)
         self.portfolio_summary_columns = [
             '代號', '名稱', '股票代號', 'MD最舊日期', 'MD最新日期', 'MD資料筆數',
             '分析師數量', '目標價',
-            '2025EPS最高值', '2025EPS最低值', '2025EPS平均值', '2025EPS中位數',
-            '2026EPS最高值', '2026EPS最低值', '2026EPS平均值', '2026EPS中位數',
-            '2027EPS最高值', '2027EPS最低值', '2027EPS平均值', '2027EPS中位數',
-            '2028EPS最高值', '2028EPS最低值', '2028EPS平均值', '2028EPS中位數',
-            '2025營收最高值', '2025營收最低值', '2025營收平均值', '2025營收中位數',
-            '2026營收最高值', '2026營收最低值', '2026營收平均值', '2026營收中位數',
-            '2027營收最高值', '2027營收最低值', '2027營收平均值', '2027營收中位數',
-            '2028營收最高值', '2028營收最低值', '2028營收平均值', '2028營收中位數',
+            *grid_labels,
             '品質評分', '狀態', 'MD日期', 'MD File', '搜尋日期', '處理日期'
         ]
 
         # 詳細報告欄位
         self.detailed_report_columns = [
             '代號', '名稱', '股票代號', 'MD日期', '分析師數量', '目標價',
-            '2025EPS最高值', '2025EPS最低值', '2025EPS平均值', '2025EPS中位數',
-            '2026EPS最高值', '2026EPS最低值', '2026EPS平均值', '2026EPS中位數',
-            '2027EPS最高值', '2027EPS最低值', '2027EPS平均值', '2027EPS中位數',
-            '2028EPS最高值', '2028EPS最低值', '2028EPS平均值', '2028EPS中位數',
-            '2025營收最高值', '2025營收最低值', '2025營收平均值', '2025營收中位數',
-            '2026營收最高值', '2026營收最低值', '2026營收平均值', '2026營收中位數',
-            '2027營收最高值', '2027營收最低值', '2027營收平均值', '2027營收中位數',
-            '2028營收最高值', '2028營收最低值', '2028營收平均值', '2028營收中位數',
+            *grid_labels,
             '品質評分', '狀態', '驗證狀態', 'MD File', '搜尋日期', '處理日期'
         ]
 
@@ -134,178 +133,82 @@ class ReportGenerator:
     def generate_portfolio_summary(self, processed_companies: List[Dict], filter_invalid=True) -> pd.DataFrame:
         """UPDATED: 生成投資組合摘要 - 使用 md_date 優先邏輯"""
         try:
+            frame, grid = self._records_frame(processed_companies)
+
             # 增強過濾邏輯 - 使用更新的過濾方法
             if filter_invalid:
-                original_count = len(processed_companies)
-                valid_companies = []
-                filtered_reasons = {
-                    'validation_failed': 0,
-                    'other_issues': 0
-                }
-                
-                # UPDATED: 統計 md_date 情況
-                md_date_stats = {
-                    'total_files': 0,
-                    'with_md_date': 0,
-                    'with_content_date_fallback': 0,
-                    'no_date_available': 0,
-                    'search_group_coverage': 0
-                }
-                
-                for company in processed_companies:
-                    md_date_stats['total_files'] += 1
-                    
-                    # 檢查日期來源
-                    md_date = self._get_md_date_with_priority(company)
-                    md_date_source = self._get_md_date_source(company)
-                    
-                    if md_date_source == 'md_date':
-                        md_date_stats['with_md_date'] += 1
-                        md_date_stats['search_group_coverage'] += 1
-                    elif md_date_source == 'content_date':
-                        md_date_stats['with_content_date_fallback'] += 1
-                    else:
-                        md_date_stats['no_date_available'] += 1
-                    
-                    # 應用過濾邏輯
-                    if not self._should_include_in_report_v351_updated(company):
-                        # 進一步分類原因
-                        validation_result = company.get('validation_result', {})
-                        if validation_result.get('overall_status') == 'error':
-                            filtered_reasons['validation_failed'] += 1
-                        else:
-                            filtered_reasons['other_issues'] += 1
-                        continue
-                    
-                    valid_companies.append(company)
-                
+                excluded = frame[~frame['include']]
+                validation_failed = int((excluded['overall_status'] == 'error').sum())
+                source_counts = frame['date_source'].value_counts()
+                total_files = len(frame)
+                with_md_date = int(source_counts.get('md_date', 0))
+                with_content_date = int(source_counts.get('content_date', 0))
+
                 # ENHANCED: 詳細統計輸出
-                search_group_coverage = (md_date_stats['search_group_coverage'] / md_date_stats['total_files'] * 100) if md_date_stats['total_files'] > 0 else 0
-                total_date_coverage = ((md_date_stats['with_md_date'] + md_date_stats['with_content_date_fallback']) / md_date_stats['total_files'] * 100) if md_date_stats['total_files'] > 0 else 0
-                
+                search_group_coverage = (with_md_date / total_files * 100) if total_files > 0 else 0
+                total_date_coverage = ((with_md_date + with_content_date) / total_files * 100) if total_files > 0 else 0
+
+                frame = frame[frame['include']]
+
                 print(f"📊 投資組合摘要過濾結果:")
-                print(f"   原始公司數: {original_count}")
-                print(f"   保留公司數: {len(valid_companies)}")
+                print(f"   原始公司數: {total_files}")
+                print(f"   保留公司數: {len(frame)}")
                 print(f"   排除原因:")
-                print(f"     驗證失敗: {filtered_reasons['validation_failed']}")
-                print(f"     其他問題: {filtered_reasons['other_issues']}")
+                print(f"     驗證失敗: {validation_failed}")
+                print(f"     其他問題: {len(excluded) - validation_failed}")
                 print(f"")
                 print(f"📅 MD日期來源統計:")
-                print(f"   Search Group (md_date): {md_date_stats['with_md_date']}")
-                print(f"   Process Group (content_date): {md_date_stats['with_content_date_fallback']}")
-                print(f"   無日期: {md_date_stats['no_date_available']}")
+                print(f"   Search Group (md_date): {with_md_date}")
+                print(f"   Process Group (content_date): {with_content_date}")
+                print(f"   無日期: {int(source_counts.get('no_date', 0))}")
                 print(f"   Search Group 覆蓋率: {search_group_coverage:.1f}%")
                 print(f"   總日期覆蓋率: {total_date_coverage:.1f}%")
             else:
-                valid_companies = processed_companies
-                print(f"📊 投資組合摘要：未啟用過濾，包含所有 {len(valid_companies)} 家公司")
-            
-            # 按公司分組，取得每家公司的最佳品質資料
-            company_summary = {}
-            
-            for company_data in valid_companies:
-                company_code = company_data.get('company_code', 'Unknown')
-                
-                if company_code not in company_summary:
-                    company_summary[company_code] = {
-                        'files': [],
-                        'best_quality_data': None
-                    }
-                
-                company_summary[company_code]['files'].append(company_data)
-                
-                # 選擇最佳品質資料
-                current_best = company_summary[company_code]['best_quality_data']
-                
-                if current_best is None:
-                    company_summary[company_code]['best_quality_data'] = company_data
-                else:
-                    current_quality = company_data.get('quality_score', 0)
-                    best_quality = current_best.get('quality_score', 0)
-                    
-                    if current_quality > best_quality:
-                        company_summary[company_code]['best_quality_data'] = company_data
-            
-            # 生成摘要資料
-            summary_rows = []
-            
-            for company_code, company_info in company_summary.items():
-                best_data = company_info['best_quality_data']
-                all_files = company_info['files']
-                
-                # UPDATED: 計算日期範圍 - 使用 md_date 優先邏輯
-                oldest_date, newest_date = self._calculate_date_range_with_priority(all_files)
-                
-                # 使用增強的品質狀態顯示
-                quality_score = best_data.get('quality_score', 0)
-                md_date = self._get_md_date_with_priority(best_data)
-                has_date = bool(md_date and md_date.strip())
-                quality_status = self._get_quality_status_by_score_enhanced(quality_score, has_date)
-                md_file_url = self._format_md_file_url_with_warning(best_data)
-                search_datetime = self._get_search_datetime(best_data)
-                
-                # 使用最佳品質資料生成摘要
-                clean_code = self._clean_stock_code_for_display(company_code)
-                
-                summary_row = {
-                    '代號': clean_code,
-                    '名稱': best_data.get('company_name', 'Unknown'),
-                    '股票代號': f"{clean_code}-TW",
-                    'MD最舊日期': oldest_date,
-                    'MD最新日期': newest_date,
-                    'MD資料筆數': len(all_files),
-                    '分析師數量': best_data.get('analyst_count', 0),
-                    '目標價': best_data.get('target_price', ''),
-                    '2025EPS最高值': self._format_eps_value(best_data.get('eps_2025_high')),
-                    '2025EPS最低值': self._format_eps_value(best_data.get('eps_2025_low')),
-                    '2025EPS平均值': self._format_eps_value(best_data.get('eps_2025_avg')),
-                    '2025EPS中位數': self._format_eps_value(best_data.get('eps_2025_median')),
-                    '2026EPS最高值': self._format_eps_value(best_data.get('eps_2026_high')),
-                    '2026EPS最低值': self._format_eps_value(best_data.get('eps_2026_low')),
-                    '2026EPS平均值': self._format_eps_value(best_data.get('eps_2026_avg')),
-                    '2026EPS中位數': self._format_eps_value(best_data.get('eps_2026_median')),
-                    '2027EPS最高值': self._format_eps_value(best_data.get('eps_2027_high')),
-                    '2027EPS最低值': self._format_eps_value(best_data.get('eps_2027_low')),
-                    '2027EPS平均值': self._format_eps_value(best_data.get('eps_2027_avg')),
-                    '2027EPS中位數': self._format_eps_value(best_data.get('eps_2027_median')),
-                    '2028EPS最高值': self._format_eps_value(best_data.get('eps_2028_high')),
-                    '2028EPS最低值': self._format_eps_value(best_data.get('eps_2028_low')),
-                    '2028EPS平均值': self._format_eps_value(best_data.get('eps_2028_avg')),
-                    '2028EPS中位數': self._format_eps_value(best_data.get('eps_2028_median')),
-                    '2025營收最高值': self._format_eps_value(best_data.get('revenue_2025_high')),
-                    '2025營收最低值': self._format_eps_value(best_data.get('revenue_2025_low')),
-                    '2025營收平均值': self._format_eps_value(best_data.get('revenue_2025_avg')),
-                    '2025營收中位數': self._format_eps_value(best_data.get('revenue_2025_median')),
-                    '2026營收最高值': self._format_eps_value(best_data.get('revenue_2026_high')),
-                    '2026營收最低值': self._format_eps_value(best_data.get('revenue_2026_low')),
-                    '2026營收平均值': self._format_eps_value(best_data.get('revenue_2026_avg')),
-                    '2026營收中位數': self._format_eps_value(best_data.get('revenue_2026_median')),
-                    '2027營收最高值': self._format_eps_value(best_data.get('revenue_2027_high')),
-                    '2027營收最低值': self._format_eps_value(best_data.get('revenue_2027_low')),
-                    '2027營收平均值': self._format_eps_value(best_data.get('revenue_2027_avg')),
-                    '2027營收中位數': self._format_eps_value(best_data.get('revenue_2027_median')),
-                    '2028營收最高值': self._format_eps_value(best_data.get('revenue_2028_high')),
-                    '2028營收最低值': self._format_eps_value(best_data.get('revenue_2028_low')),
-                    '2028營收平均值': self._format_eps_value(best_data.get('revenue_2028_avg')),
-                    '2028營收中位數': self._format_eps_value(best_data.get('revenue_2028_median')),
-                    '品質評分': quality_score,
-                    '狀態': quality_status,
-                    'MD日期': md_date,
-                    'MD File': md_file_url,
-                    '搜尋日期': search_datetime,
-                    '處理日期': self._get_taipei_time()
-                }
-                
-                summary_rows.append(summary_row)
-            
+                print(f"📊 投資組合摘要：未啟用過濾，包含所有 {len(frame)} 家公司")
+
+            if frame.empty:
+                return pd.DataFrame(columns=self.portfolio_summary_columns)
+
+            # 按公司分組: 最佳品質資料 (同分取第一筆)、檔案數、MD日期範圍
+            groups = frame.groupby('code', sort=False)
+            best = frame.loc[groups['quality_score'].idxmax()]
+            # 日期以排序後的類別代碼比較 (與字串排序相同)，min/max 走 cython 路徑
+            dates = pd.Categorical(frame['md_date'].where(frame['md_date'] != ''))
+            date_codes = pd.Series(dates.codes, index=frame.index).where(dates.codes >= 0)
+            date_groups = date_codes.groupby(frame['code'], sort=False)
+            categories = np.append(dates.categories.to_numpy(dtype=object), '')
+            oldest = categories[date_groups.min().reindex(best['code']).fillna(-1).astype(int).to_numpy()]
+            newest = categories[date_groups.max().reindex(best['code']).fillna(-1).astype(int).to_numpy()]
+            file_counts = groups.size().reindex(best['code'])
+
+            clean_codes = [self._clean_stock_code_for_display(code) for code in best['code']]
+            details = self._row_details(best)
+            columns = {
+                '代號': clean_codes,
+                '名稱': best['name'].tolist(),
+                '股票代號': [f"{code}-TW" for code in clean_codes],
+                'MD最舊日期': oldest.tolist(),
+                'MD最新日期': newest.tolist(),
+                'MD資料筆數': file_counts.tolist(),
+                '分析師數量': best['analyst_count'].tolist(),
+                '目標價': best['target_price'].tolist(),
+                **self._grid_frame_columns(grid, best.index),
+                '品質評分': best['quality_score'].tolist(),
+                '狀態': details['狀態'],
+                'MD日期': best['md_date'].tolist(),
+                'MD File': details['MD File'],
+                '搜尋日期': details['搜尋日期'],
+                '處理日期': self._get_taipei_time()
+            }
+
             # 建立 DataFrame
-            df = pd.DataFrame(summary_rows, columns=self.portfolio_summary_columns)
+            df = pd.DataFrame(columns, columns=self.portfolio_summary_columns)
             df = df.sort_values('代號')
-            
+
             print(f"✅ 投資組合摘要已使用最佳品質資料生成")
-            
+
             return df
-            
+
         except Exception as e:
             print(f"❌ 生成投資組合摘要失敗: {e}")
             return pd.DataFrame(columns=self.portfolio_summary_columns)
@@ -313,102 +216,44 @@ class ReportGenerator:
     def generate_detailed_report(self, processed_companies: List[Dict], filter_invalid=True) -> pd.DataFrame:
         """UPDATED: 生成詳細報告 - 使用 md_date 優先邏輯"""
         try:
-            detailed_rows = []
+            frame, grid = self._records_frame(processed_companies)
+
+            # 檢查是否應該過濾此資料
             filtered_count = 0
-            date_source_stats = {
-                'md_date': 0,
-                'content_date': 0,
-                'no_date': 0
+            if filter_invalid:
+                filtered_count = int((~frame['include']).sum())
+                frame = frame[frame['include']]
+
+            # UPDATED: 使用 md_date 優先邏輯取得日期，統計日期來源
+            source_counts = frame['date_source'].value_counts()
+            date_source_stats = {source: int(source_counts.get(source, 0))
+                                 for source in ('md_date', 'content_date', 'no_date')}
+
+            details = self._row_details(frame)
+            columns = {
+                '代號': frame['code'].tolist(),
+                '名稱': frame['name'].tolist(),
+                '股票代號': [f"{code}-TW" for code in frame['code']],
+                'MD日期': frame['md_date'].tolist(),  # UPDATED: 使用優先邏輯取得的日期
+                '分析師數量': frame['analyst_count'].tolist(),
+                '目標價': frame['target_price'].tolist(),
+                **self._grid_frame_columns(grid, frame.index),
+                '品質評分': frame['quality_score'].tolist(),
+                '狀態': details['狀態'],
+                '驗證狀態': [self._generate_validation_status_marker_v351(company_data)
+                           for company_data in frame['record']],
+                'MD File': details['MD File'],
+                '搜尋日期': details['搜尋日期'],
+                '處理日期': self._get_taipei_time()
             }
-            
-            for company_data in processed_companies:
-                # 檢查是否應該過濾此資料
-                if filter_invalid and not self._should_include_in_report_v351_updated(company_data):
-                    filtered_count += 1
-                    continue
-                
-                # UPDATED: 使用 md_date 優先邏輯取得日期
-                md_date = self._get_md_date_with_priority(company_data)
-                date_source = self._get_md_date_source(company_data)
-                
-                # 統計日期來源
-                if date_source == 'md_date':
-                    date_source_stats['md_date'] += 1
-                elif date_source == 'content_date':
-                    date_source_stats['content_date'] += 1
-                else:
-                    date_source_stats['no_date'] += 1
-                
-                quality_score = company_data.get('quality_score', 0)
-                has_date = bool(md_date and md_date.strip())
-                
-                # 生成增強驗證狀態標記
-                validation_status = self._generate_validation_status_marker_v351(company_data)
-                
-                # 使用增強的品質狀態顯示
-                quality_status = self._get_quality_status_by_score_enhanced(quality_score, has_date)
-                
-                # 處理 MD 檔案連結
-                md_file_url = self._format_md_file_url_with_warning(company_data)
 
-                search_datetime = self._get_search_datetime(company_data)
-                
-                detailed_row = {
-                    '代號': company_data.get('company_code', 'Unknown'),
-                    '名稱': company_data.get('company_name', 'Unknown'),
-                    '股票代號': f"{company_data.get('company_code', 'Unknown')}-TW",
-                    'MD日期': md_date,  # UPDATED: 使用優先邏輯取得的日期
-                    '分析師數量': company_data.get('analyst_count', 0),
-                    '目標價': company_data.get('target_price', ''),
-                    '2025EPS最高值': self._format_eps_value(company_data.get('eps_2025_high')),
-                    '2025EPS最低值': self._format_eps_value(company_data.get('eps_2025_low')),
-                    '2025EPS平均值': self._format_eps_value(company_data.get('eps_2025_avg')),
-                    '2025EPS中位數': self._format_eps_value(company_data.get('eps_2025_median')),
-                    '2026EPS最高值': self._format_eps_value(company_data.get('eps_2026_high')),
-                    '2026EPS最低值': self._format_eps_value(company_data.get('eps_2026_low')),
-                    '2026EPS平均值': self._format_eps_value(company_data.get('eps_2026_avg')),
-                    '2026EPS中位數': self._format_eps_value(company_data.get('eps_2026_median')),
-                    '2027EPS最高值': self._format_eps_value(company_data.get('eps_2027_high')),
-                    '2027EPS最低值': self._format_eps_value(company_data.get('eps_2027_low')),
-                    '2027EPS平均值': self._format_eps_value(company_data.get('eps_2027_avg')),
-                    '2027EPS中位數': self._format_eps_value(company_data.get('eps_2027_median')),
-                    '2028EPS最高值': self._format_eps_value(company_data.get('eps_2028_high')),
-                    '2028EPS最低值': self._format_eps_value(company_data.get('eps_2028_low')),
-                    '2028EPS平均值': self._format_eps_value(company_data.get('eps_2028_avg')),
-                    '2028EPS中位數': self._format_eps_value(company_data.get('eps_2028_median')),
-                    '2025營收最高值': self._format_eps_value(company_data.get('revenue_2025_high')),
-                    '2025營收最低值': self._format_eps_value(company_data.get('revenue_2025_low')),
-                    '2025營收平均值': self._format_eps_value(company_data.get('revenue_2025_avg')),
-                    '2025營收中位數': self._format_eps_value(company_data.get('revenue_2025_median')),
-                    '2026營收最高值': self._format_eps_value(company_data.get('revenue_2026_high')),
-                    '2026營收最低值': self._format_eps_value(company_data.get('revenue_2026_low')),
-                    '2026營收平均值': self._format_eps_value(company_data.get('revenue_2026_avg')),
-                    '2026營收中位數': self._format_eps_value(company_data.get('revenue_2026_median')),
-                    '2027營收最高值': self._format_eps_value(company_data.get('revenue_2027_high')),
-                    '2027營收最低值': self._format_eps_value(company_data.get('revenue_2027_low')),
-                    '2027營收平均值': self._format_eps_value(company_data.get('revenue_2027_avg')),
-                    '2027營收中位數': self._format_eps_value(company_data.get('revenue_2027_median')),
-                    '2028營收最高值': self._format_eps_value(company_data.get('revenue_2028_high')),
-                    '2028營收最低值': self._format_eps_value(company_data.get('revenue_2028_low')),
-                    '2028營收平均值': self._format_eps_value(company_data.get('revenue_2028_avg')),
-                    '2028營收中位數': self._format_eps_value(company_data.get('revenue_2028_median')),
-                    '品質評分': quality_score,
-                    '狀態': quality_status,
-                    '驗證狀態': validation_status,
-                    'MD File': md_file_url,
-                    '搜尋日期': search_datetime,
-                    '處理日期': self._get_taipei_time()
-                }
-                
-                detailed_rows.append(detailed_row)
-            
             # 建立 DataFrame
-            df = pd.DataFrame(detailed_rows, columns=self.detailed_report_columns)
+            df = pd.DataFrame(columns, columns=self.detailed_report_columns)
             df = df.sort_values(['代號', 'MD日期'], ascending=[True, False])
-            
+
             # ENHANCED: 詳細統計輸出
-            total_files = len(detailed_rows)
-            
+            total_files = len(df)
+
             print(f"📊 詳細報告統計:")
             print(f"   包含檔案數: {total_files}")
             print(f"   過濾檔案數: {filtered_count}")
@@ -416,18 +261,149 @@ class ReportGenerator:
             print(f"   Search Group (md_date): {date_source_stats['md_date']}")
             print(f"   Process Group (content_date): {date_source_stats['content_date']}")
             print(f"   無日期: {date_source_stats['no_date']}")
-            
+
             search_group_coverage = (date_source_stats['md_date'] / total_files * 100) if total_files > 0 else 0
             print(f"   Search Group 覆蓋率: {search_group_coverage:.1f}%")
-            
+
             return df
-            
+
         except Exception as e:
             print(f"❌ 生成詳細報告失敗: {e}")
             import traceback
             traceback.print_exc()
             return pd.DataFrame(columns=self.detailed_report_columns)
 
+    # 報告 DataFrame 建構
+
+    def _records_frame(self, processed_companies: List[Dict]) -> Tuple[pd.DataFrame, np.ndarray]:
+        """解析記錄 -> (每筆一列的 DataFrame, EPS/營收 float 矩陣)；DataFrame 索引即記錄位置"""
+        records = list(processed_companies)
+        yaml_list = [company_data.get('yaml_data') or {} for company_data in records]
+
+        yaml_md_dates = self._as_text_series([yaml_data.get('md_date', '') for yaml_data in yaml_list])
+        content_dates = self._as_text_series([company_data.get('content_date', '') for company_data in records])
+        formatted_md = self._format_date_series(yaml_md_dates)
+        formatted_content = self._format_date_series(content_dates)
+
+        # md_date > content_date > 空字串 (格式不正確時退回下一個來源)
+        md_date = formatted_md.where(formatted_md != '', formatted_content)
+        has_md = yaml_md_dates.str.strip() != ''
+        has_content = content_dates.str.strip() != ''
+        date_source = pd.Series('no_date', index=md_date.index, dtype=object)
+        date_source[has_content] = 'content_date'
+        date_source[has_md] = 'md_date'
+
+        frame = pd.DataFrame({
+            'record': pd.Series(records, dtype=object),
+            'code': pd.Series([company_data.get('company_code', 'Unknown') for company_data in records], dtype=object),
+            'name': pd.Series([company_data.get('company_name', 'Unknown') for company_data in records], dtype=object),
+            'analyst_count': pd.Series([company_data.get('analyst_count', 0) for company_data in records], dtype=object),
+            'target_price': pd.Series([company_data.get('target_price', '') for company_data in records], dtype=object),
+            'quality_score': pd.Series([company_data.get('quality_score', 0) for company_data in records], dtype=object),
+            'md_date': md_date,
+            'date_source': date_source,
+            'include': pd.Series([self._should_include_in_report_v351_updated(company_data) for company_data in records], dtype=bool),
+            'overall_status': pd.Series([(company_data.get('validation_result') or {}).get('overall_status', 'unknown')
+                                         for company_data in records], dtype=object)
+        })
+        return frame, self._grid_matrix(records)
+
+    @staticmethod
+    def _as_text_series(values: List[Any]) -> pd.Series:
+        return pd.Series(['' if value is None else value if isinstance(value, str) else str(value)
+                          for value in values], dtype=object)
+
+    def _format_date_series(self, values: pd.Series) -> pd.Series:
+        """_format_date_for_display 的向量化版本: YYYY/M/D 或 YYYY-M-D[-...] -> YYYY-MM-DD，無效為空字串
+
+        日期字串重複度高，只格式化不重複的值再依索引展開
+        """
+        codes, uniques = pd.factorize(values)
+        formatted = self._format_unique_dates(pd.Series(uniques, dtype=object))
+        return pd.Series(formatted.to_numpy()[codes], index=values.index, dtype=object)
+
+    @staticmethod
+    def _format_unique_dates(values: pd.Series) -> pd.Series:
+        stripped = values.str.strip()
+        slash = stripped.str.extract(r'^(\d+)/(\d+)/(\d+)$')
+        dash = stripped.str.extract(r'^(\d+)-(\d+)-(\d+)(?:-.*)?$', flags=re.S)
+        use_dash = ~stripped.str.contains('/', regex=False) & (stripped.str.len() >= 8)
+        parts = slash.where(~use_dash, dash)
+
+        year = pd.to_numeric(parts[0], errors='coerce')
+        month = pd.to_numeric(parts[1], errors='coerce')
+        day = pd.to_numeric(parts[2], errors='coerce')
+        valid = year.between(1900, 2100) & month.between(1, 12) & day.between(1, 31)
+
+        result = pd.Series('', index=values.index, dtype=object)
+        if valid.any():
+            result[valid] = (parts.loc[valid, 0] + '-'
+                             + month[valid].astype(int).astype(str).str.zfill(2) + '-'
+                             + day[valid].astype(int).astype(str).str.zfill(2))
+        return result
+
+    def _row_details(self, rows: pd.DataFrame) -> Dict[str, List[str]]:
+        """只對輸出列計算的欄位: 品質狀態、MD 檔案連結、搜尋日期"""
+        records = rows['record'].tolist()
+        return {
+            '狀態': self._quality_status_series(rows['quality_score'], rows['md_date'] != '').tolist(),
+            'MD File': [self._format_md_file_url_with_warning(company_data) for company_data in records],
+            '搜尋日期': [self._get_search_datetime(company_data) for company_data in records]
+        }
+
+    def _quality_status_series(self, scores: pd.Series, has_date: pd.Series) -> pd.Series:
+        """_get_quality_status_by_score_enhanced 的向量化版本"""
+        numeric = pd.to_numeric(scores, errors='coerce')
+        status = pd.Series("🔴 不足", index=scores.index, dtype=object)
+        status[numeric >= 5] = "🟠 普通"
+        status[numeric >= 7] = "🟡 良好"
+        status[numeric >= 9] = "🟢 優秀"
+        status[~has_date.to_numpy()] = "🔴 缺少日期"
+        return status
+
+    def _grid_matrix(self, records: List[Dict]) -> np.ndarray:
+        """EPS / 營收 32 格 -> (筆數, 32) float 矩陣，None = NaN；ParsedRecord 直接取用陣列緩衝區"""
+        grid_size = len(self.grid_columns)
+        if records and all(isinstance(company_data, ParsedRecord) for company_data in records):
+            buffer = b''.join(company_data.grid.tobytes() for company_data in records)
+            return np.frombuffer(buffer, dtype=np.float64).reshape(len(records), grid_size)
+
+        matrix = np.full((len(records), grid_size), np.nan)
+        for row, company_data in enumerate(records):
+            if isinstance(company_data, ParsedRecord):
+                matrix[row] = company_data.grid
+                continue
+            for column, key, index in self.grid_columns:
+                value = company_data.get(key)
+                if value is None or value == '':
+                    continue
+                try:
+                    matrix[row, index] = float(value)
+                except (ValueError, TypeError):
+                    pass
+        return matrix
+
+    def _grid_frame_columns(self, grid: np.ndarray, rows: pd.Index) -> Dict[str, List[str]]:
+        """選定列 (原始記錄位置) 的 EPS / 營收欄位，整欄格式化為兩位小數字串"""
+        selected = grid[np.asarray(rows, dtype=np.intp)]
+        return {column: self._format_number_column(selected[:, index]) for column, _, index in self.grid_columns}
+
+    @staticmethod
+    def _format_number_column(values: np.ndarray) -> List[str]:
+        """_format_eps_value 的整欄版本: NaN -> ''，其他 -> '%.2f'
+
+        同一公司多篇文章的預估值多半相同，只格式化不重複的值 (一次 % 運算) 再依索引展開
+        """
+        present = ~np.isnan(values)
+        # 以位元樣式去重，-0.0 仍格式化為 '-0.00'
+        codes, unique_bits = pd.factorize(values[present].view(np.int64))
+        uniques = np.asarray(unique_bits, dtype=np.int64).view(np.float64)
+        formatted = (('%.2f\n' * len(uniques)) % tuple(uniques.tolist())).split('\n')[:-1]
+
+        result = np.full(len(values), '', dtype=object)
+        result[present] = np.array(formatted, dtype=object)[codes]
+        return result.tolist()
+
     # UPDATED: 新增 md_date 優先邏輯的方法
     def _get_md_date_with_priority(self, company_data: Dict[str, Any]) -> str:
         """UPDATED: 使用優先順序取得 MD 日期: md_date > content_date > empty"""
@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Sheets Sync - FactSet Pipeline v3.6.1
+Google Sheets 增量同步 - 只送出與上次上傳不同的列
+
+- 每個工作表在 cache/process 保存上次上傳內容的快照 (標題、鍵值、各列)
+- 以鍵值欄 (投資組合: 代號；詳細報告: MD File) 比對新舊列，
+  計算插入 / 刪除 / 修改，組成單一 spreadsheets.batchUpdate 請求 (原子套用)
+- 不呼叫 worksheet.clear()，工作表在上傳過程中不會出現空白
+- 無快照、標題改變或工作表內容與快照不符時，改以同一個 batchUpdate 整表覆寫
+- 處理日期等每次執行都會改變的欄位不列入比對，只隨有變更的列一起更新
+- SheetsUploadPlan 收集一次執行中所有工作表的值寫入與格式設定，
+  合併為最少次數的 batchUpdate 呼叫 (含退避重試與預覽模式)
+"""
+
+import os
+import re
+import json
+import time
+import random
+from datetime import datetime
+from difflib import SequenceMatcher
+from typing import Dict, Any, List, Optional, Tuple
+
+
+class SheetDiffSync:
+    """以快照比對的工作表增量同步"""
+
+    DEFAULT_SNAPSHOT_DIR = os.path.join('cache', 'process', 'sheets_snapshot')
+    VOLATILE_COLUMNS = ('處理日期',)
+    ROWS_PER_REQUEST = 500  # 單一 updateCells 的列數上限，讓大量寫入可分批裝入呼叫
+
+    def __init__(self, snapshot_dir: Optional[str] = None, volatile_columns=None):
+        self.snapshot_dir = snapshot_dir or self.DEFAULT_SNAPSHOT_DIR
+        self.volatile_columns = tuple(volatile_columns if volatile_columns is not None else self.VOLATILE_COLUMNS)
+
+    # -- 快照 ----------------------------------------------------------------
+
+    def snapshot_path(self, sheet_key: str) -> str:
+        return os.path.join(self.snapshot_dir, f'{sheet_key}.json')
+
+    def load_snapshot(self, sheet_key: str, spreadsheet_id: str, worksheet_id) -> Optional[Dict[str, Any]]:
+        """讀取快照；不存在、損毀或屬於其他工作表時回傳 None"""
+        path = self.snapshot_path(sheet_key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except Exception as e:
+            print(f"⚠️ 無法讀取 Sheets 快照 {path}: {e}")
+            return None
+        if snapshot.get('spreadsheet_id') != spreadsheet_id or snapshot.get('worksheet_id') != worksheet_id:
+            return None
+        return snapshot
+
+    def remove_snapshot(self, sheet_key: str) -> None:
+        path = self.snapshot_path(sheet_key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def save_snapshot(self, sheet_key: str, snapshot: Dict[str, Any]) -> str:
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        path = self.snapshot_path(sheet_key)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return path
+
+    # -- 比對 ----------------------------------------------------------------
+
+    @staticmethod
+    def _diff_keys(keys: List[str]) -> List[str]:
+        """重複的鍵值加上出現序號，確保比對時唯一"""
+        seen: Dict[str, int] = {}
+        unique = []
+        for key in keys:
+            count = seen.get(key, 0)
+            seen[key] = count + 1
+            unique.append(key if count == 0 else f'{key}#{count}')
+        return unique
+
+    def plan(self, snapshot: Optional[Dict[str, Any]], headers: List[str], rows: List[List[str]],
+             key_column: str, sheet_id: int, grid_rows: int, grid_cols: int) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """計算 batchUpdate 請求
+
+        回傳 (requests, result)；result 含統計 (mode/updated/inserted/deleted)
+        與上傳後應存成快照的 headers/rows。
+        """
+        key_index = headers.index(key_column) if key_column in headers else 0
+        width = len(headers)
+
+        if not snapshot or snapshot.get('headers') != headers:
+            return self._plan_full(headers, rows, sheet_id, grid_rows, grid_cols)
+
+        old_rows = snapshot.get('rows') or []
+        stable = [index for index, header in enumerate(headers) if header not in self.volatile_columns]
+
+        def same(old_row: List[str], new_row: List[str]) -> bool:
+            return all(old_row[index] == new_row[index] for index in stable)
+
+        old_keys = self._diff_keys([row[key_index] for row in old_rows])
+        new_keys = self._diff_keys([row[key_index] for row in rows])
+        opcodes = SequenceMatcher(None, old_keys, new_keys, autojunk=False).get_opcodes()
+
+        requests: List[Dict[str, Any]] = []
+        result_rows: List[List[str]] = []
+        stats = {'mode': 'incremental', 'updated': 0, 'inserted': 0, 'deleted': 0}
+
+        # 快照列 = 工作表實際內容: 未變更的列保留舊值 (含處理日期)
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag == 'equal':
+                for old_row, new_row in zip(old_rows[i1:i2], rows[j1:j2]):
+                    result_rows.append(old_row if same(old_row, new_row) else new_row)
+            else:
+                result_rows.extend(rows[j1:j2])
+
+        # 由下往上套用，插入/刪除不影響上方尚未處理的列號 (第 0 列為標題)
+        for tag, i1, i2, j1, j2 in reversed(opcodes):
+            if tag == 'equal':
+                changed = [
+                    k for k in range(i2 - i1)
+                    if not same(old_rows[i1 + k], rows[j1 + k])
+                ]
+                for start, end in reversed(self._runs(changed)):
+                    requests.extend(self._update_cells(sheet_id, i1 + start + 1, rows[j1 + start:j1 + end], width))
+                stats['updated'] += len(changed)
+                continue
+
+            overlap = min(i2 - i1, j2 - j1) if tag == 'replace' else 0
+            if i2 - i1 > overlap:
+                requests.append(self._dimension('deleteDimension', sheet_id, i1 + overlap + 1, i2 + 1))
+                stats['deleted'] += i2 - i1 - overlap
+            if j2 - j1 > overlap:
+                start = i1 + overlap + 1
+                count = j2 - j1 - overlap
+                if i1 + overlap == len(old_rows):
+                    # 資料尾端 (下方沒有資料列): 直接寫入空白列，不足的部分擴充網格
+                    if start + count > grid_rows:
+                        requests.append(self._append_dimension(sheet_id, 'ROWS', start + count - grid_rows))
+                else:
+                    requests.append(self._dimension('insertDimension', sheet_id, start, start + count))
+                requests.extend(self._update_cells(sheet_id, start, rows[j1 + overlap:j2], width))
+                stats['inserted'] += count
+            if overlap:
+                requests.extend(self._update_cells(sheet_id, i1 + 1, rows[j1:j1 + overlap], width))
+                stats['updated'] += overlap
+
+        stats.update({'headers': headers, 'rows': result_rows})
+        return requests, stats
+
+    def _plan_full(self, headers: List[str], rows: List[List[str]], sheet_id: int,
+                   grid_rows: int, grid_cols: int) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """整表覆寫 (仍為單一請求，先寫入新值再清除多餘列，不經過空白狀態)"""
+        total_rows = len(rows) + 1
+        width = len(headers)
+        requests: List[Dict[str, Any]] = []
+        if total_rows > grid_rows:
+            requests.append(self._append_dimension(sheet_id, 'ROWS', total_rows - grid_rows))
+        if width > grid_cols:
+            requests.append(self._append_dimension(sheet_id, 'COLUMNS', width - grid_cols))
+        clear_cols = max(width, grid_cols)
+
+        # 範圍涵蓋整個網格寬度: 未提供值的儲存格 (舊的多餘欄位) 一併清除
+        requests.extend(self._update_cells(sheet_id, 0, [headers] + rows, clear_cols))
+        if total_rows < grid_rows:
+            requests.append({
+                'updateCells': {
+                    'range': {'sheetId': sheet_id, 'startRowIndex': total_rows, 'endRowIndex': grid_rows,
+                              'startColumnIndex': 0, 'endColumnIndex': clear_cols},
+                    'fields': 'userEnteredValue'
+                }
+            })
+        return requests, {'mode': 'full', 'updated': len(rows), 'inserted': 0, 'deleted': 0,
+                          'headers': headers, 'rows': rows}
+
+    @staticmethod
+    def _runs(indexes: List[int]) -> List[Tuple[int, int]]:
+        """[1, 2, 3, 7] -> [(1, 4), (7, 8)]"""
+        runs: List[Tuple[int, int]] = []
+        for index in indexes:
+            if runs and runs[-1][1] == index:
+                runs[-1] = (runs[-1][0], index + 1)
+            else:
+                runs.append((index, index + 1))
+        return runs
+
+    # -- 請求 ----------------------------------------------------------------
+
+    @staticmethod
+    def _cell(value: str) -> Dict[str, Any]:
+        # 與 worksheet.update 的 RAW 寫入相同: 一律為字串，空字串清除儲存格
+        return {'userEnteredValue': {'stringValue': value}} if value != '' else {}
+
+    def _update_cells(self, sheet_id: int, start_row: int, rows: List[List[str]], width: int) -> List[Dict[str, Any]]:
+        requests = []
+        for offset in range(0, len(rows), self.ROWS_PER_REQUEST):
+            block = rows[offset:offset + self.ROWS_PER_REQUEST]
+            block_start = start_row + offset
+            requests.append({
+                'updateCells': {
+                    'range': {'sheetId': sheet_id, 'startRowIndex': block_start, 'endRowIndex': block_start + len(block),
+                              'startColumnIndex': 0, 'endColumnIndex': width},
+                    'rows': [{'values': [self._cell(value) for value in row]} for row in block],
+                    'fields': 'userEnteredValue'
+                }
+            })
+        return requests
+
+    @staticmethod
+    def _dimension(kind: str, sheet_id: int, start: int, end: int) -> Dict[str, Any]:
+        return {kind: {'range': {'sheetId': sheet_id, 'dimension': 'ROWS', 'startIndex': start, 'endIndex': end}}}
+
+    @staticmethod
+    def _append_dimension(sheet_id: int, dimension: str, length: int) -> Dict[str, Any]:
+        return {'appendDimension': {'sheetId': sheet_id, 'dimension': dimension, 'length': length}}
+
+
+class SheetsUploadPlan:
+    """一次上傳的所有值寫入與格式設定 -> 最少次數的 spreadsheets.batchUpdate
+
+    - add_values / add_format 只登記，不呼叫 API
+    - build: 讀取試算表中繼資料與各快照鍵值欄 (各一次讀取)，缺少的工作表以 addSheet 建立，
+      全部請求依序放入同一個 batchUpdate；超過單次大小上限時才分成多次呼叫
+    - execute: 依序送出，429 / 5xx 以指數退避重試；dry_run 只列出計畫的請求數
+    - 全部成功後才更新快照；未完成的工作表刪除快照，下次整表覆寫
+    """
+
+    def __init__(self, spreadsheet, sheet_sync: Optional[SheetDiffSync] = None, incremental: bool = True,
+                 max_retries: int = 3, retry_delay: float = 2.0, max_payload_bytes: int = 8_000_000):
+        self.spreadsheet = spreadsheet
+        self.sheet_sync = sheet_sync or SheetDiffSync()
+        self.incremental = incremental
+        self.max_retries = max(1, int(max_retries))
+        self.retry_delay = float(retry_delay)
+        self.max_payload_bytes = int(max_payload_bytes)
+        self._values: List[Dict[str, Any]] = []
+        self._formats: List[Tuple[str, str, Dict[str, Any]]] = []
+
+    # -- 登記 ----------------------------------------------------------------
+
+    def add_values(self, sheet_key: str, title: str, headers: List[str], rows: List[List[str]],
+                   key_column: Optional[str] = None, rows_hint: int = 1000, cols_hint: int = 20) -> None:
+        """登記一個工作表的完整內容 (字串)；rows_hint/cols_hint 為新建工作表的網格大小"""
+        self._values.append({
+            'sheet_key': sheet_key, 'title': title, 'headers': headers, 'rows': rows,
+            'key_column': key_column or (headers[0] if headers else ''),
+            'rows_hint': rows_hint, 'cols_hint': cols_hint
+        })
+
+    def add_format(self, title: str, a1_range: str, cell_format: Dict[str, Any]) -> None:
+        """登記格式設定 (與 worksheet.format 相同的 A1 範圍與格式)"""
+        self._formats.append((title, a1_range, cell_format))
+
+    # -- 建立請求 --------------------------------------------------------------
+
+    def build(self) -> Dict[str, Any]:
+        """回傳 {'calls': [[request...]...], 'call_sheets': [各呼叫涉及的工作表], 'sheets': {sheet_key: 統計}}"""
+        metadata = self.spreadsheet.fetch_sheet_metadata()
+        sheets = {
+            sheet['properties']['title']: sheet['properties']
+            for sheet in metadata.get('sheets', [])
+        }
+        next_sheet_id = max([props['sheetId'] for props in sheets.values()] + [0]) + 1
+
+        groups: List[Tuple[Optional[str], List[Dict[str, Any]]]] = []
+        created = set()
+        for entry in self._values:
+            if entry['title'] in sheets:
+                continue
+            print(f"📊 建立{entry['title']}工作表...")
+            props = {
+                'sheetId': next_sheet_id, 'title': entry['title'],
+                'gridProperties': {'rowCount': entry['rows_hint'], 'columnCount': entry['cols_hint']}
+            }
+            next_sheet_id += 1
+            sheets[entry['title']] = props
+            created.add(entry['title'])
+            groups.append((None, [{'addSheet': {'properties': props}}]))
+
+        snapshots = self._verified_snapshots(sheets, created)
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for entry in self._values:
+            props = sheets[entry['title']]
+            grid = props.get('gridProperties', {})
+            requests, result = self.sheet_sync.plan(
+                snapshots.get(entry['sheet_key']), entry['headers'], entry['rows'], entry['key_column'],
+                props['sheetId'], grid.get('rowCount', 0), grid.get('columnCount', 0)
+            )
+            result['title'] = entry['title']
+            result['sheet_id'] = props['sheetId']
+            result['requests'] = len(requests)
+            results[entry['sheet_key']] = result
+            groups.append((entry['sheet_key'], requests))
+
+        format_requests = []
+        for title, a1_range, cell_format in self._formats:
+            if title not in sheets:
+                print(f"⚠️ 找不到工作表 {title}，略過格式設定 {a1_range}")
+                continue
+            format_requests.append({
+                'repeatCell': {
+                    'range': a1_to_grid_range(sheets[title]['sheetId'], a1_range),
+                    'cell': {'userEnteredFormat': cell_format},
+                    'fields': 'userEnteredFormat(' + ','.join(cell_format.keys()) + ')'
+                }
+            })
+        groups.append((None, format_requests))
+
+        calls, call_sheets = self._pack(groups)
+        return {'calls': calls, 'call_sheets': call_sheets, 'sheets': results}
+
+    def _verified_snapshots(self, sheets: Dict[str, Dict[str, Any]], created: set) -> Dict[str, Dict[str, Any]]:
+        """載入快照，並以一次 values.batchGet 確認各工作表鍵值欄仍與快照相同"""
+        if not self.incremental:
+            return {}
+
+        candidates = []
+        for entry in self._values:
+            if entry['title'] in created:
+                continue
+            props = sheets[entry['title']]
+            snapshot = self.sheet_sync.load_snapshot(entry['sheet_key'], self.spreadsheet.id, props['sheetId'])
+            if not snapshot or snapshot.get('headers') != entry['headers']:
+                continue
+            key_index = entry['headers'].index(entry['key_column']) if entry['key_column'] in entry['headers'] else 0
+            column = column_letter(key_index)
+            expected = [entry['headers'][key_index]] + [row[key_index] for row in snapshot.get('rows') or []]
+            candidates.append((entry, snapshot, f"'{entry['title']}'!{column}:{column}", expected))
+
+        if not candidates:
+            return {}
+
+        response = self.spreadsheet.values_batch_get(
+            [candidate[2] for candidate in candidates], params={'majorDimension': 'COLUMNS'}
+        )
+        value_ranges = response.get('valueRanges', [])
+
+        verified = {}
+        for index, (entry, snapshot, _, expected) in enumerate(candidates):
+            values = value_ranges[index].get('values', []) if index < len(value_ranges) else []
+            actual = values[0] if values else []
+            if actual == expected:
+                verified[entry['sheet_key']] = snapshot
+            else:
+                # 工作表可能被手動編輯或上次上傳未完成
+                print(f"⚠️ {entry['title']} 內容與快照不符，改為整表覆寫")
+        return verified
+
+    def _pack(self, groups: List[Tuple[Optional[str], List[Dict[str, Any]]]]) -> Tuple[List[List[Dict[str, Any]]], List[set]]:
+        """依序裝入呼叫；單次請求內容超過大小上限時才分開"""
+        calls: List[List[Dict[str, Any]]] = []
+        call_sheets: List[set] = []
+        size = 0
+        for sheet_key, requests in groups:
+            for request in requests:
+                request_size = len(json.dumps(request, ensure_ascii=False).encode('utf-8'))
+                if not calls or (size + request_size > self.max_payload_bytes and calls[-1]):
+                    calls.append([])
+                    call_sheets.append(set())
+                    size = 0
+                calls[-1].append(request)
+                size += request_size
+                if sheet_key:
+                    call_sheets[-1].add(sheet_key)
+        return calls, call_sheets
+
+    # -- 執行 ----------------------------------------------------------------
+
+    def execute(self, dry_run: bool = False) -> Dict[str, Any]:
+        """送出計畫；回傳 {'success', 'calls', 'requests', 'sheets'}"""
+        plan = self.build()
+        calls, call_sheets, sheets = plan['calls'], plan['call_sheets'], plan['sheets']
+        total_requests = sum(len(call) for call in calls)
+        summary = {'success': True, 'calls': len(calls), 'requests': total_requests, 'sheets': sheets}
+
+        if dry_run:
+            print(f"🔍 預覽模式: {len(sheets)} 個工作表，{total_requests} 個請求，"
+                  f"{len(calls)} 次 batchUpdate 呼叫 (未送出)")
+            for result in sheets.values():
+                print(f"   {result['title']}: {self.describe(result)}")
+            return summary
+
+        failed_sheets = set()
+        for index, call in enumerate(calls):
+            try:
+                self._batch_update_with_retry({'requests': call})
+            except Exception as e:
+                print(f"❌ batchUpdate 第 {index + 1}/{len(calls)} 次呼叫失敗: {e}")
+                summary['success'] = False
+                for remaining in call_sheets[index:]:
+                    failed_sheets.update(remaining)
+                break
+
+        for sheet_key, result in sheets.items():
+            if sheet_key in failed_sheets:
+                result['success'] = False
+                self.sheet_sync.remove_snapshot(sheet_key)
+                continue
+            result['success'] = True
+            self.sheet_sync.save_snapshot(sheet_key, {
+                'spreadsheet_id': self.spreadsheet.id,
+                'worksheet_id': result['sheet_id'],
+                'updated_at': datetime.now().isoformat(),
+                'headers': result['headers'],
+                'rows': result['rows']
+            })
+        return summary
+
+    def _batch_update_with_retry(self, body: Dict[str, Any]):
+        for attempt in range(self.max_retries):
+            try:
+                return self.spreadsheet.batch_update(body)
+            except Exception as e:
+                status = getattr(getattr(e, 'response', None), 'status_code', None)
+                # 請求內容錯誤 (4xx，429 除外) 重試無用
+                retryable = status is None or status == 429 or status >= 500
+                if not retryable or attempt == self.max_retries - 1:
+                    raise
+                wait_time = self.retry_delay * (2 ** attempt) + random.uniform(0, self.retry_delay)
+                print(f"⏳ Sheets API 錯誤 ({status or e})，等待 {wait_time:.1f} 秒後重試...")
+                time.sleep(wait_time)
+
+    @staticmethod
+    def describe(result: Dict[str, Any]) -> str:
+        mode = '整表覆寫' if result['mode'] == 'full' else '增量同步'
+        return (f"{mode} - 更新 {result['updated']} 列、新增 {result['inserted']} 列、"
+                f"刪除 {result['deleted']} 列 ({result['requests']} 個請求)")
+
+
+def column_letter(index: int) -> str:
+    """0 -> A, 25 -> Z, 26 -> AA"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def a1_to_grid_range(sheet_id: int, a1_range: str) -> Dict[str, Any]:
+    """'A1:L1' / 'E:F' / 'A:A' / 'B2' -> GridRange (未指定列號時為整欄)"""
+    grid = {'sheetId': sheet_id}
+    parts = a1_range.split(':')
+    start, end = parts[0], parts[-1]
+    start_col, start_row = re.match(r'([A-Za-z]*)(\d*)', start).groups()
+    end_col, end_row = re.match(r'([A-Za-z]*)(\d*)', end).groups()
+
+    def col_index(letters: str) -> int:
+        value = 0
+        for char in letters.upper():
+            value = value * 26 + ord(char) - ord('A') + 1
+        return value - 1
+
+    if start_col:
+        grid['startColumnIndex'] = col_index(start_col)
+    if end_col:
+        grid['endColumnIndex'] = col_index(end_col) + 1
+    if start_row:
+        grid['startRowIndex'] = int(start_row) - 1
+    if end_row:
+        grid['endRowIndex'] = int(end_row)
+    return grid
@@ -2,18 +2,23 @@
 """
 Sheets Uploader - FactSet Pipeline v3.6.1 (修復版)
 修復 columnWidth API 錯誤，增加 CSV-only 模式
+所有工作表寫入與格式設定合併為單一上傳計畫 (sheets_sync.SheetsUploadPlan)
 """
 
 import os
 import gspread
 import pandas as pd
 import math
-import time
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from google.oauth2.service_account import Credentials
 import json
 
+try:
+    from sheets_sync import SheetDiffSync, SheetsUploadPlan
+except ImportError:
+    from process_group.sheets_sync import SheetDiffSync, SheetsUploadPlan
+
 # 🔧 載入環境變數
 try:
     from dotenv import load_dotenv
@@ -71,15 +76,20 @@ class SheetsUploader:
         # 🆕 API 限制設定
         self.api_settings = {
             'max_retries': 3,
-            'retry_delay': 2,  # 秒
-            'batch_size': 100,  # 每次批量操作的行數
-            'rate_limit_delay': 0.5  # API 調用間隔
+            'retry_delay': 2,  # 秒，指數退避的基準
+            'max_payload_bytes': 8_000_000,  # 單次 batchUpdate 內容上限，超過才分成多次呼叫
+            'incremental_sync': True  # 只同步與上次快照不同的列
         }
+        self.sheet_sync = SheetDiffSync()
 
     def upload_all_reports(self, portfolio_df: pd.DataFrame, detailed_df: pd.DataFrame, 
                           keyword_df: pd.DataFrame = None, watchlist_df: pd.DataFrame = None, 
-                          csv_only=False) -> bool:
-        """🔧 v3.6.1 主要上傳方法 - 支援 CSV-only 模式"""
+                          csv_only=False, dry_run=False) -> bool:
+        """🔧 v3.6.1 主要上傳方法 - 支援 CSV-only 模式
+
+        所有工作表的寫入與格式設定合併為單一上傳計畫 (SheetsUploadPlan)；
+        dry_run 只列出計畫的請求數，不送出。
+        """
         
         # 🆕 如果啟用 CSV-only 模式，只生成 CSV
         if csv_only or self.validation_settings.get('csv_only_mode', False):
@@ -121,52 +131,32 @@ class SheetsUploader:
             portfolio_df_marked = self._mark_problematic_data_v361(portfolio_df)
             detailed_df_marked = self._mark_problematic_data_v361(detailed_df)
             
-            success_count = 0
-            total_uploads = 4  # 基本上傳數量
-            
-            # 上傳投資組合摘要
-            if self._upload_portfolio_summary_safe(portfolio_df_marked):
-                success_count += 1
-                print("📊 投資組合摘要上傳成功")
-            else:
-                print("❌ 投資組合摘要上傳失敗")
-            
-            # 上傳詳細報告
-            if self._upload_detailed_report_safe(detailed_df_marked):
-                success_count += 1
-                print("📊 詳細報告上傳成功")
-            else:
-                print("❌ 詳細報告上傳失敗")
+            # 所有工作表與格式設定收集成一個上傳計畫
+            plan = self._new_upload_plan()
+            self._plan_portfolio_summary(plan, portfolio_df_marked)
+            self._plan_detailed_report(plan, detailed_df_marked)
             
-            # 上傳關鍵字報告
             if keyword_df is not None and not keyword_df.empty:
-                if self._upload_keyword_summary_safe(keyword_df):
-                    success_count += 1
-                    print("📊 關鍵字報告上傳成功")
-                else:
-                    print("⚠️ 關鍵字報告上傳失敗")
+                self._plan_keyword_summary(plan, keyword_df)
             
-            # 上傳觀察名單報告
             if watchlist_df is not None and not watchlist_df.empty:
-                if self._upload_watchlist_summary_safe(watchlist_df):
-                    success_count += 1
-                    print("📊 觀察名單報告上傳成功")
-                else:
-                    print("⚠️ 觀察名單報告上傳失敗")
+                self._plan_watchlist_summary(plan, watchlist_df)
+            
+            # 處理驗證摘要 (CSV 總是生成，上傳併入同一計畫)
+            self._handle_validation_summary_v361_safe(portfolio_df, detailed_df, watchlist_df, plan)
+            
+            upload_success = self._execute_upload_plan(plan, dry_run=dry_run)
+            if dry_run:
+                return upload_success
             
             # 🔧 同時生成 CSV 備份
             self._generate_csv_backup(portfolio_df, detailed_df, keyword_df, watchlist_df)
             
-            # 處理驗證摘要
-            self._handle_validation_summary_v361_safe(portfolio_df, detailed_df, watchlist_df)
-            
-            # 評估上傳成功率
-            success_rate = success_count / max(total_uploads, 1)
-            if success_rate >= 0.5:
-                print(f"✅ 上傳完成 (成功率: {success_rate:.1%})")
+            if upload_success:
+                print("✅ 上傳完成")
                 return True
             else:
-                print(f"⚠️ 部分上傳失敗 (成功率: {success_rate:.1%})")
+                print("⚠️ 上傳失敗")
                 print("💡 建議使用生成的 CSV 檔案")
                 return False
             
@@ -258,153 +248,122 @@ class SheetsUploader:
             print(f"❌ CSV-only 模式失敗: {e}")
             return False
 
-    def _upload_watchlist_summary_safe(self, watchlist_df: pd.DataFrame) -> bool:
-        """🔧 安全版本的觀察名單上傳 - 修復 columnWidth 問題"""
-        try:
-            # 建立或取得觀察名單工作表
-            try:
-                worksheet = self.spreadsheet.worksheet(self.worksheet_names['watchlist'])
-            except gspread.WorksheetNotFound:
-                print("📊 建立觀察名單工作表...")
-                worksheet = self.spreadsheet.add_worksheet(
-                    title=self.worksheet_names['watchlist'], 
-                    rows=1000, 
-                    cols=15
-                )
-            
-            # 清空現有資料
-            worksheet.clear()
-            time.sleep(self.api_settings['rate_limit_delay'])
-            
-            # 清理資料
-            watchlist_df_clean = watchlist_df.copy()
-            watchlist_df_clean = watchlist_df_clean.fillna('')
-            
-            # 確保公司代號格式正確
-            if '公司代號' in watchlist_df_clean.columns:
-                watchlist_df_clean['公司代號'] = watchlist_df_clean['公司代號'].apply(self._clean_stock_code)
-            
-            # 格式化數值欄位
-            numeric_columns = ['MD檔案數量', '平均品質評分', '最高品質評分', '搜尋關鍵字數量', '關鍵字平均品質']
-            for col in numeric_columns:
-                if col in watchlist_df_clean.columns:
-                    watchlist_df_clean[col] = watchlist_df_clean[col].apply(self._format_numeric_value)
-            
-            # 準備上傳資料
-            headers = watchlist_df_clean.columns.tolist()
-            data = watchlist_df_clean.values.tolist()
-            
-            # 確保所有資料都是 JSON 相容的
-            data = [[self._ensure_json_compatible(cell) for cell in row] for row in data]
-            
-            # 上傳標題
-            worksheet.update('A1', [headers])
-            time.sleep(self.api_settings['rate_limit_delay'])
-            
-            # 分批上傳資料
-            if data:
-                batch_size = self.api_settings['batch_size']
-                for i in range(0, len(data), batch_size):
-                    batch_data = data[i:i + batch_size]
-                    start_row = i + 2  # +2 因為標題佔第1行，資料從第2行開始
-                    range_name = f'A{start_row}'
-                    
-                    worksheet.update(range_name, batch_data)
-                    time.sleep(self.api_settings['rate_limit_delay'])
-                    
-                    if i + batch_size < len(data):
-                        print(f"   已上傳 {i + batch_size}/{len(data)} 行...")
-            
-            # 🔧 修復後的格式設定 - 不使用 columnWidth
-            self._format_watchlist_worksheet_fixed(worksheet, len(watchlist_df_clean))
-            
-            print("📊 觀察名單報告上傳完成")
+    def _new_upload_plan(self) -> SheetsUploadPlan:
+        return SheetsUploadPlan(
+            self.spreadsheet,
+            sheet_sync=self.sheet_sync,
+            incremental=self.api_settings['incremental_sync'],
+            max_retries=self.api_settings['max_retries'],
+            retry_delay=self.api_settings['retry_delay'],
+            max_payload_bytes=self.api_settings['max_payload_bytes']
+        )
+
+    def _execute_upload_plan(self, plan: SheetsUploadPlan, dry_run: bool = False) -> bool:
+        """送出上傳計畫並列出各工作表結果"""
+        result = plan.execute(dry_run=dry_run)
+        if dry_run:
             return True
-            
-        except Exception as e:
-            print(f"❌ 觀察名單報告上傳失敗: {e}")
+        
+        for sheet_result in result['sheets'].values():
+            status = '上傳成功' if sheet_result.get('success') else '上傳失敗'
+            print(f"📊 {sheet_result['title']}{status}: {plan.describe(sheet_result)}")
+        print(f"☁️ Google Sheets: {result['calls']} 次 batchUpdate 呼叫，共 {result['requests']} 個請求")
+        return result['success']
+
+    def _prepare_sheet_rows(self, df: pd.DataFrame, code_columns: List[str] = (),
+                            numeric_columns: List[str] = ()):
+        """DataFrame -> (標題, 字串資料列)"""
+        df_clean = df.copy()
+        df_clean = df_clean.fillna('')
+        
+        for col in code_columns:
+            if col in df_clean.columns:
+                df_clean[col] = df_clean[col].apply(self._clean_stock_code)
+        
+        for col in numeric_columns:
+            if col in df_clean.columns:
+                df_clean[col] = df_clean[col].apply(self._format_numeric_value)
+        
+        headers = df_clean.columns.tolist()
+        data = df_clean.values.tolist()
+        
+        # 確保所有資料都是 JSON 相容的
+        data = [[self._ensure_json_compatible(cell) for cell in row] for row in data]
+        return headers, data
+
+    def _plan_portfolio_summary(self, plan: SheetsUploadPlan, portfolio_df: pd.DataFrame):
+        """投資組合摘要 (以代號比對)"""
+        headers, data = self._prepare_sheet_rows(
+            portfolio_df, ['代號', '股票代號'],
+            ['分析師數量', '目標價', '2025EPS平均值', '2026EPS平均值', '2027EPS平均值', '品質評分']
+        )
+        plan.add_values('portfolio', self.worksheet_names['portfolio'], headers, data,
+                        key_column='代號', rows_hint=1000, cols_hint=20)
+
+    def _plan_detailed_report(self, plan: SheetsUploadPlan, detailed_df: pd.DataFrame):
+        """詳細報告 (以 MD File 比對)"""
+        numeric_columns = [
+            '分析師數量', '目標價', '品質評分',
+            '2025EPS最高值', '2025EPS最低值', '2025EPS平均值',
+            '2026EPS最高值', '2026EPS最低值', '2026EPS平均值',
+            '2027EPS最高值', '2027EPS最低值', '2027EPS平均值'
+        ]
+        headers, data = self._prepare_sheet_rows(detailed_df, ['代號', '股票代號'], numeric_columns)
+        plan.add_values('detailed', self.worksheet_names['detailed'], headers, data,
+                        key_column='MD File', rows_hint=2000, cols_hint=25)
+
+    def _plan_keyword_summary(self, plan: SheetsUploadPlan, keyword_df: pd.DataFrame):
+        """查詢模式/關鍵字統計 (以第一欄比對)"""
+        headers, data = self._prepare_sheet_rows(
+            keyword_df, [], ['使用次數', '平均品質評分', '最高品質評分', '最低品質評分', '相關公司數量']
+        )
+        title = self.worksheet_names['keywords']
+        plan.add_values('keywords', title, headers, data, rows_hint=1000, cols_hint=12)
+        plan.add_format(title, 'A1:J1', {
+            'backgroundColor': {'red': 0.2, 'green': 0.6, 'blue': 0.9},
+            'textFormat': {'bold': True, 'foregroundColor': {'red': 1, 'green': 1, 'blue': 1}}
+        })
+
+    def _plan_watchlist_summary(self, plan: SheetsUploadPlan, watchlist_df: pd.DataFrame):
+        """觀察名單摘要 (以公司代號比對) - 不使用 columnWidth"""
+        headers, data = self._prepare_sheet_rows(
+            watchlist_df, ['公司代號'], ['MD檔案數量', '平均品質評分', '最高品質評分', '搜尋關鍵字數量', '關鍵字平均品質']
+        )
+        title = self.worksheet_names['watchlist']
+        plan.add_values('watchlist', title, headers, data, key_column='公司代號', rows_hint=1000, cols_hint=15)
+        
+        plan.add_format(title, 'A1:L1', {
+            'backgroundColor': {'red': 0.2, 'green': 0.7, 'blue': 0.9},
+            'textFormat': {'bold': True, 'foregroundColor': {'red': 1, 'green': 1, 'blue': 1}}
+        })
+        if data:
+            plan.add_format(title, 'E:F', {'numberFormat': {'type': 'NUMBER', 'pattern': '0.00'}})  # 品質評分欄位
+            plan.add_format(title, 'I:I', {'numberFormat': {'type': 'NUMBER', 'pattern': '0.00'}})  # 關鍵字平均品質
+            plan.add_format(title, 'A:A', {'horizontalAlignment': 'CENTER'})   # 公司代號置中
+            plan.add_format(title, 'B:B', {'horizontalAlignment': 'LEFT'})     # 公司名稱左對齊
+
+    def _plan_validation_summary(self, plan: SheetsUploadPlan, validation_df: pd.DataFrame):
+        """驗證摘要 - 只設定最基本的標題格式"""
+        headers, data = self._prepare_sheet_rows(validation_df)
+        title = self.worksheet_names['validation']
+        plan.add_values('validation', title, headers, data, rows_hint=200, cols_hint=10)
+        plan.add_format(title, 'A1:E1', {'textFormat': {'bold': True}})
+
+    def upload_keyword_summary(self, keyword_df: pd.DataFrame, dry_run: bool = False) -> bool:
+        """單獨上傳查詢模式/關鍵字統計"""
+        if not self._setup_connection():
             return False
+        plan = self._new_upload_plan()
+        self._plan_keyword_summary(plan, keyword_df)
+        return self._execute_upload_plan(plan, dry_run=dry_run)
 
-    def _format_watchlist_worksheet_fixed(self, worksheet, data_rows: int):
-        """🔧 修復版本：格式化觀察名單工作表 - 不使用 columnWidth"""
-        try:
-            # 設定標題列格式
-            worksheet.format('A1:L1', {
-                'backgroundColor': {'red': 0.2, 'green': 0.7, 'blue': 0.9},
-                'textFormat': {'bold': True, 'foregroundColor': {'red': 1, 'green': 1, 'blue': 1}}
-            })
-            time.sleep(self.api_settings['rate_limit_delay'])
-            
-            if data_rows > 0:
-                try:
-                    # 設定數值欄位格式 - 分批處理
-                    ranges_to_format = [
-                        ('E:F', {'numberFormat': {'type': 'NUMBER', 'pattern': '0.00'}}),  # 品質評分欄位
-                        ('I:I', {'numberFormat': {'type': 'NUMBER', 'pattern': '0.00'}})   # 關鍵字平均品質
-                    ]
-                    
-                    for range_name, format_dict in ranges_to_format:
-                        try:
-                            worksheet.format(range_name, format_dict)
-                            time.sleep(self.api_settings['rate_limit_delay'])
-                        except Exception as format_error:
-                            print(f"⚠️ 設定 {range_name} 格式失敗: {format_error}")
-                
-                except Exception as number_format_error:
-                    print(f"⚠️ 設定數值格式失敗: {number_format_error}")
-                
-                # 🔧 移除 columnWidth 設定，改用簡單的文字格式
-                try:
-                    # 設定文字對齊
-                    worksheet.format('A:A', {'horizontalAlignment': 'CENTER'})   # 公司代號置中
-                    time.sleep(self.api_settings['rate_limit_delay'])
-                    
-                    worksheet.format('B:B', {'horizontalAlignment': 'LEFT'})     # 公司名稱左對齊
-                    time.sleep(self.api_settings['rate_limit_delay'])
-                    
-                except Exception as align_error:
-                    print(f"⚠️ 設定對齊格式失敗: {align_error}")
-                    
-        except Exception as e:
-            print(f"⚠️ 觀察名單工作表格式設定失敗: {e}")
-
-    def _upload_portfolio_summary_safe(self, portfolio_df: pd.DataFrame) -> bool:
-        """安全版本的投資組合摘要上傳"""
-        return self._upload_with_retry("投資組合摘要", portfolio_df, self._upload_portfolio_summary)
-
-    def _upload_detailed_report_safe(self, detailed_df: pd.DataFrame) -> bool:
-        """安全版本的詳細報告上傳"""
-        return self._upload_with_retry("詳細報告", detailed_df, self._upload_detailed_report)
-
-    def _upload_keyword_summary_safe(self, keyword_df: pd.DataFrame) -> bool:
-        """安全版本的關鍵字報告上傳"""
-        return self._upload_with_retry("關鍵字報告", keyword_df, self._upload_keyword_summary)
-
-    def _upload_with_retry(self, report_name: str, df: pd.DataFrame, upload_func) -> bool:
-        """通用的重試上傳方法"""
-        for attempt in range(self.api_settings['max_retries']):
-            try:
-                result = upload_func(df)
-                if result:
-                    return True
-                else:
-                    print(f"⚠️ {report_name} 上傳嘗試 {attempt + 1} 失敗")
-                    
-            except Exception as e:
-                print(f"⚠️ {report_name} 上傳嘗試 {attempt + 1} 錯誤: {e}")
-                
-                # 檢查是否為 API 限制錯誤
-                if "quota exceeded" in str(e).lower() or "429" in str(e):
-                    print(f"🚫 API 限制，停止重試 {report_name}")
-                    return False
-                
-                if attempt < self.api_settings['max_retries'] - 1:
-                    wait_time = self.api_settings['retry_delay'] * (attempt + 1)
-                    print(f"⏳ 等待 {wait_time} 秒後重試...")
-                    time.sleep(wait_time)
-        
-        print(f"❌ {report_name} 所有重試失敗")
-        return False
+    def upload_watchlist_summary(self, watchlist_df: pd.DataFrame, dry_run: bool = False) -> bool:
+        """單獨上傳觀察名單摘要"""
+        if not self._setup_connection():
+            return False
+        plan = self._new_upload_plan()
+        self._plan_watchlist_summary(plan, watchlist_df)
+        return self._execute_upload_plan(plan, dry_run=dry_run)
 
     def _check_api_availability(self) -> bool:
         """檢查 API 可用性"""
@@ -565,8 +524,9 @@ FactSet Pipeline v3.6.1 - CSV Only Mode
             f.write(guide_content)
 
     def _handle_validation_summary_v361_safe(self, portfolio_df: pd.DataFrame, detailed_df: pd.DataFrame, 
-                                            watchlist_df: pd.DataFrame = None):
-        """🔧 安全版本的驗證摘要處理"""
+                                            watchlist_df: pd.DataFrame = None,
+                                            plan: Optional[SheetsUploadPlan] = None):
+        """🔧 安全版本的驗證摘要處理 (上傳併入 plan)"""
         try:
             # 1. 生成驗證摘要數據
             validation_data = self._generate_validation_summary_data_v361(portfolio_df, detailed_df, watchlist_df)
@@ -576,17 +536,9 @@ FactSet Pipeline v3.6.1 - CSV Only Mode
             if csv_file:
                 print(f"📊 驗證摘要 CSV 已生成: {os.path.basename(csv_file)}")
             
-            # 3. 嘗試上傳到 Google Sheets（可選，有 API 限制保護）
-            if self.validation_settings.get('upload_validation_to_sheets', False):
-                try:
-                    if self._check_api_availability():
-                        self._upload_validation_summary_simple(validation_data)
-                        print("📊 驗證摘要已上傳到 Google Sheets")
-                    else:
-                        print("⚠️ API 限制，跳過 Google Sheets 驗證摘要上傳")
-                except Exception as e:
-                    print(f"⚠️ Google Sheets 驗證摘要上傳失敗: {e}")
-                    print("💡 但 CSV 檔案已生成，可手動上傳")
+            # 3. 加入 Google Sheets 上傳計畫（可選）
+            if plan is not None and self.validation_settings.get('upload_validation_to_sheets', False):
+                self._plan_validation_summary(plan, validation_data)
             
         except Exception as e:
             print(f"⚠️ 驗證摘要處理失敗: {e}")
@@ -789,55 +741,6 @@ FactSet Pipeline v3.6.1 - CSV Only Mode
             print(f"❌ 儲存驗證摘要 CSV 失敗: {e}")
             return ""
 
-    def _upload_validation_summary_simple(self, validation_df: pd.DataFrame):
-        """簡化版驗證摘要上傳"""
-        try:
-            # 嘗試找到或建立驗證摘要工作表
-            try:
-                validation_worksheet = self.spreadsheet.worksheet(self.worksheet_names['validation'])
-            except gspread.WorksheetNotFound:
-                print("📊 建立驗證摘要工作表...")
-                validation_worksheet = self.spreadsheet.add_worksheet(title=self.worksheet_names['validation'], rows=200, cols=10)
-            
-            # 清空現有內容
-            validation_worksheet.clear()
-            time.sleep(self.api_settings['rate_limit_delay'])
-            
-            # 準備數據
-            headers = validation_df.columns.tolist()
-            data = validation_df.values.tolist()
-            
-            # 確保所有數據都是字符串格式，避免格式問題
-            clean_data = []
-            for row in data:
-                clean_row = []
-                for cell in row:
-                    if pd.isna(cell):
-                        clean_row.append('')
-                    else:
-                        clean_row.append(str(cell))
-                clean_data.append(clean_row)
-            
-            # 上傳標題
-            validation_worksheet.update('A1', [headers])
-            time.sleep(self.api_settings['rate_limit_delay'])
-            
-            # 上傳數據
-            if clean_data:
-                validation_worksheet.update('A2', clean_data)
-                time.sleep(self.api_settings['rate_limit_delay'])
-            
-            # 只設定最基本的標題格式
-            try:
-                validation_worksheet.format('A1:E1', {
-                    'textFormat': {'bold': True}
-                })
-            except:
-                pass
-            
-        except Exception as e:
-            raise Exception(f"簡化上傳失敗: {e}")
-
     # 其他輔助方法
     def _clean_stock_code(self, code):
         """清理股票代號格式"""
@@ -925,161 +828,6 @@ FactSet Pipeline v3.6.1 - CSV Only Mode
             print(f"❌ Google Sheets 連線設定失敗: {e}")
             return False
 
-    def _upload_portfolio_summary(self, portfolio_df: pd.DataFrame) -> bool:
-        """上傳投資組合摘要"""
-        try:
-            try:
-                portfolio_worksheet = self.spreadsheet.worksheet(self.worksheet_names['portfolio'])
-            except gspread.WorksheetNotFound:
-                print("📊 建立投資組合摘要工作表...")
-                portfolio_worksheet = self.spreadsheet.add_worksheet(title=self.worksheet_names['portfolio'], rows=1000, cols=20)
-            
-            portfolio_worksheet.clear()
-            time.sleep(self.api_settings['rate_limit_delay'])
-            
-            portfolio_df_clean = portfolio_df.copy()
-            portfolio_df_clean = portfolio_df_clean.fillna('')
-            
-            if '代號' in portfolio_df_clean.columns:
-                portfolio_df_clean['代號'] = portfolio_df_clean['代號'].apply(self._clean_stock_code)
-            
-            if '股票代號' in portfolio_df_clean.columns:
-                portfolio_df_clean['股票代號'] = portfolio_df_clean['股票代號'].apply(self._clean_stock_code)
-            
-            numeric_columns = ['分析師數量', '目標價', '2025EPS平均值', '2026EPS平均值', '2027EPS平均值', '品質評分']
-            for col in numeric_columns:
-                if col in portfolio_df_clean.columns:
-                    portfolio_df_clean[col] = portfolio_df_clean[col].apply(self._format_numeric_value)
-            
-            headers = portfolio_df_clean.columns.tolist()
-            data = portfolio_df_clean.values.tolist()
-            
-            data = [[self._ensure_json_compatible(cell) for cell in row] for row in data]
-            
-            portfolio_worksheet.update('A1', [headers])
-            time.sleep(self.api_settings['rate_limit_delay'])
-            
-            if data:
-                portfolio_worksheet.update('A2', data)
-                time.sleep(self.api_settings['rate_limit_delay'])
-            
-            return True
-            
-        except Exception as e:
-            print(f"❌ 投資組合摘要上傳失敗: {e}")
-            return False
-
-    def _upload_detailed_report(self, detailed_df: pd.DataFrame) -> bool:
-        """上傳詳細報告"""
-        try:
-            try:
-                detailed_worksheet = self.spreadsheet.worksheet(self.worksheet_names['detailed'])
-            except gspread.WorksheetNotFound:
-                print("📊 建立詳細報告工作表...")
-                detailed_worksheet = self.spreadsheet.add_worksheet(title=self.worksheet_names['detailed'], rows=2000, cols=25)
-            
-            detailed_worksheet.clear()
-            time.sleep(self.api_settings['rate_limit_delay'])
-            
-            detailed_df_clean = detailed_df.copy()
-            detailed_df_clean = detailed_df_clean.fillna('')
-            
-            if '代號' in detailed_df_clean.columns:
-                detailed_df_clean['代號'] = detailed_df_clean['代號'].apply(self._clean_stock_code)
-            
-            if '股票代號' in detailed_df_clean.columns:
-                detailed_df_clean['股票代號'] = detailed_df_clean['股票代號'].apply(self._clean_stock_code)
-            
-            numeric_columns = [
-                '分析師數量', '目標價', '品質評分',
-                '2025EPS最高值', '2025EPS最低值', '2025EPS平均值',
-                '2026EPS最高值', '2026EPS最低值', '2026EPS平均值',
-                '2027EPS最高值', '2027EPS最低值', '2027EPS平均值'
-            ]
-            for col in numeric_columns:
-                if col in detailed_df_clean.columns:
-                    detailed_df_clean[col] = detailed_df_clean[col].apply(self._format_numeric_value)
-            
-            headers = detailed_df_clean.columns.tolist()
-            data = detailed_df_clean.values.tolist()
-            
-            data = [[self._ensure_json_compatible(cell) for cell in row] for row in data]
-            
-            detailed_worksheet.update('A1', [headers])
-            time.sleep(self.api_settings['rate_limit_delay'])
-            
-            if data:
-                # 分批上傳大量資料
-                batch_size = self.api_settings['batch_size']
-                for i in range(0, len(data), batch_size):
-                    batch_data = data[i:i + batch_size]
-                    start_row = i + 2
-                    range_name = f'A{start_row}'
-                    
-                    detailed_worksheet.update(range_name, batch_data)
-                    time.sleep(self.api_settings['rate_limit_delay'])
-                    
-                    if i + batch_size < len(data):
-                        print(f"   已上傳 {i + batch_size}/{len(data)} 行...")
-            
-            return True
-            
-        except Exception as e:
-            print(f"❌ 詳細報告上傳失敗: {e}")
-            return False
-
-    def _upload_keyword_summary(self, keyword_df: pd.DataFrame) -> bool:
-        """上傳關鍵字統計報告"""
-        try:
-            try:
-                worksheet = self.spreadsheet.worksheet(self.worksheet_names['keywords'])
-            except gspread.WorksheetNotFound:
-                print("📊 建立關鍵字工作表...")
-                worksheet = self.spreadsheet.add_worksheet(
-                    title=self.worksheet_names['keywords'], 
-                    rows=1000, 
-                    cols=12
-                )
-            
-            worksheet.clear()
-            time.sleep(self.api_settings['rate_limit_delay'])
-            
-            keyword_df_clean = keyword_df.copy()
-            keyword_df_clean = keyword_df_clean.fillna('')
-            
-            numeric_columns = ['使用次數', '平均品質評分', '最高品質評分', '最低品質評分', '相關公司數量']
-            for col in numeric_columns:
-                if col in keyword_df_clean.columns:
-                    keyword_df_clean[col] = keyword_df_clean[col].apply(self._format_numeric_value)
-            
-            headers = keyword_df_clean.columns.tolist()
-            data = keyword_df_clean.values.tolist()
-            
-            data = [[self._ensure_json_compatible(cell) for cell in row] for row in data]
-            
-            worksheet.update('A1', [headers])
-            time.sleep(self.api_settings['rate_limit_delay'])
-            
-            if data:
-                worksheet.update('A2', data)
-                time.sleep(self.api_settings['rate_limit_delay'])
-            
-            # 設定基本格式
-            try:
-                worksheet.format('A1:J1', {
-                    'backgroundColor': {'red': 0.2, 'green': 0.6, 'blue': 0.9},
-                    'textFormat': {'bold': True, 'foregroundColor': {'red': 1, 'green': 1, 'blue': 1}}
-                })
-                time.sleep(self.api_settings['rate_limit_delay'])
-            except:
-                pass
-            
-            return True
-            
-        except Exception as e:
-            print(f"❌ 關鍵字報告上傳失敗: {e}")
-            return False
-
     def test_connection(self) -> bool:
         """測試 Google Sheets 連線"""
         try:
@@ -4,12 +4,15 @@ Quarantine MD Files Script
 Moves problematic MD files to quarantine directory
 
 DEFAULT BEHAVIOR (no flags):
-  - CSV-based detection: Uses factset_detailed_report_latest.csv
+  - Index-based detection: Uses cache/process/md_corpus_index.* (written by
+    process_cli.py process / generate-csv), CSV report if the index is missing
   - Checks ONLY: quality_score >= 7.6 AND missing revenue/EPS data (truly inflated)
   - Does NOT check: age, low quality (unless --days or --max-quality added)
 
 Detection Methods:
-  1. CSV-based (RECOMMENDED, default): Fast, uses factset_detailed_report_latest.csv
+  0. Index-based (default): Column filters over the corpus index, same criteria as CSV
+     - Files changed since the index was built are checked file-based
+  1. CSV-based (--no-index): Fast, uses factset_detailed_report_latest.csv
      - Criteria: quality_score >= 7.6 AND missing revenue/EPS data
      - Files with high quality AND actual data are NOT flagged (legitimate)
   2. File-based (--no-csv): Direct MD file parsing
@@ -22,6 +25,7 @@ OPTIONAL Filters (must explicitly add):
 Usage:
     python quarantine_files.py                        # CSV: inflated quality ONLY
     python quarantine_files.py --quarantine           # Actually move files
+    python quarantine_files.py --no-index             # CSV report instead of corpus index
     python quarantine_files.py --no-csv               # File-based: inflated + inconsistent
     python quarantine_files.py --days 90              # ADD age filter (>90 days)
     python quarantine_files.py --max-quality 5        # ADD quality filter (≤5)
@@ -359,6 +363,81 @@ class OldFileQuarantiner:
             reasons.append("low_quality")
         return reasons
 
+    def scan_from_index(self) -> List[Dict]:
+        """
+        Index-based detection (default): column filters over the corpus index
+
+        Same criteria as scan_from_csv (report rows only, quality >= 7.5 AND missing
+        revenue OR EPS; optional low quality), plus the --days age filter on md_date.
+        Files added or changed after the index was built are checked file-based.
+        """
+        try:
+            import pandas as pd
+            if 'process_group' not in sys.path:
+                sys.path.insert(0, 'process_group')
+            from corpus_index import CorpusIndex
+        except ImportError as e:
+            print(f"[WARNING] Corpus index unavailable ({e})")
+            return self.scan_from_csv()
+
+        df, stale_files = CorpusIndex.load_fresh(str(self.data_dir))
+        if df is None:
+            print("[WARNING] Corpus index not found (run: python process_group/process_cli.py generate-csv)")
+            print("[INFO] Falling back to CSV-based detection...")
+            return self.scan_from_csv()
+
+        print(f"[INFO] Using index-based detection: {len(df)} indexed files")
+        print(f"[INFO] Criteria: quality_score >= 7.5 AND (missing revenue OR missing EPS)\n")
+
+        in_report = df['in_report'].astype(bool)
+        quality = df['quality_score'].fillna(-1.0)
+        md_dates = pd.to_datetime(df['md_date'], format='%Y-%m-%d', errors='coerce')
+
+        high_quality = in_report & (quality >= 7.5)
+        inflated = high_quality & ~CorpusIndex.has_revenue_and_eps(df)
+        low_quality = in_report & (quality <= self.max_quality) if self.max_quality is not None else pd.Series(False, index=df.index)
+        old = md_dates.notna() & (md_dates < self.cutoff_date) if self.cutoff_date is not None else pd.Series(False, index=df.index)
+
+        print(f"[INFO] Found {int(high_quality.sum())} files with quality >= 7.5")
+        print(f"[INFO] Of these, {int(inflated.sum())} have missing data (truly inflated)")
+        print(f"[INFO] Skipping {int(high_quality.sum() - inflated.sum())} files with legitimate high quality\n")
+        if self.max_quality is not None:
+            print(f"[INFO] Found {int(low_quality.sum())} files with quality <= {self.max_quality} (low quality)\n")
+        if self.cutoff_date is not None:
+            print(f"[INFO] Found {int(old.sum())} files older than {self.days_threshold} days\n")
+
+        mask = inflated | low_quality | old
+        flagged = df[mask].assign(
+            is_inflated=inflated[mask], is_low_quality=low_quality[mask], is_old=old[mask], md_datetime=md_dates[mask]
+        )
+
+        now = datetime.now()
+        results = []
+        for row in flagged.itertuples(index=False):
+            reasons = [reason for reason, hit in (('inflated_quality', row.is_inflated),
+                                                  ('low_quality', row.is_low_quality),
+                                                  ('old', row.is_old)) if hit]
+            date_obj = row.md_datetime.to_pydatetime() if pd.notna(row.md_datetime) else now
+            results.append({
+                'filepath': self.data_dir / row.filename,
+                'filename': row.filename,
+                'stock_code': row.company_code,
+                'company_name': row.company_name,
+                'md_date': date_obj.strftime('%Y/%m/%d'),
+                'date_obj': date_obj,
+                'age_days': (now - date_obj).days,
+                'quality_score': row.quality_score,
+                'has_data': not row.is_inflated,
+                'reasons': reasons
+            })
+
+        if stale_files:
+            print(f"[INFO] {len(stale_files)} files changed since the index was built, checking them file-based")
+            results.extend(self.scan_old_files([self.data_dir / name for name in stale_files]))
+
+        print(f"[INFO] Index scan completed. Found {len(results)} files to quarantine\n")
+        return results
+
     def scan_from_csv(self, csv_path: str = 'data/reports/factset_detailed_report_latest.csv') -> List[Dict]:
         """
         CSV-based detection (RECOMMENDED): Much faster and more reliable
@@ -533,15 +612,16 @@ class OldFileQuarantiner:
         print(f"[INFO] CSV scan completed. Found {len(results)} files to quarantine\n")
         return results
 
-    def scan_old_files(self) -> List[Dict]:
+    def scan_old_files(self, md_files: List[Path] = None) -> List[Dict]:
         """
         File-based detection: Scans MD files directly (slower but works without CSV)
 
-        For better performance and reliability, use scan_from_csv() instead.
+        For better performance and reliability, use scan_from_index() instead.
         """
         results = []
 
-        md_files = list(self.data_dir.glob("*.md"))
+        if md_files is None:
+            md_files = list(self.data_dir.glob("*.md"))
         total_files = len(md_files)
         print(f"[INFO] Scanning {total_files} MD files...\n")
 
@@ -732,11 +812,11 @@ def main():
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 DEFAULT BEHAVIOR (no flags):
-  python quarantine_files.py                 # CSV-based: truly inflated quality ONLY
+  python quarantine_files.py                 # Index-based: truly inflated quality ONLY
 
   What it checks:
   - Inflated quality scores (score >= 7.5 BUT missing revenue OR missing EPS)
-  - Source: data/reports/factset_detailed_report_latest.csv
+  - Source: cache/process/md_corpus_index.* (factset_detailed_report_latest.csv if missing)
   - Files with high quality AND both revenue+EPS are skipped (legitimate)
 
   What it does NOT check (unless explicitly added):
@@ -746,6 +826,7 @@ DEFAULT BEHAVIOR (no flags):
 Examples:
   python quarantine_files.py                 # Dry-run: Check truly inflated quality
   python quarantine_files.py --quarantine    # Move files: truly inflated quality
+  python quarantine_files.py --no-index      # CSV report instead of corpus index
   python quarantine_files.py --no-csv        # File-based: inflated + inconsistent
   python quarantine_files.py --days 60       # CSV + ADD age filter (>60 days)
   python quarantine_files.py --max-quality 5 # CSV + ADD quality filter (≤5)
@@ -762,6 +843,8 @@ CSV-based detection (DEFAULT):
 
     parser.add_argument('--quarantine', action='store_true',
                        help='Actually move files to quarantine (default: report only)')
+    parser.add_argument('--no-index', action='store_true',
+                       help='Use the CSV report instead of the corpus index')
     parser.add_argument('--no-csv', action='store_true',
                        help='Use file-based detection instead of CSV (slower)')
     parser.add_argument('--days', type=int, default=None,
@@ -787,8 +870,10 @@ CSV-based detection (DEFAULT):
     if args.no_csv:
         print("[INFO] Using file-based detection (--no-csv flag)\n")
         results = quarantiner.scan_old_files()
-    else:
+    elif args.no_index:
         results = quarantiner.scan_from_csv()
+    else:
+        results = quarantiner.scan_from_index()
 
     # Generate report
     report = quarantiner.generate_report(results)
@@ -15,14 +15,22 @@ v3.5.1 ENHANCEMENTS:
 
 import os
 import time
+import asyncio
+import sqlite3
+import zlib
 import json
 import hashlib
 import logging
 import random
-from datetime import datetime, timedelta
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Union, Tuple
 
+from quota_ledger import QuotaLedger
+
 try:
     from googleapiclient.discovery import build
     from googleapiclient.errors import HttpError
@@ -49,14 +57,20 @@ class SearchAPIException(Exception):
 class APIKeyManager:
     """Manages multiple Google API keys and automatic rotation"""
     
-    def __init__(self, api_keys: List[str], cse_ids: List[str]):
+    def __init__(self, api_keys: List[str], cse_ids: List[str],
+                 ledger: Optional[QuotaLedger] = None, partition: Optional[Tuple[int, int]] = None):
         self.api_keys = api_keys
         self.cse_ids = cse_ids
-        # Randomize starting key to distribute load across all keys
-        # This prevents Batch 1-4 from all hammering Key #1 simultaneously
-        self.current_key_index = random.randint(0, len(api_keys) - 1)
+        self.key_ids = [QuotaLedger.key_id(key) for key in api_keys]
+        self.ledger = ledger
         self.exhausted_keys = set()
         self.key_stats = {}
+        # Concurrent company pipelines share one key manager
+        self._lock = threading.RLock()
+        
+        # Keys this batch prefers (partition = (batch, total_batches)), so parallel
+        # batch jobs draw on disjoint keys until their own keys run out
+        self.preferred_keys = self._partition_keys(partition)
         
         # Initialize stats for each key
         for i, key in enumerate(api_keys):
@@ -74,6 +88,48 @@ class APIKeyManager:
         # Validate we have at least one key
         if not api_keys or not any(key.strip() for key in api_keys):
             raise ValueError("At least one valid API key is required")
+        
+        # Keys already used up today (per ledger) are skipped without a 429 round-trip
+        if self.ledger:
+            for i, key_id in enumerate(self.key_ids):
+                if self.ledger.is_exhausted(key_id):
+                    self.exhausted_keys.add(i)
+                    self.key_stats[i]['is_exhausted'] = True
+            if self.exhausted_keys:
+                self.logger.info(f"Ledger: {len(self.exhausted_keys)} keys already exhausted today")
+        
+        if len(self.exhausted_keys) == len(api_keys):
+            # Let the first call surface the exhaustion through the normal path
+            self.current_key_index = random.randint(0, len(api_keys) - 1)
+        else:
+            self.current_key_index = self._select_key()
+    
+    def _partition_keys(self, partition: Optional[Tuple[int, int]]) -> List[int]:
+        """Key indices preferred by batch `partition[0]` of `partition[1]`"""
+        if not partition:
+            return list(range(len(self.api_keys)))
+        batch, total = partition
+        keys = [i for i in range(len(self.api_keys)) if i % total == (batch - 1) % total]
+        # More batches than keys: share keys round-robin
+        return keys or [(batch - 1) % len(self.api_keys)]
+    
+    def _select_key(self) -> int:
+        """Next key: preferred keys first, then any; most remaining quota per ledger"""
+        available = [i for i in range(len(self.api_keys)) if i not in self.exhausted_keys]
+        preferred = [i for i in self.preferred_keys if i in available]
+        
+        for candidates in (preferred, available):
+            if not candidates:
+                continue
+            if self.ledger:
+                best = self.ledger.best_key(self.key_ids, candidates)
+                if best is not None:
+                    return best
+            else:
+                # Randomize within candidates to distribute load across keys
+                return random.choice(candidates)
+        
+        return available[0]
     
     def get_current_credentials(self) -> Tuple[str, str]:
         """Get current API key and CSE ID"""
@@ -85,9 +141,23 @@ class APIKeyManager:
         
         return api_key, cse_id
     
-    def mark_key_exhausted(self, error_details: str = ""):
-        """Mark current key as exhausted and rotate to next"""
+    def mark_key_exhausted(self, error_details: str = "", key_index: Optional[int] = None) -> bool:
+        """Mark current key as exhausted and rotate to next
+        
+        key_index: the key the failing call used; if another pipeline already
+        rotated away from it, nothing more is exhausted and False is returned.
+        """
+        with self._lock:
+            if key_index is not None and key_index != self.current_key_index:
+                self.logger.info(f"Key {key_index + 1} already rotated out, using key {self.current_key_index + 1}")
+                return False
+            self._mark_current_key_exhausted(error_details)
+            return True
+    
+    def _mark_current_key_exhausted(self, error_details: str):
         self.exhausted_keys.add(self.current_key_index)
+        if self.ledger:
+            self.ledger.record_exhausted(self.key_ids[self.current_key_index])
         self.key_stats[self.current_key_index].update({
             'quota_exceeded_at': datetime.now().isoformat(),
             'is_exhausted': True,
@@ -107,20 +177,22 @@ class APIKeyManager:
                 f"Please wait for quota reset or add more keys."
             )
         
-        self.current_key_index = available_keys[0]
+        self.current_key_index = self._select_key()
         self.logger.info(f"Rotated from key {old_index + 1} to key {self.current_key_index + 1}")
         self.logger.info(f"Remaining keys: {len(available_keys)}")
     
     def record_successful_call(self):
         """Record a successful API call"""
-        self.key_stats[self.current_key_index].update({
-            'calls_made': self.key_stats[self.current_key_index]['calls_made'] + 1,
-            'last_used': datetime.now().isoformat()
-        })
+        with self._lock:
+            self.key_stats[self.current_key_index].update({
+                'calls_made': self.key_stats[self.current_key_index]['calls_made'] + 1,
+                'last_used': datetime.now().isoformat()
+            })
     
     def record_error(self):
         """Record an API error"""
-        self.key_stats[self.current_key_index]['total_errors'] += 1
+        with self._lock:
+            self.key_stats[self.current_key_index]['total_errors'] += 1
     
     def get_status_summary(self) -> Dict[str, Any]:
         """Get comprehensive status of all API keys"""
@@ -136,6 +208,7 @@ class APIKeyManager:
         
         for i, key in enumerate(self.api_keys):
             stats = self.key_stats[i]
+            today = self.ledger.get_today(self.key_ids[i]) if self.ledger else {}
             key_summary = {
                 'key_number': i + 1,
                 'api_key_preview': f"{key[:10]}...{key[-4:]}" if len(key) > 14 else key,
@@ -144,148 +217,348 @@ class APIKeyManager:
                 'is_exhausted': stats['is_exhausted'],
                 'is_current': i == self.current_key_index,
                 'quota_exceeded_at': stats['quota_exceeded_at'],
-                'last_used': stats['last_used']
+                'last_used': stats['last_used'],
+                'calls_today': today.get('calls'),
+                'remaining_today': today.get('remaining'),
+                'preferred': i in self.preferred_keys
             }
             summary['key_details'].append(key_summary)
         
         return summary
 
+class DailyBudgetExceeded(QuotaExceededException):
+    """Local per-key daily budget used up (rotate to another key)"""
+    pass
+
 class RateLimiter:
-    """Intelligent rate limiting for Google Search API with key rotation support"""
+    """Per-key token-bucket rate limiting for Google Search API
+    
+    - Each API key has its own bucket: calls_per_second refill, `burst` capacity
+    - Each API key has its own daily budget (calls_per_day), counted in the
+      shared QuotaLedger
+    - Bucket state lives in a small SQLite file, so parallel batch processes on
+      the same machine share one bucket per key; threads share it too
+    - reserve() never sleeps (usable from asyncio); wait_if_needed() sleeps
+      only for the time the bucket actually requires
+    """
     
-    def __init__(self, calls_per_second: float = 1.0, calls_per_day: int = 100):
+    DEFAULT_STATE_PATH = os.path.join('cache', 'search', 'rate_limits.sqlite3')
+    
+    def __init__(self, calls_per_second: float = 1.0, calls_per_day: int = 100, burst: int = 1,
+                 state_path: Optional[str] = None, ledger: Optional[QuotaLedger] = None):
         self.calls_per_second = calls_per_second
         self.calls_per_day = calls_per_day
-        self.last_call_time = 0
-        self.daily_calls = 0
-        self.daily_reset_time = 0
-        
-        # Initialize daily reset time
-        self._reset_daily_counter()
+        self.burst = max(1, burst)
+        self.state_path = state_path or self.DEFAULT_STATE_PATH
+        self.ledger = ledger or QuotaLedger(
+            os.path.join(os.path.dirname(self.state_path), 'quota_ledger.sqlite3'), calls_per_day
+        )
+        self._lock = threading.Lock()
+        
+        state_dir = os.path.dirname(self.state_path)
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+        
+        # isolation_level=None: transactions are managed explicitly (BEGIN IMMEDIATE
+        # takes the cross-process write lock for the whole read-modify-write)
+        self._conn = sqlite3.connect(self.state_path, timeout=30, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS token_buckets (
+                key_id TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
         
         self.logger = logging.getLogger('rate_limiter')
-        self.logger.info(f"Rate limiter initialized: {calls_per_second} calls/sec, {calls_per_day} calls/day")
-        
-    def _reset_daily_counter(self):
-        """Reset daily counter at midnight"""
-        now = datetime.now()
-        tomorrow = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
-        self.daily_reset_time = tomorrow.timestamp()
-        self.daily_calls = 0
-        
-    def wait_if_needed(self):
-        """Wait if necessary to respect rate limits"""
-        now = time.time()
-        
-        # Check daily reset
-        if now >= self.daily_reset_time:
-            self._reset_daily_counter()
-            self.logger.info("Daily quota reset")
-        
-        # Check rate limiting (but not daily quota - let key rotation handle that)
-        time_since_last = now - self.last_call_time
-        min_interval = 1.0 / self.calls_per_second
-        
-        if time_since_last < min_interval:
-            sleep_time = min_interval - time_since_last
-            self.logger.debug(f"Rate limiting: sleeping {sleep_time:.2f}s")
-            time.sleep(sleep_time)
-        
-        self.last_call_time = time.time()
-        self.daily_calls += 1
+        self.logger.info(f"Rate limiter initialized: {calls_per_second} calls/sec (burst {self.burst}), "
+                         f"{calls_per_day} calls/day per key, state {self.state_path}")
+    
+    @staticmethod
+    def key_id(api_key: str) -> str:
+        """Stable, non-secret identifier for an API key"""
+        return QuotaLedger.key_id(api_key)
+    
+    def _update_bucket(self, key_id: str, update) -> float:
+        """Apply update(tokens_after_refill) -> new tokens under the cross-process lock"""
+        with self._lock:
+            now = time.time()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated_at FROM token_buckets WHERE key_id = ?", (key_id,)
+                ).fetchone()
+                tokens, updated_at = row if row else (float(self.burst), now)
+                tokens = min(self.burst, tokens + max(0.0, now - updated_at) * self.calls_per_second)
+                tokens = update(tokens)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO token_buckets (key_id, tokens, updated_at) VALUES (?, ?, ?)",
+                    (key_id, tokens, now)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return tokens
+    
+    def reserve(self, key_id: str = 'default') -> float:
+        """Take one token for key_id; returns seconds to wait before calling
+        
+        Raises DailyBudgetExceeded when the key's daily budget is used up.
+        A negative token balance is a reservation that later callers queue behind.
+        """
+        if not self.ledger.try_consume(key_id, self.calls_per_day):
+            raise DailyBudgetExceeded(
+                f"Daily budget of {self.calls_per_day} calls used for key {key_id}"
+            )
         
-        # Log progress but don't enforce daily limit (key rotation handles this)
-        self.logger.debug(f"API call #{self.daily_calls}")
+        tokens = self._update_bucket(key_id, lambda tokens: tokens - 1)
+        return -tokens / self.calls_per_second if tokens < 0 else 0.0
+    
+    def wait_if_needed(self, key_id: str = 'default') -> float:
+        """Reserve a token and sleep only as long as the bucket requires"""
+        wait_seconds = self.reserve(key_id)
+        if wait_seconds > 0:
+            self.logger.debug(f"Rate limiting key {key_id}: sleeping {wait_seconds:.2f}s")
+            time.sleep(wait_seconds)
+        return wait_seconds
+    
+    async def wait_async(self, key_id: str = 'default') -> float:
+        """asyncio variant of wait_if_needed"""
+        wait_seconds = self.reserve(key_id)
+        if wait_seconds > 0:
+            await asyncio.sleep(wait_seconds)
+        return wait_seconds
+    
+    def penalize(self, key_id: str, seconds: float):
+        """Push the key's bucket into debt (server asked us to back off);
+        every thread and process using the key waits it out on its next call"""
+        self._update_bucket(key_id, lambda tokens: min(tokens, -seconds * self.calls_per_second))
+    
+    def remaining_today(self, key_id: str) -> Optional[int]:
+        """Calls left in the key's daily budget (None = unlimited)"""
+        return self.ledger.get_today(key_id)['remaining']
 
 class SearchCache:
-    """Simple file-based search result cache"""
+    """Search result cache: bounded in-memory LRU in front of one compact SQLite store
+    
+    - Entries expire after max_age_hours (TTL checked on read, purged by one DELETE)
+    - The store is kept under max_size_mb by evicting least-recently-used entries
+    - Startup runs two SQL statements instead of scanning the cache directory
+    - Hit/miss/eviction metrics are reported to APIStats
+    """
+    
+    DB_NAME = 'search_cache.sqlite3'
     
-    def __init__(self, cache_dir: str = 'cache/search/', max_age_hours: int = 24):
+    def __init__(self, cache_dir: str = 'cache/search/', max_age_hours: int = 24,
+                 max_size_mb: float = 100, memory_entries: int = 512,
+                 stats: Optional['APIStats'] = None):
         self.cache_dir = Path(cache_dir)
         self.max_age = max_age_hours * 3600
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.memory_entries = max(0, memory_entries)
+        self.stats = stats
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self._conn = sqlite3.connect(str(self.cache_dir / self.DB_NAME), timeout=30,
+                                     check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS search_cache (
+                query_hash TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                cached_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL,
+                data BLOB NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_search_cache_access ON search_cache (last_access)")
+        self._conn.commit()
+        
         self.logger = logging.getLogger('search_cache')
-        self.logger.info(f"Cache initialized: {cache_dir}, max age {max_age_hours}h")
+        self.logger.info(f"Cache initialized: {cache_dir}, max age {max_age_hours}h, max size {max_size_mb}MB")
+        
+        # New store (user_version 0): the per-query JSON files it replaced are never read again
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] == 0:
+            self._remove_legacy_json()
+            self._conn.execute("PRAGMA user_version = 1")
+            self._conn.commit()
         
-        # Clean old cache files on startup
+        # Clean old cache entries on startup
         self._clean_old_cache()
+        self._disk_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM search_cache"
+        ).fetchone()[0]
+    
+    @staticmethod
+    def _key(query: str) -> str:
+        return hashlib.md5(query.encode()).hexdigest()
+    
+    def _remove_legacy_json(self):
+        """Delete <md5>.json entries of the old file-per-query cache (progress.json etc. are kept)"""
+        removed = 0
+        for path in self.cache_dir.glob('*.json'):
+            if len(path.stem) == 32 and all(c in '0123456789abcdef' for c in path.stem):
+                try:
+                    path.unlink()
+                    removed += 1
+                except OSError:
+                    continue
+        if removed:
+            self.logger.info(f"Removed {removed} legacy JSON search cache files")
+    
+    def _record(self, event: str, count: int = 1):
+        if self.stats is not None:
+            self.stats.record_cache_event(event, count)
+    
+    def _remember(self, cache_key: str, cached_at: float, result: Dict[str, Any]):
+        if not self.memory_entries:
+            return
+        self._memory[cache_key] = (cached_at, result)
+        self._memory.move_to_end(cache_key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
     
     def get(self, query: str) -> Optional[Dict[str, Any]]:
         """Get cached result for query"""
-        cache_key = hashlib.md5(query.encode()).hexdigest()
-        cache_file = self.cache_dir / f"{cache_key}.json"
+        cache_key = self._key(query)
+        now = time.time()
         
-        if cache_file.exists():
-            file_age = time.time() - cache_file.stat().st_mtime
-            if file_age < self.max_age:
-                try:
-                    with open(cache_file, 'r', encoding='utf-8') as f:
-                        result = json.load(f)
-                    self.logger.debug(f"Cache hit for query: {query[:50]}...")
-                    return result
-                except Exception as e:
-                    self.logger.warning(f"Cache read error: {e}")
-                    # Remove corrupted cache file
-                    cache_file.unlink(missing_ok=True)
-            else:
-                self.logger.debug(f"Cache expired for query: {query[:50]}...")
-                cache_file.unlink(missing_ok=True)
+        with self._lock:
+            entry = self._memory.get(cache_key)
+            if entry is not None:
+                if now - entry[0] < self.max_age:
+                    self._memory.move_to_end(cache_key)
+                    self._record('memory_hits')
+                    return entry[1]
+                del self._memory[cache_key]
+            
+            try:
+                row = self._conn.execute(
+                    "SELECT cached_at, size, data FROM search_cache WHERE query_hash = ?", (cache_key,)
+                ).fetchone()
+                if row is not None:
+                    cached_at, size, blob = row
+                    if now - cached_at < self.max_age:
+                        result = json.loads(zlib.decompress(blob).decode('utf-8'))
+                        self._conn.execute(
+                            "UPDATE search_cache SET last_access = ? WHERE query_hash = ?", (now, cache_key)
+                        )
+                        self._conn.commit()
+                        self._remember(cache_key, cached_at, result)
+                        self._record('disk_hits')
+                        self.logger.debug(f"Cache hit for query: {query[:50]}...")
+                        return result
+                    
+                    self.logger.debug(f"Cache expired for query: {query[:50]}...")
+                    self._conn.execute("DELETE FROM search_cache WHERE query_hash = ?", (cache_key,))
+                    self._conn.commit()
+                    self._disk_bytes -= size
+                    self._record('expired')
+            except Exception as e:
+                self.logger.warning(f"Cache read error: {e}")
         
+        # Misses are counted by APIStats.record_api_call when the API is queried
         self.logger.debug(f"Cache miss for query: {query[:50]}...")
         return None
     
     def set(self, query: str, result: Dict[str, Any]):
         """Cache search result"""
-        cache_key = hashlib.md5(query.encode()).hexdigest()
-        cache_file = self.cache_dir / f"{cache_key}.json"
+        cache_key = self._key(query)
+        now = time.time()
+        
+        # Add cache metadata
+        cached_result = {
+            'query': query,
+            'cached_at': datetime.fromtimestamp(now).isoformat(),
+            'data': result
+        }
         
         try:
-            # Add cache metadata
-            cached_result = {
-                'query': query,
-                'cached_at': datetime.now().isoformat(),
-                'data': result
-            }
-            
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cached_result, f, ensure_ascii=False, indent=2, default=str)
-            
-            self.logger.debug(f"Cached result for query: {query[:50]}...")
-            
+            blob = zlib.compress(
+                json.dumps(cached_result, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+            )
         except Exception as e:
             self.logger.warning(f"Failed to cache result: {e}")
+            return
+        
+        with self._lock:
+            try:
+                old = self._conn.execute(
+                    "SELECT size FROM search_cache WHERE query_hash = ?", (cache_key,)
+                ).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO search_cache (query_hash, query, cached_at, last_access, size, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (cache_key, query, now, now, len(blob), blob)
+                )
+                self._conn.commit()
+                self._disk_bytes += len(blob) - (old[0] if old else 0)
+                self._remember(cache_key, now, cached_result)
+                self.logger.debug(f"Cached result for query: {query[:50]}...")
+                
+                if self.max_bytes and self._disk_bytes > self.max_bytes:
+                    self._evict_lru()
+                    
+            except Exception as e:
+                self.logger.warning(f"Failed to cache result: {e}")
+    
+    def _evict_lru(self):
+        """Evict least-recently-used entries down to 90% of max size (lock held)"""
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        rows = self._conn.execute(
+            "SELECT query_hash, size FROM search_cache ORDER BY last_access"
+        ).fetchall()
+        for cache_key, size in rows:
+            if self._disk_bytes <= target:
+                break
+            self._conn.execute("DELETE FROM search_cache WHERE query_hash = ?", (cache_key,))
+            self._memory.pop(cache_key, None)
+            self._disk_bytes -= size
+            evicted += 1
+        self._conn.commit()
+        if evicted:
+            self._record('evictions', evicted)
+            self.logger.info(f"Evicted {evicted} cache entries (size limit {self.max_bytes // (1024 * 1024)}MB)")
     
     def _clean_old_cache(self):
-        """Clean expired cache files"""
+        """Clean expired cache entries"""
         try:
-            current_time = time.time()
-            cleaned_count = 0
-            
-            for cache_file in self.cache_dir.glob("*.json"):
-                file_age = current_time - cache_file.stat().st_mtime
-                if file_age > self.max_age:
-                    cache_file.unlink(missing_ok=True)
-                    cleaned_count += 1
-            
-            if cleaned_count > 0:
-                self.logger.info(f"Cleaned {cleaned_count} expired cache files")
+            cursor = self._conn.execute(
+                "DELETE FROM search_cache WHERE cached_at < ?", (time.time() - self.max_age,)
+            )
+            self._conn.commit()
+            if cursor.rowcount > 0:
+                self._record('expired', cursor.rowcount)
+                self.logger.info(f"Cleaned {cursor.rowcount} expired cache entries")
                 
         except Exception as e:
             self.logger.warning(f"Cache cleanup error: {e}")
     
     def clear_all(self):
-        """Clear all cache files"""
-        try:
-            cleared_count = 0
-            for cache_file in self.cache_dir.glob("*.json"):
-                cache_file.unlink(missing_ok=True)
-                cleared_count += 1
-            
-            self.logger.info(f"Cleared {cleared_count} cache files")
-            
-        except Exception as e:
-            self.logger.warning(f"Cache clear error: {e}")
+        """Clear all cache entries"""
+        with self._lock:
+            try:
+                cursor = self._conn.execute("DELETE FROM search_cache")
+                self._conn.commit()
+                self._memory.clear()
+                self._disk_bytes = 0
+                self.logger.info(f"Cleared {cursor.rowcount} cache entries")
+                
+            except Exception as e:
+                self.logger.warning(f"Cache clear error: {e}")
+    
+    def get_size_bytes(self) -> int:
+        return self._disk_bytes
 
 class APIStats:
     """Track API usage statistics with key rotation support"""
@@ -301,41 +574,55 @@ class APIStats:
             'start_time': datetime.now().isoformat(),
             'last_call_time': None,
             'successful_calls': 0,
-            'failed_calls': 0
+            'failed_calls': 0,
+            # SearchCache tiers
+            'cache_memory_hits': 0,
+            'cache_disk_hits': 0,
+            'cache_expired': 0,
+            'cache_evictions': 0
         }
+        self._lock = threading.Lock()
         
         self.logger = logging.getLogger('api_stats')
         self.logger.info("API statistics tracking initialized")
     
     def record_api_call(self, results_count: int):
         """Record successful API call"""
-        self.stats['total_calls'] += 1
-        self.stats['successful_calls'] += 1
-        self.stats['cache_misses'] += 1
-        self.stats['last_call_time'] = datetime.now().isoformat()
-        self.stats['last_results_count'] = results_count
+        with self._lock:
+            self.stats['total_calls'] += 1
+            self.stats['successful_calls'] += 1
+            self.stats['cache_misses'] += 1
+            self.stats['last_call_time'] = datetime.now().isoformat()
+            self.stats['last_results_count'] = results_count
         
         self.logger.debug(f"API call recorded: {results_count} results")
     
     def record_cache_hit(self):
         """Record cache hit"""
-        self.stats['cache_hits'] += 1
+        with self._lock:
+            self.stats['cache_hits'] += 1
         self.logger.debug("Cache hit recorded")
     
+    def record_cache_event(self, event: str, count: int = 1):
+        """Record SearchCache tier event (memory_hits, disk_hits, expired, evictions)"""
+        with self._lock:
+            self.stats[f'cache_{event}'] = self.stats.get(f'cache_{event}', 0) + count
+    
     def record_error(self, error: Exception):
         """Record error"""
-        self.stats['errors'] += 1
-        self.stats['failed_calls'] += 1
-        
         error_str = str(error).lower()
-        if 'quota' in error_str or 'quotaexceeded' in error_str:
-            self.stats['quota_exceeded'] += 1
+        with self._lock:
+            self.stats['errors'] += 1
+            self.stats['failed_calls'] += 1
+            if 'quota' in error_str or 'quotaexceeded' in error_str:
+                self.stats['quota_exceeded'] += 1
             
         self.logger.warning(f"API error recorded: {error}")
     
     def record_key_rotation(self):
         """Record key rotation event"""
-        self.stats['key_rotations'] += 1
+        with self._lock:
+            self.stats['key_rotations'] += 1
         self.logger.info("Key rotation recorded")
     
     def get_summary(self) -> Dict[str, Any]:
@@ -355,6 +642,10 @@ class APIStats:
             'errors': self.stats['errors'],
             'quota_exceeded': self.stats['quota_exceeded'],
             'key_rotations': self.stats['key_rotations'],
+            'cache_memory_hits': self.stats['cache_memory_hits'],
+            'cache_disk_hits': self.stats['cache_disk_hits'],
+            'cache_expired': self.stats['cache_expired'],
+            'cache_evictions': self.stats['cache_evictions'],
             'uptime': self._calculate_uptime()
         }
     
@@ -376,20 +667,43 @@ class APIManager:
         # Load multiple API keys and CSE IDs
         api_keys, cse_ids = self._load_multiple_credentials()
         
+        cache_dir = config.get('files.cache_dir', 'cache/search/')
+        daily_quota = config.get('search.daily_quota', 100)
+        
+        # Shared per-key daily quota ledger (all threads, processes and batches)
+        self.quota_ledger = QuotaLedger(os.path.join(cache_dir, 'quota_ledger.sqlite3'), daily_quota)
+        
         # Initialize key manager
-        self.key_manager = APIKeyManager(api_keys, cse_ids)
+        self.key_manager = APIKeyManager(api_keys, cse_ids, ledger=self.quota_ledger,
+                                         partition=self._parse_partition(config.get('search.key_partition')))
         
         # Initialize components
         rate_limit = 1.0 / config.get('search.rate_limit_delay', 1.0)
-        daily_quota = config.get('search.daily_quota', 100)
-        self.rate_limiter = RateLimiter(rate_limit, daily_quota)
-        
-        cache_dir = config.get('files.cache_dir', 'cache/search/')
-        cache_hours = config.get('caching.max_age_hours', 24)
-        self.cache = SearchCache(cache_dir, cache_hours) if config.get('caching.enabled', True) else None
+        self.rate_limiter = RateLimiter(
+            rate_limit, daily_quota,
+            burst=config.get('search.rate_limit_burst', 3),
+            state_path=os.path.join(cache_dir, 'rate_limits.sqlite3'),
+            ledger=self.quota_ledger
+        )
         
         self.stats = APIStats()
         
+        cache_hours = config.get('caching.max_age_hours', 24)
+        self.cache = SearchCache(
+            cache_dir, cache_hours,
+            max_size_mb=config.get('caching.max_cache_size_mb', 100),
+            memory_entries=config.get('caching.memory_entries', 512),
+            stats=self.stats
+        ) if config.get('caching.enabled', True) else None
+        
+        # Built customsearch services, reused per key. googleapiclient services are
+        # not thread-safe, so each thread keeps its own; a key's generation is bumped
+        # to force every thread to rebuild (e.g. after an auth error)
+        self._services = threading.local()
+        self._service_generation: Dict[int, int] = {}
+        self._service_lock = threading.Lock()
+        self.service_builds = 0
+        
         # Validate API access
         if not GOOGLE_API_AVAILABLE:
             raise ImportError("Google API client not available. Install with: pip install google-api-python-client")
@@ -435,6 +749,52 @@ class APIManager:
         print(f"✅ Loaded {len(api_keys)} API keys and {len(cse_ids)} CSE IDs for rotation")
         return api_keys, cse_ids
     
+    def _get_service(self, key_index: int, api_key: str):
+        """customsearch service for key_index, built once per thread and reused"""
+        services = getattr(self._services, 'by_key', None)
+        if services is None:
+            services = self._services.by_key = {}
+        
+        generation = self._service_generation.get(key_index, 0)
+        cached = services.get(key_index)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+        
+        service = build('customsearch', 'v1', developerKey=api_key, cache_discovery=False)
+        services[key_index] = (generation, service)
+        with self._service_lock:
+            self.service_builds += 1
+        self.logger.debug(f"Built customsearch service for key {key_index + 1}")
+        return service
+    
+    def _invalidate_service(self, key_index: int):
+        """Force all threads to rebuild the service for key_index"""
+        with self._service_lock:
+            self._service_generation[key_index] = self._service_generation.get(key_index, 0) + 1
+    
+    @staticmethod
+    def _parse_partition(value: Optional[str]) -> Optional[Tuple[int, int]]:
+        """Parse "batch/total" (e.g. "2/4") into (2, 4)"""
+        if not value:
+            return None
+        try:
+            batch, total = (int(part) for part in str(value).split('/'))
+            if total > 0 and 1 <= batch <= total:
+                return batch, total
+        except ValueError:
+            pass
+        print(f"⚠️ Ignoring invalid key partition '{value}' (expected batch/total, e.g. 2/4)")
+        return None
+    
+    def get_quota_plan(self, planned_calls: int) -> Dict[str, Any]:
+        """Compare the calls a run needs with the quota left today across all keys"""
+        remaining = self.quota_ledger.remaining_total(self.key_manager.key_ids)
+        return {
+            'planned_calls': planned_calls,
+            'remaining_calls': remaining,
+            'sufficient': remaining is None or remaining >= planned_calls
+        }
+    
     def validate_api_access(self) -> bool:
         """Validate API credentials"""
         try:
@@ -484,23 +844,21 @@ class APIManager:
         optimized_query = self._optimize_query(query)
         self.logger.debug(f"Optimized query: {optimized_query}")
         
-        # Rate limiting protection
-        try:
-            self.rate_limiter.wait_if_needed()
-        except QuotaExceededException as e:
-            self.stats.record_error(e)
-            raise
-        
         # Retry logic with automatic key rotation
         max_retries = min(3, self.key_manager.get_status_summary()['available_keys'])
         
         for attempt in range(max_retries):
             try:
                 # Get current credentials
+                key_index = self.key_manager.current_key_index
                 api_key, cse_id = self.key_manager.get_current_credentials()
+                key_id = RateLimiter.key_id(api_key)
+                
+                # Rate limiting protection (per-key bucket and daily budget)
+                self.rate_limiter.wait_if_needed(key_id)
                 
-                # Execute API call
-                service = build('customsearch', 'v1', developerKey=api_key)
+                # Execute API call (service reused across queries for this key)
+                service = self._get_service(key_index, api_key)
                 
                 search_params = {
                     'q': optimized_query,
@@ -535,6 +893,18 @@ class APIManager:
                 
                 return processed_result
                 
+            except DailyBudgetExceeded as e:
+                # Local daily budget for this key is used up - rotate without calling Google
+                self.stats.record_error(e)
+                self.logger.warning(f"{e}, attempting rotation...")
+                try:
+                    if self.key_manager.mark_key_exhausted(str(e), key_index=key_index):
+                        self.stats.record_key_rotation()
+                    continue
+                except AllKeysExhaustedException as all_keys_error:
+                    self.logger.error("All API keys exhausted!")
+                    raise QuotaExceededException(str(all_keys_error))
+                
             except Exception as e:
                 self.stats.record_error(e)
                 self.key_manager.record_error()
@@ -549,8 +919,8 @@ class APIManager:
                         
                         try:
                             # Mark current key as exhausted and rotate
-                            self.key_manager.mark_key_exhausted(str(e))
-                            self.stats.record_key_rotation()
+                            if self.key_manager.mark_key_exhausted(str(e), key_index=key_index):
+                                self.stats.record_key_rotation()
                             
                             # Continue to next attempt with new key
                             self.logger.info(f"Retrying with key {self.key_manager.current_key_index + 1} (attempt {attempt + 1}/{max_retries})")
@@ -562,9 +932,16 @@ class APIManager:
                     
                     elif 'rateLimitExceeded' in str(e):
                         self.logger.warning(f"Rate limit exceeded: {e}")
-                        self._handle_rate_limit_exceeded(e)
+                        self._handle_rate_limit_exceeded(e, key_id)
                         # Retry with same key after backoff
                         continue
+                    elif e.resp.status in (401, 403):
+                        # Auth error: drop the cached service so the retry rebuilds it
+                        self._invalidate_service(key_index)
+                        if attempt == max_retries - 1:
+                            raise SearchAPIException(f"Search API auth error: {e}")
+                        self.logger.warning(f"Auth error on key {key_index + 1}, rebuilding service: {e}")
+                        continue
                     else:
                         # Other API error
                         if attempt == max_retries - 1:  # Last attempt
@@ -588,8 +965,15 @@ class APIManager:
         # If we get here, all retries failed
         raise SearchAPIException(f"Search failed after {max_retries} attempts")
     
-    def batch_search(self, queries: List[str]) -> List[Dict[str, Any]]:
-        """Execute multiple searches with key rotation support"""
+    def batch_search(self, queries: List[str], max_workers: int = 1) -> List[Dict[str, Any]]:
+        """Execute multiple searches with key rotation support
+        
+        max_workers > 1 runs queries concurrently on pooled per-thread services;
+        the per-key rate limiter still paces the actual API calls.
+        """
+        if max_workers > 1 and len(queries) > 1:
+            return self._batch_search_concurrent(queries, max_workers)
+        
         results = []
         
         self.logger.info(f"Starting batch search for {len(queries)} queries with key rotation")
@@ -615,6 +999,34 @@ class APIManager:
         
         return results
     
+    def _batch_search_concurrent(self, queries: List[str], max_workers: int) -> List[Dict[str, Any]]:
+        """Concurrent batch search; stops submitting once quota is exhausted"""
+        self.logger.info(f"Starting concurrent batch search for {len(queries)} queries ({max_workers} workers)")
+        quota_exhausted = threading.Event()
+        
+        def run_query(query: str) -> Optional[Dict[str, Any]]:
+            if quota_exhausted.is_set():
+                return None
+            try:
+                return self.search(query)
+            except (AllKeysExhaustedException, QuotaExceededException):
+                quota_exhausted.set()
+                return None
+            except Exception as e:
+                self.logger.warning(f"Query failed: {query[:50]}... - {e}")
+                return None
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='cse-batch') as executor:
+            results = list(executor.map(run_query, queries))
+        
+        if quota_exhausted.is_set():
+            self.logger.warning("Quota exhausted during concurrent batch search; remaining queries skipped")
+        
+        successful = sum(1 for r in results if r is not None)
+        self.logger.info(f"Batch search completed: {successful}/{len(queries)} successful, "
+                         f"{self.service_builds} service builds")
+        return results
+    
     def get_key_status(self) -> Dict[str, Any]:
         """Get comprehensive key status"""
         return self.key_manager.get_status_summary()
@@ -738,12 +1150,16 @@ class APIManager:
         
         return any(term in title or term in snippet for term in financial_terms)
     
-    def _handle_rate_limit_exceeded(self, error: Union[Exception, "HttpError"]):
-        """Handle rate limit exceeded errors"""
+    def _handle_rate_limit_exceeded(self, error: Union[Exception, "HttpError"], key_id: str):
+        """Handle rate limit exceeded errors
+        
+        The key's bucket is put into debt for the backoff period; the retry (and any
+        other pipeline or process using this key) waits in the limiter.
+        """
         backoff_seconds = min(
             self.config.get('search.max_backoff_seconds', 300),
             60  # Start with 1 minute
         )
         
         self.logger.warning(f"Rate limit exceeded, backing off for {backoff_seconds}s: {error}")
-        time.sleep(backoff_seconds)
\ No newline at end of file
+        self.rate_limiter.penalize(key_id, backoff_seconds)
\ No newline at end of file
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Async Search Runner - FactSet Pipeline v3.6.0
+Run several company pipelines (search -> fetch -> validate -> save) at once.
+
+- asyncio schedules up to N companies concurrently
+- Each company pipeline runs SearchCLI.cmd_search_company in a worker thread
+  (Google API client and requests are blocking), so network waits overlap
+- Google CSE calls stay gated by the APIManager's shared token-bucket limiter
+- Page fetches share the SearchEngine's bounded PageFetcher (per-host limits)
+- Quota exhaustion stops scheduling new companies; running ones finish
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from api_manager import AllKeysExhaustedException, QuotaExceededException
+
+
+class AsyncSearchRunner:
+    """Concurrent company pipelines for SearchCLI"""
+
+    def __init__(self, cli, concurrency: int = 4):
+        self.cli = cli
+        self.concurrency = max(1, int(concurrency))
+        self.stats = {
+            'scheduled': 0,
+            'successful': 0,
+            'failed': 0,
+            'skipped_after_abort': 0
+        }
+
+    def run(self, companies: List[Dict[str, str]], result_count: str = '1',
+            min_quality: Optional[int] = None) -> int:
+        """Search companies concurrently; returns number of successful companies"""
+        start_time = time.time()
+        asyncio.run(self._run_all(companies, result_count, min_quality))
+        elapsed = time.time() - start_time
+
+        print(f"\n⚡ Async search: {self.stats['successful']}/{len(companies)} successful, "
+              f"{self.stats['failed']} failed in {elapsed:.0f}s (concurrency {self.concurrency})")
+        if self.stats['skipped_after_abort']:
+            print(f"🛑 {self.stats['skipped_after_abort']} companies not started after quota exhaustion")
+        return self.stats['successful']
+
+    async def _run_all(self, companies: List[Dict[str, str]], result_count: str,
+                       min_quality: Optional[int]):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        abort = asyncio.Event()
+        total = len(companies)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency,
+                                thread_name_prefix='company-pipeline') as executor:
+            tasks = [
+                self._run_company(executor, semaphore, abort, i, total, company,
+                                  result_count, min_quality)
+                for i, company in enumerate(companies, 1)
+            ]
+            await asyncio.gather(*tasks)
+
+    async def _run_company(self, executor: ThreadPoolExecutor, semaphore: asyncio.Semaphore,
+                           abort: asyncio.Event, index: int, total: int, company: Dict[str, str],
+                           result_count: str, min_quality: Optional[int]):
+        symbol = company['symbol']
+        name = company.get('name', '')
+
+        async with semaphore:
+            if abort.is_set():
+                self.stats['skipped_after_abort'] += 1
+                return
+
+            self.stats['scheduled'] += 1
+            print(f"\n[{index}/{total}] 🔍 Comprehensive Search: {symbol} {name}...")
+            self.cli.logger.info(f"[{index}/{total}] Starting comprehensive search for {symbol} {name}...")
+
+            loop = asyncio.get_running_loop()
+            try:
+                success = await loop.run_in_executor(
+                    executor, self.cli.cmd_search_company, symbol, result_count, min_quality
+                )
+                if success:
+                    self.stats['successful'] += 1
+                else:
+                    self.stats['failed'] += 1
+
+            except (AllKeysExhaustedException, QuotaExceededException) as e:
+                self.stats['failed'] += 1
+                if not abort.is_set():
+                    print(f"🛑 Critical API Error: {e}")
+                    self.cli.logger.critical(f"Aborting async search: {e}")
+                abort.set()
+
+            except Exception as e:
+                self.stats['failed'] += 1
+                print(f"❌ {symbol} failed: {e}")
+                self.cli.logger.error(f"❌ {symbol} failed: {e}")
+                with self.cli._state_lock:
+                    self.cli._record_failure(symbol, str(e))
+
+                if "exhausted" in str(e).lower() or "quota" in str(e).lower():
+                    print("🛑 Detected quota exhaustion in error message. Aborting.")
+                    abort.set()
@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Company Matcher - FactSet Pipeline v3.6.0
+Watchlist-wide content validation from a single pass over each page.
+
+- One Aho-Corasick automaton over every watchlist code and name (lowercased),
+  built once at startup; a page is scanned once for all companies
+- `(XXXX-TW)` tags are read off the code hits (optional parentheses and the
+  `[-\\s]*tw` suffix), so they need no second pass
+- The multi-layer checks of SearchEngine._validate_content run on the
+  per-company occurrence lists; the proximity layer is a linear two-pointer
+  merge instead of a symbol x name nested loop
+- The same scan tells which other watchlist companies an article covers
+"""
+
+import re
+import csv
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+TITLE_PATTERN = re.compile(r'<title>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+OG_TITLE_PATTERN = re.compile(r'<meta\s+property=["\']og:title["\']\s+content=["\'](.*?)["\']', re.IGNORECASE)
+TITLE_CODE_PATTERN = re.compile(r'\((\d{4})[-\s]*tw\)')
+TW_SUFFIX_PATTERN = re.compile(r'[-\s]*tw')
+DIGIT_PATTERN = re.compile(r'\d')
+
+PROXIMITY_THRESHOLD = 200  # characters
+NAME_BEFORE_TAG_GAP = 20   # 聯發科...2454-TW
+
+
+class AhoCorasick:
+    """Multi-pattern substring automaton (all, overlapping matches)"""
+
+    def __init__(self, words: List[str]):
+        self.words = words
+        self.lengths = [len(word) for word in words]
+        goto: List[Dict[str, int]] = [{}]
+        out: List[List[int]] = [[]]
+        for word_id, word in enumerate(words):
+            state = 0
+            for ch in word:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append([])
+                state = nxt
+            out[state].append(word_id)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                fallback = fail[state]
+                while fallback and ch not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[nxt] = goto[fallback].get(ch, 0)
+                out[nxt].extend(out[fail[nxt]])
+
+        self._goto = goto
+        self._fail = fail
+        self._out = [tuple(ids) for ids in out]
+        # From the root, jump straight to the next character that can start a word
+        first_chars = ''.join(sorted(goto[0]))
+        self._next_start = re.compile('[' + re.escape(first_chars) + ']').search if first_chars else None
+
+    def find_all(self, text: str) -> List[Tuple[int, int]]:
+        """[(start, word_id), ...] in order of match end"""
+        matches: List[Tuple[int, int]] = []
+        if self._next_start is None:
+            return matches
+        goto, fail, out, lengths = self._goto, self._fail, self._out, self.lengths
+        next_start = self._next_start
+        state = 0
+        i = 0
+        n = len(text)
+        while i < n:
+            if not state:
+                found = next_start(text, i)
+                if found is None:
+                    break
+                i = found.start()
+            ch = text[i]
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for word_id in out[state]:
+                matches.append((i - lengths[word_id] + 1, word_id))
+            i += 1
+        return matches
+
+
+class PageScan:
+    """One page, scanned once: lowercased text, title codes and every code/name occurrence"""
+
+    def __init__(self, text: str, title_text: str, hits: Dict[str, List[int]]):
+        self.text = text
+        self.title_text = title_text
+        self.title_codes = TITLE_CODE_PATTERN.findall(title_text) if title_text else []
+        self.hits = hits          # lowercased token -> sorted start positions (overlapping)
+        self._close_parens: Optional[List[int]] = None
+
+    def positions(self, token: str) -> List[int]:
+        return self.hits.get(token, [])
+
+    @property
+    def close_parens(self) -> List[int]:
+        if self._close_parens is None:
+            self._close_parens = [match.start() for match in re.finditer(r'\)', self.text)]
+        return self._close_parens
+
+    def no_close_paren(self, start: int, end: int) -> bool:
+        """No ')' in text[start:end] (the `[^\\)]*` gaps of the combined patterns)"""
+        close_parens = self.close_parens
+        index = bisect_left(close_parens, start)
+        return index == len(close_parens) or close_parens[index] >= end
+
+
+class CompanyMatcher:
+    """Watchlist automaton + multi-layer validation on a single page scan"""
+
+    def __init__(self, companies: Iterable[Tuple[str, str]] = ()):
+        self._lock = threading.Lock()
+        self._companies: Dict[str, str] = {}
+        self._automaton: Optional[AhoCorasick] = None
+        for symbol, name in companies:
+            self._companies[str(symbol).strip()] = str(name).strip()
+
+    @classmethod
+    def from_watchlist_csv(cls, csv_path: str) -> 'CompanyMatcher':
+        """Load 代號/名稱 from StockID_TWSE_TPEX.csv (empty matcher if missing)"""
+        companies = []
+        if csv_path and os.path.exists(csv_path):
+            with open(csv_path, 'r', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    symbol = (row.get('代號') or '').strip()
+                    if symbol:
+                        companies.append((symbol, (row.get('名稱') or '').strip()))
+        return cls(companies)
+
+    @property
+    def companies(self) -> Dict[str, str]:
+        return dict(self._companies)
+
+    def has_company(self, symbol: str) -> bool:
+        return str(symbol).strip() in self._companies
+
+    def add_company(self, symbol: str, name: str):
+        """Make sure a (possibly non-watchlist) company is part of the automaton"""
+        symbol, name = str(symbol).strip(), str(name).strip()
+        with self._lock:
+            if self._companies.get(symbol) != name:
+                self._companies[symbol] = name
+                self._automaton = None
+
+    def _get_automaton(self) -> AhoCorasick:
+        with self._lock:
+            if self._automaton is None:
+                tokens = set()
+                for symbol, name in self._companies.items():
+                    if symbol:
+                        tokens.add(symbol.lower())
+                    if name:
+                        tokens.add(name.lower())
+                self._automaton = AhoCorasick(sorted(tokens))
+            return self._automaton
+
+    # -- scanning ----------------------------------------------------------
+
+    def scan(self, content: str) -> PageScan:
+        """Lowercase the page and find every code and name in one pass"""
+        text = content.lower()
+
+        # Title from the raw page (og:title wins over <title>)
+        title_text = ""
+        title_match = TITLE_PATTERN.search(content)
+        if title_match:
+            title_text = title_match.group(1).lower()
+        meta_title_match = OG_TITLE_PATTERN.search(content)
+        if meta_title_match:
+            title_text = meta_title_match.group(1).lower()
+
+        automaton = self._get_automaton()
+        hits: Dict[str, List[int]] = {}
+        for start, word_id in automaton.find_all(text):
+            hits.setdefault(automaton.words[word_id], []).append(start)
+        for positions in hits.values():
+            positions.sort()
+        return PageScan(text, title_text, hits)
+
+    def covered_companies(self, scan: PageScan) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """Every company this page validly covers: [(symbol, name, validation_result)]"""
+        covered = []
+        for symbol, name in self._companies.items():
+            # Every layer needs the code somewhere on the page
+            if not scan.positions(symbol.lower()):
+                continue
+            result = self.validate(scan, symbol, name)
+            if result.get('is_valid'):
+                covered.append((symbol, name, result))
+        return covered
+
+    # -- validation ----------------------------------------------------------
+
+    def validate(self, scan: PageScan, symbol: str, name: str) -> Dict[str, Any]:
+        """Multi-Layer Validation with title check, combined patterns, and proximity - v3.6.0"""
+        try:
+            text = scan.text
+            symbol_lower = symbol.lower()
+            name_lower = name.lower()
+
+            # LAYER 1: title mentions a DIFFERENT company code in format (XXXX-TW)
+            if scan.title_codes and symbol not in scan.title_codes:
+                wrong_symbol = scan.title_codes[0]
+                return {
+                    'is_valid': False,
+                    'reason': f"Title mentions different company ({wrong_symbol}-TW) instead of {symbol}",
+                    'confidence': 0,
+                    'symbol_found': False,
+                    'name_found': False,
+                    'false_positive': True,
+                    'validation_layer': 'title_check'
+                }
+
+            symbol_positions = scan.positions(symbol_lower) if symbol_lower else []
+            name_positions = scan.positions(name_lower) if name_lower else []
+
+            # LAYER 2: symbol and name together in a common pattern
+            if self._has_combined_match(scan, symbol_lower, name_lower, symbol_positions, name_positions):
+                return {
+                    'is_valid': True,
+                    'reason': f"Valid content - symbol and name found together in pattern",
+                    'confidence': 1.2,
+                    'symbol_found': True,
+                    'symbol_in_context': True,
+                    'name_found': True,
+                    'false_positive': False,
+                    'validation_layer': 'combined_pattern'
+                }
+
+            # LAYER 3: symbol and name close to each other (two-pointer merge)
+            min_distance = self._min_distance(
+                self._non_overlapping(symbol_positions, len(symbol_lower)),
+                self._non_overlapping(name_positions, len(name_lower))
+            )
+            if min_distance <= PROXIMITY_THRESHOLD:
+                # Confidence based on proximity (closer = higher confidence)
+                proximity_confidence = 1.0 - (min_distance / PROXIMITY_THRESHOLD) * 0.2  # 0.8 to 1.0
+                return {
+                    'is_valid': True,
+                    'reason': f"Valid content - symbol and name found within {min_distance} characters",
+                    'confidence': proximity_confidence,
+                    'symbol_found': True,
+                    'symbol_in_context': True,
+                    'name_found': True,
+                    'false_positive': False,
+                    'validation_layer': 'proximity_check',
+                    'proximity_distance': min_distance
+                }
+
+            # LAYER 4: context-aware fallback (only reached when layers 2-3 fail)
+            return self._fallback(text, symbol, name, symbol_found=bool(symbol_positions))
+
+        except Exception as e:
+            return {
+                'is_valid': False,
+                'reason': f"Validation error: {e}",
+                'confidence': 0,
+                'false_positive': False,
+                'validation_layer': 'error'
+            }
+
+    @staticmethod
+    def _has_combined_match(scan: PageScan, symbol: str, name: str,
+                            symbol_positions: List[int], name_positions: List[int]) -> bool:
+        """Same matches as the regexes
+        name[^)]*(symbol-tw) | (symbol-tw)[^)]*name | symbol-tw[^)]*name |
+        name[^\\d]{0,20}symbol-tw | 代號[:：\\s]*symbol[^)]*name
+        """
+        if not symbol_positions or not name_positions:
+            return False
+        text = scan.text
+        symbol_len, name_len = len(symbol), len(name)
+        name_ends = [position + name_len for position in name_positions]
+
+        def name_after(start: int) -> bool:
+            # nearest name at or after start, with no ')' in between
+            index = bisect_left(name_positions, start)
+            return index < len(name_positions) and scan.no_close_paren(start, name_positions[index])
+
+        for position in symbol_positions:
+            symbol_end = position + symbol_len
+            tag = TW_SUFFIX_PATTERN.match(text, symbol_end)
+            if tag:
+                tag_end = tag.end()
+                if tag_end < len(text) and text[tag_end] == ')' and position and text[position - 1] == '(':
+                    # 聯發科(2454-TW)
+                    index = bisect_right(name_ends, position - 1) - 1
+                    if index >= 0 and scan.no_close_paren(name_ends[index], position - 1):
+                        return True
+                    # (2454-TW) 聯發科
+                    if name_after(tag_end + 1):
+                        return True
+                # 2454-TW 聯發科
+                if name_after(tag_end):
+                    return True
+                # 聯發科...2454-TW (within 20 chars, no digits)
+                index = bisect_right(name_ends, position) - 1
+                if index >= 0 and position - name_ends[index] <= NAME_BEFORE_TAG_GAP \
+                        and not DIGIT_PATTERN.search(text, name_ends[index], position):
+                    return True
+            # 代號: 2454 聯發科
+            label_start = position
+            while label_start and (text[label_start - 1] in ':：' or text[label_start - 1].isspace()):
+                label_start -= 1
+            if text[max(0, label_start - 2):label_start] == '代號' and name_after(symbol_end):
+                return True
+        return False
+
+    @staticmethod
+    def _non_overlapping(positions: List[int], length: int) -> List[int]:
+        """Leftmost non-overlapping occurrences (what re.finditer reports)"""
+        kept = []
+        next_free = -1
+        for position in positions:
+            if position >= next_free:
+                kept.append(position)
+                next_free = position + max(length, 1)
+        return kept
+
+    @staticmethod
+    def _min_distance(first: List[int], second: List[int]) -> float:
+        """Smallest |a - b| over two sorted position lists, linear merge"""
+        best = float('inf')
+        i = j = 0
+        while i < len(first) and j < len(second):
+            diff = first[i] - second[j]
+            if diff < 0:
+                best = min(best, -diff)
+                i += 1
+            else:
+                best = min(best, diff)
+                j += 1
+        return best
+
+    @staticmethod
+    def _fallback(content_lower: str, symbol: str, name: str, symbol_found: bool) -> Dict[str, Any]:
+        """Layer 4: symbol in a stock-code context, price false positives, partial name match"""
+        name_lower = name.lower()
+
+        # Check for symbol in proper stock code contexts
+        symbol_contexts = [
+            rf'\b{symbol}[-\s]*tw\b',  # 2330-TW or 2330 TW
+            rf'{symbol}[-\s]*台股',     # 2330-台股
+            rf'\({symbol}[-\s]*tw\)',  # (2330-TW)
+            rf'代號[:：\s]*{symbol}\b',  # 代號: 2330
+            rf'{symbol}[-\s]+[^\d]',   # 2330 followed by non-digit (not a price like "2330元")
+        ]
+
+        symbol_in_context = False
+        for pattern in symbol_contexts:
+            if re.search(pattern, content_lower):
+                symbol_in_context = True
+                break
+
+        # Detect false positives - symbol appearing as price/target
+        false_positive_patterns = [
+            rf'目標價[為是]\s*{symbol}元',      # 目標價為2330元
+            rf'目標價[:：]\s*{symbol}元',       # 目標價:2330元
+            rf'預估目標價[為是]?\s*{symbol}元',  # 預估目標價為2330元
+            rf'{symbol}\s*元\s*目標價',         # 2330元目標價
+            rf'升至\s*{symbol}元',              # 升至2330元
+            rf'調升至\s*{symbol}元',            # 調升至2330元
+        ]
+
+        for pattern in false_positive_patterns:
+            if re.search(pattern, content_lower):
+                return {
+                    'is_valid': False,
+                    'reason': f"Symbol {symbol} appears as price/target value, not stock code",
+                    'confidence': 0,
+                    'symbol_found': False,
+                    'name_found': False,
+                    'false_positive': True,
+                    'validation_layer': 'price_detection'
+                }
+
+        # Check for company name presence (partial matching)
+        name_words = name_lower.split()
+        name_matches = sum(1 for word in name_words if len(word) > 1 and word in content_lower)
+        name_found = name_matches >= max(1, len(name_words) // 2)
+
+        # Calculate confidence with REDUCED weight for fallback layer
+        confidence = 0
+
+        if symbol_in_context:
+            confidence += 0.5  # Reduced from 0.7
+        elif symbol_found:
+            confidence += 0.2  # Reduced from 0.3
+
+        if name_found:
+            confidence += 0.3  # Reduced from 0.4
+
+        # STRICTER threshold for fallback validation (0.7 instead of 0.8)
+        # Most valid content should pass Layer 1-3, so fallback needs higher standards
+        is_valid = (symbol_in_context or symbol_found) and name_found and confidence >= 0.7
+
+        if is_valid:
+            reason = f"Valid content about {symbol} ({name}) - fallback validation"
+            if symbol_in_context and name_found:
+                reason += " (symbol in context, name found separately)"
+        else:
+            reason = f"Content validation failed for {symbol} ({name}) - confidence: {confidence:.2f}"
+            if not symbol_in_context and symbol_found:
+                reason += " (symbol found but not in proper context)"
+            if not name_found:
+                reason += " (company name not found)"
+            reason += " - failed all validation layers"
+
+        return {
+            'is_valid': is_valid,
+            'reason': reason,
+            'confidence': confidence,
+            'symbol_found': symbol_in_context or symbol_found,
+            'symbol_in_context': symbol_in_context,
+            'name_found': name_found,
+            'false_positive': not is_valid,
+            'validation_layer': 'fallback'
+        }
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Content Normalizer - FactSet Pipeline v3.6.0
+Convert fetched article HTML into compact, structure-preserving Markdown.
+
+- Keeps the article title, byline/date line and body paragraphs
+- Keeps every article table as minimal <table><tr><td> HTML so the
+  Process Group table extractors (EPS / revenue stats) keep working
+- Drops scripts, styles, navigation, ads and other page chrome
+- Optionally archives the raw HTML as gzip next to the normalized file
+"""
+
+import os
+import re
+import gzip
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+
+class _ArticleHTMLParser(HTMLParser):
+    """Collect text blocks and tables, grouped by <article> element"""
+
+    SKIP_TAGS = {
+        'script', 'style', 'noscript', 'svg', 'iframe', 'form', 'button',
+        'nav', 'footer', 'aside', 'head', 'template', 'select', 'canvas'
+    }
+    VOID_TAGS = {
+        'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+        'link', 'meta', 'param', 'source', 'track', 'wbr'
+    }
+    BLOCK_TAGS = {
+        'p', 'div', 'section', 'article', 'main', 'header', 'blockquote',
+        'ul', 'ol', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'figure', 'figcaption'
+    }
+    HEADING_TAGS = {'h1': '# ', 'h2': '## ', 'h3': '### '}
+    INVISIBLE_CHARS = '\u200b\u200c\u200d\ufeff'
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ''
+        self.segments: List[List[str]] = [[]]   # segment 0 = text outside <article>
+        self._segment_stack: List[int] = [0]
+        self._skip_depth = 0
+        self._in_title = False
+        self._line: List[str] = []
+        self._line_prefix = ''
+        self._table_rows: Optional[List[List[str]]] = None
+        self._table_depth = 0
+        self._cell: Optional[List[str]] = None
+
+    # -- helpers ---------------------------------------------------------
+
+    def _current_segment(self) -> List[str]:
+        return self.segments[self._segment_stack[-1]]
+
+    def _flush_line(self):
+        text = re.sub(r'\s+', ' ', ''.join(self._line)).strip(' ' + self.INVISIBLE_CHARS)
+        if text:
+            self._current_segment().append(self._line_prefix + text)
+        self._line = []
+        self._line_prefix = ''
+
+    def _flush_table(self):
+        rows = [row for row in (self._table_rows or []) if any(cell for cell in row)]
+        self._table_rows = None
+        if not rows:
+            return
+        lines = ['<table>']
+        for row in rows:
+            lines.append('<tr>' + ''.join(f'<td>{cell}</td>' for cell in row) + '</tr>')
+        lines.append('</table>')
+        self._current_segment().append('\n'.join(lines))
+
+    # -- HTMLParser callbacks -------------------------------------------
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'title':
+            self._in_title = True
+            return
+        if self._skip_depth or tag in self.SKIP_TAGS:
+            if tag not in self.VOID_TAGS:
+                self._skip_depth += 1
+            return
+
+        if tag == 'article':
+            self._flush_line()
+            self.segments.append([])
+            self._segment_stack.append(len(self.segments) - 1)
+        elif tag == 'table':
+            self._table_depth += 1
+            if self._table_depth == 1:
+                self._flush_line()
+                self._table_rows = []
+        elif self._table_rows is not None:
+            if tag == 'tr':
+                self._table_rows.append([])
+            elif tag in ('td', 'th'):
+                if not self._table_rows:
+                    self._table_rows.append([])
+                self._cell = []
+            elif tag == 'br' and self._cell is not None:
+                self._cell.append(' ')
+        elif tag == 'br':
+            self._flush_line()
+        elif tag == 'time':
+            # Keep byline and publication time apart: "鉅亨網新聞中心 2025-10-02 08:10"
+            self._line.append(' ')
+        elif tag in self.BLOCK_TAGS:
+            self._flush_line()
+            if tag in self.HEADING_TAGS:
+                self._line_prefix = self.HEADING_TAGS[tag]
+            elif tag == 'li':
+                self._line_prefix = '- '
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in self.VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self._in_title = False
+            return
+        if self._skip_depth:
+            if tag in self.SKIP_TAGS or tag not in self.VOID_TAGS:
+                self._skip_depth -= 1
+            return
+
+        if tag == 'article':
+            self._flush_line()
+            if len(self._segment_stack) > 1:
+                self._segment_stack.pop()
+        elif tag == 'table':
+            if self._table_depth:
+                self._table_depth -= 1
+                if self._table_depth == 0:
+                    self._flush_table()
+        elif self._table_rows is not None:
+            if tag in ('td', 'th') and self._cell is not None:
+                cell_text = re.sub(r'\s+', ' ', ''.join(self._cell)).strip()
+                # Cell text must stay tag-free for the table row patterns
+                cell_text = cell_text.replace('<', '&lt;').replace('>', '&gt;')
+                self._table_rows[-1].append(cell_text)
+                self._cell = None
+        elif tag in self.BLOCK_TAGS:
+            self._flush_line()
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+            return
+        if self._skip_depth:
+            return
+        if self._cell is not None:
+            self._cell.append(data)
+        elif self._table_rows is None:
+            self._line.append(data)
+
+    def close(self):
+        super().close()
+        self._flush_line()
+        if self._table_rows is not None:
+            self._flush_table()
+
+
+class ContentNormalizer:
+    """Normalize fetched page HTML into compact article Markdown"""
+
+    # Markers the Process Group relies on; if the raw page has them and the
+    # normalized text does not, the raw content is kept instead.
+    REQUIRED_MARKERS = ('市場預估EPS', '市場預估營收')
+
+    def __init__(self, min_length: int = 200):
+        self.min_length = min_length
+        self.stats = {
+            'normalized': 0,
+            'fallback_raw': 0,
+            'raw_bytes': 0,
+            'normalized_bytes': 0
+        }
+
+    @staticmethod
+    def looks_like_html(content: str) -> bool:
+        head = content[:2000].lower()
+        return '<html' in head or '<!doctype' in head or '<body' in head
+
+    def normalize(self, content: str) -> str:
+        """Return normalized Markdown, or the original content if normalization is unsafe"""
+        if not content or not self.looks_like_html(content):
+            return content
+
+        self.stats['raw_bytes'] += len(content.encode('utf-8'))
+
+        try:
+            normalized = self._normalize_html(content)
+        except Exception as e:
+            print(f"⚠️ Content normalization failed, keeping raw HTML: {e}")
+            normalized = None
+
+        if not normalized or not self._is_safe(content, normalized):
+            self.stats['fallback_raw'] += 1
+            self.stats['normalized_bytes'] += len(content.encode('utf-8'))
+            return content
+
+        self.stats['normalized'] += 1
+        self.stats['normalized_bytes'] += len(normalized.encode('utf-8'))
+        return normalized
+
+    def _normalize_html(self, html: str) -> Optional[str]:
+        parser = _ArticleHTMLParser()
+        parser.feed(html)
+        parser.close()
+
+        blocks = self._select_article_blocks(parser.segments)
+        if not blocks:
+            return None
+
+        title = re.sub(r'\s+', ' ', parser.title).strip()
+        if title and not any(block.startswith('# ') for block in blocks):
+            blocks.insert(0, f'# {title}')
+
+        return '\n\n'.join(blocks) + '\n'
+
+    def _select_article_blocks(self, segments: List[List[str]]) -> List[str]:
+        """Prefer the <article> carrying FactSet tables, then the longest one"""
+        articles = [segment for segment in segments[1:] if segment]
+        if not articles:
+            return segments[0]
+
+        for marker in self.REQUIRED_MARKERS:
+            for segment in articles:
+                if any(marker in block for block in segment):
+                    return segment
+
+        return max(articles, key=lambda segment: sum(len(block) for block in segment))
+
+    def _is_safe(self, raw: str, normalized: str) -> bool:
+        if len(normalized) < self.min_length:
+            return False
+        for marker in self.REQUIRED_MARKERS:
+            if marker in raw and marker not in normalized:
+                return False
+        return True
+
+    def archive_raw(self, raw_content: str, archive_dir: str, md_filename: str) -> str:
+        """Write the raw page as gzip next to the normalized MD filename"""
+        try:
+            os.makedirs(archive_dir, exist_ok=True)
+            base_name = os.path.splitext(os.path.basename(md_filename))[0]
+            archive_path = os.path.join(archive_dir, f"{base_name}.html.gz")
+            with gzip.open(archive_path, 'wt', encoding='utf-8') as f:
+                f.write(raw_content)
+            return archive_path
+        except Exception as e:
+            print(f"⚠️ Failed to archive raw HTML for {md_filename}: {e}")
+            return ""
+
+    def get_stats(self) -> Dict[str, float]:
+        raw_bytes = self.stats['raw_bytes']
+        return {
+            **self.stats,
+            'size_ratio': round(self.stats['normalized_bytes'] / raw_bytes, 3) if raw_bytes else 0.0
+        }
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Fetch Policy - FactSet Pipeline v3.6.0
+Per-domain fetch timeouts and circuit breaker, persisted across runs (SQLite).
+
+- Every fetch records its latency and outcome for the page's domain
+- Adaptive timeout: p95 of recent successful latencies x multiplier, clamped
+  to [min_timeout, max_timeout]; domains with too few samples use max_timeout
+- Circuit breaker: a domain is skipped after `failure_threshold` consecutive
+  failures (timeouts, connection errors, 403/429/5xx) that span at least
+  `min_failure_span` - one burst of concurrent failures never opens it.
+  After the cooldown one probe request is let through; success closes the
+  circuit, failure reopens it with the cooldown doubled (up to `max_cooldown`)
+- Primary sources (`exempt_domains`, default cnyes.com) never open a circuit;
+  they still get adaptive timeouts
+- 404s and other per-URL errors do not count against the domain
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import requests
+
+
+class FetchPolicy:
+    """Persistent per-domain latency statistics and circuit breaker"""
+
+    DEFAULT_STATS_PATH = os.path.join('cache', 'search', 'domain_stats.sqlite3')
+
+    # Recent successful latencies kept per domain for the p95
+    LATENCY_SAMPLES = 50
+    MIN_SAMPLES = 5
+    DOMAIN_FAILURE_STATUS = (403, 429)
+
+    DEFAULT_EXEMPT_DOMAINS = ('cnyes.com',)
+
+    def __init__(self, stats_path: Optional[str] = None, max_timeout: float = 10.0,
+                 min_timeout: float = 2.0, timeout_multiplier: float = 2.0,
+                 failure_threshold: int = 3, min_failure_span_minutes: float = 5.0,
+                 cooldown_minutes: float = 15.0, max_cooldown_hours: float = 24.0,
+                 exempt_domains: Optional[Iterable[str]] = None):
+        self.stats_path = stats_path or self.DEFAULT_STATS_PATH
+        self.max_timeout = float(max_timeout)
+        self.min_timeout = min(float(min_timeout), self.max_timeout)
+        self.timeout_multiplier = float(timeout_multiplier)
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.min_failure_span = timedelta(minutes=float(min_failure_span_minutes))
+        self.cooldown = timedelta(minutes=float(cooldown_minutes))
+        self.max_cooldown = max(self.cooldown, timedelta(hours=float(max_cooldown_hours)))
+        self.exempt_domains = tuple(
+            domain.strip().lower() for domain in
+            (self.DEFAULT_EXEMPT_DOMAINS if exempt_domains is None else exempt_domains)
+            if domain and domain.strip()
+        )
+
+        self.stats = {
+            'circuit_skipped': 0,
+            'circuits_opened': 0,
+            'circuits_closed': 0,
+            'probes': 0,
+            'errors': 0
+        }
+
+        stats_dir = os.path.dirname(self.stats_path)
+        if stats_dir:
+            os.makedirs(stats_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # Domains with a half-open probe in flight (other fetches keep skipping)
+        self._probing = set()
+
+        self._conn = sqlite3.connect(self.stats_path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS domain_stats (
+                domain TEXT PRIMARY KEY,
+                latencies TEXT NOT NULL,
+                successes INTEGER NOT NULL DEFAULT 0,
+                failures INTEGER NOT NULL DEFAULT 0,
+                consecutive_failures INTEGER NOT NULL DEFAULT 0,
+                first_failure_at TEXT,
+                opened_at TEXT,
+                open_count INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        # Stats files written before the streak span / cooldown backoff columns existed
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(domain_stats)")}
+        if 'first_failure_at' not in columns:
+            self._conn.execute("ALTER TABLE domain_stats ADD COLUMN first_failure_at TEXT")
+        if 'open_count' not in columns:
+            self._conn.execute("ALTER TABLE domain_stats ADD COLUMN open_count INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+        self._domains: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        domains = {}
+        try:
+            rows = self._conn.execute(
+                "SELECT domain, latencies, successes, failures, consecutive_failures, first_failure_at, "
+                "opened_at, open_count, last_error FROM domain_stats"
+            ).fetchall()
+        except Exception as e:
+            print(f"⚠️ Domain stats read failed: {e}")
+            return domains
+        for (domain, latencies, successes, failures, consecutive, first_failure_at,
+             opened_at, open_count, last_error) in rows:
+            try:
+                samples = [float(value) for value in json.loads(latencies)]
+            except (TypeError, ValueError):
+                samples = []
+            domains[domain] = {
+                'latencies': samples[-self.LATENCY_SAMPLES:],
+                'successes': successes,
+                'failures': failures,
+                'consecutive_failures': consecutive,
+                'first_failure_at': datetime.fromisoformat(first_failure_at) if first_failure_at else None,
+                # Exempt domains never stay open (e.g. after exempt_domains changed)
+                'opened_at': (datetime.fromisoformat(opened_at)
+                              if opened_at and not self.is_exempt(domain) else None),
+                'open_count': open_count or 0,
+                'last_error': last_error
+            }
+        return domains
+
+    @staticmethod
+    def domain_of(url: str) -> str:
+        host = urlparse(url).netloc.lower()
+        return host[4:] if host.startswith('www.') else host
+
+    def _entry(self, domain: str) -> Dict[str, Any]:
+        entry = self._domains.get(domain)
+        if entry is None:
+            entry = {'latencies': [], 'successes': 0, 'failures': 0, 'consecutive_failures': 0,
+                     'first_failure_at': None, 'opened_at': None, 'open_count': 0, 'last_error': None}
+            self._domains[domain] = entry
+        return entry
+
+    def is_exempt(self, domain: str) -> bool:
+        return any(domain == exempt or domain.endswith('.' + exempt) for exempt in self.exempt_domains)
+
+    def _cooldown_for(self, entry: Dict[str, Any]) -> timedelta:
+        """Base cooldown doubled for every reopen after a failed probe"""
+        doublings = min(max(entry['open_count'] - 1, 0), 16)
+        return min(self.max_cooldown, self.cooldown * (2 ** doublings))
+
+    # -- decisions ---------------------------------------------------------
+
+    def allow(self, url: str) -> bool:
+        """False while the domain's circuit is open (one probe passes after the cooldown)"""
+        domain = self.domain_of(url)
+        with self._lock:
+            entry = self._domains.get(domain)
+            if entry is None or entry['opened_at'] is None:
+                return True
+            if datetime.now() - entry['opened_at'] >= self._cooldown_for(entry) and domain not in self._probing:
+                self._probing.add(domain)
+                self.stats['probes'] += 1
+                return True
+            self.stats['circuit_skipped'] += 1
+            return False
+
+    def timeout_for(self, url: str) -> float:
+        """p95 latency x multiplier, clamped; max_timeout until enough samples"""
+        domain = self.domain_of(url)
+        with self._lock:
+            entry = self._domains.get(domain)
+            samples = sorted(entry['latencies']) if entry else []
+        if len(samples) < self.MIN_SAMPLES:
+            return self.max_timeout
+        p95 = samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))]
+        return max(self.min_timeout, min(self.max_timeout, p95 * self.timeout_multiplier))
+
+    @classmethod
+    def is_domain_failure(cls, error: Exception) -> bool:
+        """Timeouts, connection errors and blocking / server statuses count against the domain"""
+        if isinstance(error, (requests.Timeout, requests.ConnectionError)):
+            return True
+        response = getattr(error, 'response', None)
+        status = getattr(response, 'status_code', None)
+        if status is None:
+            return False
+        return status in cls.DOMAIN_FAILURE_STATUS or status >= 500
+
+    # -- outcomes ----------------------------------------------------------
+
+    def record_success(self, url: str, latency: float):
+        domain = self.domain_of(url)
+        with self._lock:
+            entry = self._entry(domain)
+            entry['latencies'] = (entry['latencies'] + [round(latency, 3)])[-self.LATENCY_SAMPLES:]
+            entry['successes'] += 1
+            entry['consecutive_failures'] = 0
+            entry['first_failure_at'] = None
+            entry['open_count'] = 0
+            if entry['opened_at'] is not None:
+                entry['opened_at'] = None
+                self.stats['circuits_closed'] += 1
+                print(f"🔌 Circuit closed for {domain} (probe succeeded)")
+            self._probing.discard(domain)
+            self._save(domain, entry)
+
+    def record_failure(self, url: str, error: Exception):
+        """Count a failed fetch; per-URL errors only end a pending probe"""
+        domain = self.domain_of(url)
+        with self._lock:
+            entry = self._entry(domain)
+            probing = domain in self._probing
+            self._probing.discard(domain)
+            if not self.is_domain_failure(error):
+                return
+
+            now = datetime.now()
+            entry['failures'] += 1
+            entry['consecutive_failures'] += 1
+            # Streaks older than the longest cooldown are stale (e.g. a previous day's run)
+            if entry['first_failure_at'] is None or now - entry['first_failure_at'] > self.max_cooldown:
+                entry['first_failure_at'] = now
+                entry['consecutive_failures'] = 1
+            entry['last_error'] = str(error)[:200]
+
+            # A streak must outlast one burst of concurrent requests before it counts
+            sustained = (entry['consecutive_failures'] >= self.failure_threshold
+                         and now - entry['first_failure_at'] >= self.min_failure_span)
+            if not self.is_exempt(domain) and (probing or (entry['opened_at'] is None and sustained)):
+                entry['opened_at'] = now
+                entry['open_count'] += 1
+                self.stats['circuits_opened'] += 1
+                print(f"🔌 Circuit open for {domain}: {entry['consecutive_failures']} consecutive failures, "
+                      f"retry after {self._cooldown_for(entry).total_seconds() / 60:g} min")
+            self._save(domain, entry)
+
+    def _save(self, domain: str, entry: Dict[str, Any]):
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO domain_stats "
+                "(domain, latencies, successes, failures, consecutive_failures, first_failure_at, "
+                "opened_at, open_count, last_error, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (domain, json.dumps(entry['latencies']), entry['successes'], entry['failures'],
+                 entry['consecutive_failures'],
+                 entry['first_failure_at'].isoformat() if entry['first_failure_at'] else None,
+                 entry['opened_at'].isoformat() if entry['opened_at'] else None,
+                 entry['open_count'], entry['last_error'], datetime.now().isoformat())
+            )
+            self._conn.commit()
+        except Exception as e:
+            print(f"⚠️ Domain stats write failed for {domain}: {e}")
+            self.stats['errors'] += 1
+
+    # -- reporting ---------------------------------------------------------
+
+    def open_circuits(self) -> List[str]:
+        with self._lock:
+            return sorted(domain for domain, entry in self._domains.items() if entry['opened_at'] is not None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, 'domains': len(self._domains), 'stats_path': self.stats_path}
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Page Cache - FactSet Pipeline v3.6.0
+Persistent fetched-page cache (SQLite) keyed by normalized URL.
+
+- Bodies are stored zlib-compressed together with ETag / Last-Modified
+- Repeat hits within a run are served locally without any request
+- Across runs entries are revalidated with a conditional GET (304 -> cached body)
+- Processed results (md_date, validation, quality) are remembered per
+  URL + company + content hash so unchanged pages skip re-scoring
+"""
+
+import os
+import json
+import zlib
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+
+class PageCache:
+    """Fetched-page cache with conditional revalidation"""
+
+    DEFAULT_CACHE_PATH = os.path.join("cache", "search", "page_cache.sqlite3")
+
+    # Query parameters that never change the page content
+    TRACKING_PARAMS = ('utm_', 'fbclid', 'gclid', 'ref')
+
+    def __init__(self, cache_path: Optional[str] = None, max_age_days: int = 30):
+        self.cache_path = cache_path or self.DEFAULT_CACHE_PATH
+        self.max_age_days = max_age_days
+
+        self.stats = {
+            'memory_hits': 0,
+            'revalidated': 0,
+            'refreshed': 0,
+            'stores': 0,
+            'processed_hits': 0,
+            'errors': 0
+        }
+
+        cache_dir = os.path.dirname(self.cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        # Entries validated (or fetched) during this run
+        self._fresh_keys = set()
+        self._lock = threading.Lock()
+
+        # Shared by the fetcher threads; all access goes through self._lock
+        self._conn = sqlite3.connect(self.cache_path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url_key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT NOT NULL,
+                body BLOB NOT NULL,
+                fetched_at TEXT NOT NULL,
+                validated_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS processed (
+                url_key TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                version TEXT NOT NULL,
+                result TEXT NOT NULL,
+                PRIMARY KEY (url_key, symbol)
+            );
+            """
+        )
+        self._prune_expired()
+
+    @classmethod
+    def normalize_url(cls, url: str) -> str:
+        """Canonical cache key: lower-case host, no fragment, no tracking params, sorted query"""
+        parsed = urlparse(url.strip())
+        query = [
+            (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+            if not key.lower().startswith(cls.TRACKING_PARAMS)
+        ]
+        path = parsed.path.rstrip('/') or '/'
+        return urlunparse((
+            parsed.scheme.lower() or 'https',
+            parsed.netloc.lower(),
+            path,
+            '',
+            urlencode(sorted(query)),
+            ''
+        ))
+
+    @staticmethod
+    def hash_content(text: str) -> str:
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def _prune_expired(self):
+        cutoff = (datetime.now() - timedelta(days=self.max_age_days)).isoformat()
+        try:
+            self._conn.execute("DELETE FROM pages WHERE validated_at < ?", (cutoff,))
+            self._conn.execute(
+                "DELETE FROM processed WHERE url_key NOT IN (SELECT url_key FROM pages)"
+            )
+            self._conn.commit()
+        except Exception as e:
+            print(f"⚠️ Page cache prune failed: {e}")
+
+    # -- page bodies -------------------------------------------------------
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return cached entry: body, etag, last_modified, content_hash, fresh (validated this run)"""
+        key = self.normalize_url(url)
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT etag, last_modified, content_hash, body, validated_at FROM pages WHERE url_key = ?",
+                    (key,)
+                ).fetchone()
+            except Exception as e:
+                print(f"⚠️ Page cache read failed for {url}: {e}")
+                self.stats['errors'] += 1
+                return None
+
+            if row is None:
+                return None
+
+            etag, last_modified, content_hash, blob, validated_at = row
+            fresh = key in self._fresh_keys
+            if fresh:
+                self.stats['memory_hits'] += 1
+
+        return {
+            'body': zlib.decompress(blob).decode('utf-8'),
+            'etag': etag,
+            'last_modified': last_modified,
+            'content_hash': content_hash,
+            'validated_at': datetime.fromisoformat(validated_at),
+            'fresh': fresh
+        }
+
+    def conditional_headers(self, entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Headers for a conditional GET against a cached entry"""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def mark_revalidated(self, url: str):
+        """Server answered 304: cached body is still current"""
+        key = self.normalize_url(url)
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "UPDATE pages SET validated_at = ? WHERE url_key = ?",
+                    (datetime.now().isoformat(), key)
+                )
+                self._conn.commit()
+            except Exception as e:
+                print(f"⚠️ Page cache update failed for {url}: {e}")
+                self.stats['errors'] += 1
+            self._fresh_keys.add(key)
+            self.stats['revalidated'] += 1
+
+    def discard(self, url: str):
+        """Page is gone (404/410): drop the body and its processed results"""
+        key = self.normalize_url(url)
+        with self._lock:
+            try:
+                self._conn.execute("DELETE FROM pages WHERE url_key = ?", (key,))
+                self._conn.execute("DELETE FROM processed WHERE url_key = ?", (key,))
+                self._conn.commit()
+            except Exception as e:
+                print(f"⚠️ Page cache delete failed for {url}: {e}")
+                self.stats['errors'] += 1
+            self._fresh_keys.discard(key)
+
+    def store(self, url: str, body: str, etag: Optional[str] = None,
+              last_modified: Optional[str] = None) -> str:
+        """Store a freshly downloaded body; returns its content hash"""
+        key = self.normalize_url(url)
+        content_hash = self.hash_content(body)
+        now = datetime.now().isoformat()
+        with self._lock:
+            try:
+                existed = self._conn.execute(
+                    "SELECT 1 FROM pages WHERE url_key = ?", (key,)
+                ).fetchone() is not None
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO pages "
+                    "(url_key, url, etag, last_modified, content_hash, body, fetched_at, validated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, url, etag, last_modified, content_hash,
+                     zlib.compress(body.encode('utf-8'), 6), now, now)
+                )
+                self._conn.commit()
+                self.stats['refreshed' if existed else 'stores'] += 1
+            except Exception as e:
+                print(f"⚠️ Page cache write failed for {url}: {e}")
+                self.stats['errors'] += 1
+            self._fresh_keys.add(key)
+        return content_hash
+
+    # -- processed results -------------------------------------------------
+
+    def get_processed(self, url: str, symbol: str, content_hash: str,
+                      version: str) -> Optional[Dict[str, Any]]:
+        """Previously computed md_date / validation / quality for unchanged content"""
+        key = self.normalize_url(url)
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT result FROM processed "
+                    "WHERE url_key = ? AND symbol = ? AND content_hash = ? AND version = ?",
+                    (key, symbol, content_hash, version)
+                ).fetchone()
+            except Exception as e:
+                print(f"⚠️ Page cache read failed for {url}: {e}")
+                self.stats['errors'] += 1
+                return None
+            if row is None:
+                return None
+            self.stats['processed_hits'] += 1
+        return json.loads(row[0])
+
+    def put_processed(self, url: str, symbol: str, content_hash: str,
+                      version: str, result: Dict[str, Any]):
+        key = self.normalize_url(url)
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO processed "
+                    "(url_key, symbol, content_hash, version, result) VALUES (?, ?, ?, ?, ?)",
+                    (key, symbol, content_hash, version, json.dumps(result, ensure_ascii=False))
+                )
+                self._conn.commit()
+            except Exception as e:
+                print(f"⚠️ Page cache write failed for {url}: {e}")
+                self.stats['errors'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, 'cache_path': self.cache_path}
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Page Fetcher - FactSet Pipeline v3.6.0
+Pooled, bounded-concurrency page fetching for search results.
+
+- One keep-alive requests.Session shared by all fetches (connection reuse)
+- Thread pool fetches all items of a search result page concurrently
+- Per-host semaphore caps parallel requests to the same site (e.g. cnyes.com)
+- Optional PageCache: repeat URLs served locally, conditional GET across runs;
+  the cached copy stands in only for transient failures (timeouts, connection
+  errors, 429/5xx) and only up to `stale_max_age_hours` old - 4xx returns None
+- Optional FetchPolicy: per-domain adaptive timeouts and circuit breaker
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from fetch_policy import FetchPolicy
+from page_cache import PageCache
+
+
+class PageFetcher:
+    """Shared-session page fetcher with per-host concurrency limits"""
+
+    DEFAULT_HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    }
+
+    # Pages the site reports as removed: cached copy is dropped
+    GONE_STATUS = (404, 410)
+
+    def __init__(self, max_workers: int = 8, per_host_limit: int = 4, timeout: float = 10.0,
+                 page_cache: Optional[PageCache] = None, fetch_policy: Optional[FetchPolicy] = None,
+                 stale_max_age_hours: float = 72.0):
+        self.page_cache = page_cache
+        self.fetch_policy = fetch_policy
+        self.stale_max_age = timedelta(hours=float(stale_max_age_hours))
+        self.max_workers = max(1, int(max_workers))
+        self.per_host_limit = max(1, int(per_host_limit))
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self.session.headers.update(self.DEFAULT_HEADERS)
+        # Pool must hold at least one connection per concurrent request to a host
+        adapter = HTTPAdapter(pool_connections=self.max_workers,
+                              pool_maxsize=max(self.max_workers, self.per_host_limit))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'requests': 0,
+            'failures': 0,
+            'bytes': 0,
+            'cache_hits': 0,
+            'not_modified': 0,
+            'stale_served': 0,
+            'circuit_skipped': 0
+        }
+
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            semaphore = self._host_semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_semaphores[host] = semaphore
+            return semaphore
+
+    @staticmethod
+    def _status_of(error: Exception) -> Optional[int]:
+        return getattr(getattr(error, 'response', None), 'status_code', None)
+
+    @classmethod
+    def is_transient(cls, error: Exception) -> bool:
+        """Network trouble worth bridging with a cached copy: timeouts, connection errors, 429, 5xx"""
+        if isinstance(error, (requests.Timeout, requests.ConnectionError)):
+            return True
+        status = cls._status_of(error)
+        return status is not None and (status == 429 or status >= 500)
+
+    def _stale_copy(self, entry: Optional[Dict]) -> Optional[str]:
+        """Cached body if recent enough to stand in for the live page"""
+        if not entry or datetime.now() - entry['validated_at'] > self.stale_max_age:
+            return None
+        with self._lock:
+            self.stats['stale_served'] += 1
+        return entry['body']
+
+    def fetch(self, url: str) -> Optional[str]:
+        """Fetch a single page; returns None on any failure"""
+        entry = self.page_cache.lookup(url) if self.page_cache else None
+        if entry and entry['fresh']:
+            # Already fetched or revalidated during this run
+            with self._lock:
+                self.stats['cache_hits'] += 1
+            return entry['body']
+
+        if self.fetch_policy and not self.fetch_policy.allow(url):
+            # Domain circuit open: no request, recent good copy if there is one
+            with self._lock:
+                self.stats['circuit_skipped'] += 1
+            return self._stale_copy(entry)
+
+        timeout = self.fetch_policy.timeout_for(url) if self.fetch_policy else self.timeout
+        with self._host_semaphore(url):
+            started = time.monotonic()
+            try:
+                headers = self.page_cache.conditional_headers(entry) if self.page_cache else {}
+                response = self.session.get(url, headers=headers, timeout=timeout)
+
+                if response.status_code == 304 and entry:
+                    if self.fetch_policy:
+                        self.fetch_policy.record_success(url, time.monotonic() - started)
+                    self.page_cache.mark_revalidated(url)
+                    with self._lock:
+                        self.stats['requests'] += 1
+                        self.stats['not_modified'] += 1
+                    return entry['body']
+
+                response.raise_for_status()
+                text = response.text
+                if self.fetch_policy:
+                    self.fetch_policy.record_success(url, time.monotonic() - started)
+                with self._lock:
+                    self.stats['requests'] += 1
+                    self.stats['bytes'] += len(response.content)
+
+                if self.page_cache:
+                    self.page_cache.store(url, text,
+                                          etag=response.headers.get('ETag'),
+                                          last_modified=response.headers.get('Last-Modified'))
+                return text
+
+            except Exception as e:
+                if self.fetch_policy:
+                    self.fetch_policy.record_failure(url, e)
+                with self._lock:
+                    self.stats['requests'] += 1
+                    self.stats['failures'] += 1
+                if entry and self._status_of(e) in self.GONE_STATUS:
+                    # Article removed: never validate or save the old copy again
+                    self.page_cache.discard(url)
+                elif self.is_transient(e):
+                    stale = self._stale_copy(entry)
+                    if stale is not None:
+                        print(f"⚠️ Failed to fetch content from {url}, using cached copy: {e}")
+                        return stale
+                print(f"⚠️ Failed to fetch content from {url}: {e}")
+                return None
+
+    def fetch_many(self, urls: List[str]) -> Dict[str, Optional[str]]:
+        """Fetch several pages concurrently; duplicates are fetched once"""
+        unique_urls = list(dict.fromkeys(url for url in urls if url))
+        if len(unique_urls) <= 1 or self.max_workers <= 1:
+            return {url: self.fetch(url) for url in unique_urls}
+
+        with self._lock:
+            # Shared by concurrent company pipelines
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='page-fetch')
+        pages = self._executor.map(self.fetch, unique_urls)
+        return dict(zip(unique_urls, pages))
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.session.close()
+        if self.page_cache is not None:
+            self.page_cache.close()
+        if self.fetch_policy is not None:
+            self.fetch_policy.close()
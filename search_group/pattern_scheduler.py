@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Pattern Scheduler - FactSet Pipeline v3.6.0
+Spend search quota on the patterns that historically produce FactSet data.
+
+- Orders refined_search_patterns by historical yield: queries that produced
+  saved files for this company (progress.json, plus the per-batch snapshots
+  the search workflow commits under data/search_stats) first, then the per-company and
+  global yield from the Process Group pattern-yield store (query-pattern
+  report as fallback)
+- Prunes patterns that only ever produced invalid content for a company
+- Stops a company once enough distinct high-quality, recent results are found
+- Reports when a company's newest MD file is inside the freshness window
+"""
+
+import os
+import re
+import csv
+import glob
+import json
+import sys
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.append(str(REPO_ROOT))
+
+try:
+    from process_group.pattern_yield_store import PatternYieldStore
+except Exception:
+    PatternYieldStore = None
+
+
+class PatternScheduler:
+    """Yield-ordered search patterns with early stopping"""
+
+    DEFAULT_REPORT_PATH = os.path.join('data', 'reports', 'factset_query_pattern_summary_latest.csv')
+    DEFAULT_PROGRESS_PATH = os.path.join('cache', 'search', 'progress.json')
+    # Committed by each search workflow batch; covers companies that moved batches
+    SEARCH_STATS_GLOB = os.path.join('data', 'search_stats', 'progress_*.json')
+
+    # Pruned for a company after this many saved files with none passing validation
+    PRUNE_MIN_FILES = 2
+
+    def __init__(self, report_path: Optional[str] = None, progress_path: Optional[str] = None,
+                 saturation_results: int = 3, saturation_quality: float = 8.0,
+                 recent_days: int = 90, yield_store_path: Optional[str] = None,
+                 prune_patterns: bool = True):
+        self.report_path = report_path or self.DEFAULT_REPORT_PATH
+        # Explicit path: only that file; default: local progress plus committed snapshots
+        self.progress_paths = [progress_path] if progress_path else (
+            [self.DEFAULT_PROGRESS_PATH] + sorted(glob.glob(self.SEARCH_STATS_GLOB))
+        )
+        self.yield_store_path = yield_store_path
+        self.prune_patterns = prune_patterns
+        self.saturation_results = max(0, int(saturation_results))
+        self.saturation_quality = float(saturation_quality)
+        self.recent_days = int(recent_days)
+
+        self._lock = threading.Lock()
+        self._pattern_yield: Optional[Dict[str, float]] = None
+        self._company_queries: Optional[Dict[str, Dict[str, int]]] = None
+        self._yield_store = None
+        self.pruned_total = 0
+
+    # -- history -----------------------------------------------------------
+
+    @staticmethod
+    def normalize_template(pattern: str) -> str:
+        """Same shape as KeywordAnalyzer query patterns: no quotes, single spaces"""
+        return re.sub(r'\s+', ' ', re.sub(r'["\']', '', pattern)).strip()
+
+    @classmethod
+    def template_key(cls, pattern: str, symbol: str, name: str) -> str:
+        """Formatted query -> template (same keys as PatternYieldStore)"""
+        if PatternYieldStore is not None:
+            return PatternYieldStore.to_template(pattern, symbol, name)
+        template = re.sub(rf'(?<!\d){re.escape(symbol)}(?!\d)', '{symbol}', pattern)
+        if name:
+            template = template.replace(name, '{name}')
+        return cls.normalize_template(template)
+
+    def _load_history(self):
+        with self._lock:
+            if self._pattern_yield is not None:
+                return
+            if PatternYieldStore is not None:
+                self._yield_store = PatternYieldStore.load(self.yield_store_path)
+            if self._yield_store is not None and self._yield_store.patterns:
+                self._pattern_yield = {
+                    template: entry.get('yield_score', 0.0)
+                    for template, entry in self._yield_store.patterns.items()
+                }
+            else:
+                self._pattern_yield = self._load_pattern_report()
+            self._company_queries = self._load_progress_queries()
+
+    def _load_pattern_report(self) -> Dict[str, float]:
+        """Template -> yield (average quality weighted by how often it produced a file)"""
+        pattern_yield = {}
+        if not os.path.exists(self.report_path):
+            return pattern_yield
+        try:
+            with open(self.report_path, 'r', encoding='utf-8-sig', newline='') as f:
+                for row in csv.DictReader(f):
+                    template = self.normalize_template(row.get('Query pattern', ''))
+                    if not template:
+                        continue
+                    usage = float(row.get('使用次數') or 0)
+                    avg_quality = float(row.get('平均品質評分') or 0)
+                    # Frequent producers beat a single lucky hit at equal quality
+                    pattern_yield[template] = avg_quality * (1 + min(usage, 100) / 100)
+        except Exception as e:
+            print(f"⚠️ Pattern report unreadable, using default order: {e}")
+        return pattern_yield
+
+    def _load_progress_queries(self) -> Dict[str, Dict[str, int]]:
+        """Symbol -> {query: saved result count} from previous runs (max across files)"""
+        company_queries: Dict[str, Dict[str, int]] = {}
+        for path in self.progress_paths:
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    progress = json.load(f)
+                for symbol, entry in progress.items():
+                    queries = entry.get('productive_queries') if isinstance(entry, dict) else None
+                    if not queries:
+                        continue
+                    merged = company_queries.setdefault(symbol, {})
+                    for query, count in queries.items():
+                        merged[query] = max(merged.get(query, 0), int(count))
+            except Exception as e:
+                print(f"⚠️ Progress file {path} unreadable, skipped: {e}")
+        return company_queries
+
+    # -- scheduling --------------------------------------------------------
+
+    def schedule(self, symbol: str, name: str,
+                 all_patterns: Dict[str, List[str]]) -> List[Tuple[str, List[str]]]:
+        """Order formatted patterns by yield; returns runs of (category, patterns)"""
+        self._load_history()
+
+        flat = [(category, pattern) for category, patterns in all_patterns.items() for pattern in patterns]
+        templates = [self.template_key(pattern, symbol, name) for _, pattern in flat]
+        company_yield = self._yield_store.get_company(symbol) if self._yield_store is not None else {}
+
+        if self.prune_patterns and company_yield:
+            keep = [
+                index for index, template in enumerate(templates)
+                if not self._is_unproductive(company_yield.get(template))
+            ]
+            # Never prune a company down to nothing
+            if keep and len(keep) < len(flat):
+                with self._lock:
+                    self.pruned_total += len(flat) - len(keep)
+                print(f"✂️ Pruned {len(flat) - len(keep)} patterns with no valid results for {symbol}")
+                flat = [flat[index] for index in keep]
+                templates = [templates[index] for index in keep]
+
+        known = [self._pattern_yield.get(template) for template in templates]
+        known_scores = [score for score in known if score is not None]
+        # Untried patterns rank with the median so new patterns still get explored
+        default_score = sorted(known_scores)[len(known_scores) // 2] if known_scores else 0.0
+        company_queries = self._company_queries.get(symbol, {})
+
+        def sort_key(index: int):
+            category, pattern = flat[index]
+            score = known[index] if known[index] is not None else default_score
+            company_score = company_yield.get(templates[index], {}).get('yield_score', 0.0)
+            return (-company_queries.get(pattern, 0), -company_score, -score, index)
+
+        ordered = [flat[index] for index in sorted(range(len(flat)), key=sort_key)]
+
+        runs: List[Tuple[str, List[str]]] = []
+        for category, pattern in ordered:
+            if runs and runs[-1][0] == category:
+                runs[-1][1].append(pattern)
+            else:
+                runs.append((category, [pattern]))
+        return runs
+
+    def _is_unproductive(self, entry: Optional[Dict[str, Any]]) -> bool:
+        return bool(entry) and entry.get('files', 0) >= self.PRUNE_MIN_FILES and entry.get('valid', 0) == 0
+
+    def is_saturated(self, results: List[Dict[str, Any]]) -> bool:
+        """Enough distinct high-quality, recent results to stop querying this company"""
+        if not self.saturation_results:
+            return False
+        cutoff = datetime.now() - timedelta(days=self.recent_days)
+        seen = set()
+        for result in results:
+            if result.get('quality_score', 0) < self.saturation_quality:
+                continue
+            md_date = self._parse_md_date(result.get('md_date', ''))
+            if md_date is None or md_date < cutoff:
+                continue
+            seen.add(result.get('url') or result.get('title'))
+            if len(seen) >= self.saturation_results:
+                return True
+        return False
+
+    @staticmethod
+    def _parse_md_date(value: str) -> Optional[datetime]:
+        match = re.match(r'(\d{4})[/-](\d{1,2})[/-](\d{1,2})', str(value or ''))
+        if not match:
+            return None
+        try:
+            return datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        except ValueError:
+            return None
+
+    # -- freshness ---------------------------------------------------------
+
+    @staticmethod
+    def last_searched_at(symbol: str, md_dir: str) -> Optional[datetime]:
+        """Newest search timestamp in the company's MD front matter (file mtimes are checkout times in CI)"""
+        newest = None
+        for path in glob.glob(os.path.join(md_dir, f"{symbol}_*.md")):
+            try:
+                with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                    header = f.read(4096)
+            except OSError:
+                continue
+            for field in ('updated_date', 'extracted_date'):
+                match = re.search(rf'^{field}:\s*(\S+)', header, re.MULTILINE)
+                if not match:
+                    continue
+                try:
+                    stamp = datetime.fromisoformat(match.group(1).strip('\'"'))
+                except ValueError:
+                    continue
+                if newest is None or stamp > newest:
+                    newest = stamp
+        return newest
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Quota Ledger - FactSet Pipeline v3.6.0
+Per-key, per-day record of Google CSE calls and quota exhaustion (SQLite).
+
+- Every process and thread consumes daily budget through one atomic update
+- Keys seen exhausted (429) today are skipped without another round-trip
+- APIKeyManager picks the key with the most remaining quota
+- Ledger files from parallel batch jobs can be merged (max calls, earliest exhaustion)
+"""
+
+import os
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:
+    ZoneInfo = None
+
+
+class QuotaLedger:
+    """Shared daily quota ledger for Google Search API keys"""
+
+    DEFAULT_LEDGER_PATH = os.path.join('cache', 'search', 'quota_ledger.sqlite3')
+
+    def __init__(self, ledger_path: Optional[str] = None, daily_limit: int = 100):
+        self.ledger_path = ledger_path or self.DEFAULT_LEDGER_PATH
+        self.daily_limit = daily_limit
+        self._lock = threading.Lock()
+
+        ledger_dir = os.path.dirname(self.ledger_path)
+        if ledger_dir:
+            os.makedirs(ledger_dir, exist_ok=True)
+
+        # isolation_level=None: BEGIN IMMEDIATE below holds the cross-process write lock
+        self._conn = sqlite3.connect(self.ledger_path, timeout=30, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS quota_ledger (
+                key_id TEXT NOT NULL,
+                day TEXT NOT NULL,
+                calls INTEGER NOT NULL DEFAULT 0,
+                exhausted_at TEXT,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (key_id, day)
+            )
+            """
+        )
+
+    @staticmethod
+    def key_id(api_key: str) -> str:
+        """Stable, non-secret identifier for an API key"""
+        return hashlib.sha1(api_key.encode('utf-8')).hexdigest()[:12]
+
+    @staticmethod
+    def quota_day() -> str:
+        """Google CSE daily quota resets at midnight Pacific time"""
+        if ZoneInfo is not None:
+            try:
+                return datetime.now(ZoneInfo('America/Los_Angeles')).strftime('%Y-%m-%d')
+            except Exception:
+                pass
+        return datetime.now().strftime('%Y-%m-%d')
+
+    def _transaction(self, statements):
+        """Run statements(conn) inside BEGIN IMMEDIATE; returns its result"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements(self._conn)
+                self._conn.execute("COMMIT")
+                return result
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def try_consume(self, key_id: str, daily_limit: Optional[int] = None) -> bool:
+        """Atomically count one call for key_id; False if the key has no quota left today"""
+        limit = self.daily_limit if daily_limit is None else daily_limit
+        day = self.quota_day()
+
+        def consume(conn):
+            row = conn.execute(
+                "SELECT calls, exhausted_at FROM quota_ledger WHERE key_id = ? AND day = ?",
+                (key_id, day)
+            ).fetchone()
+            calls, exhausted_at = row if row else (0, None)
+            if exhausted_at or (limit and calls >= limit):
+                return False
+            conn.execute(
+                "INSERT INTO quota_ledger (key_id, day, calls, updated_at) VALUES (?, ?, 1, ?) "
+                "ON CONFLICT(key_id, day) DO UPDATE SET calls = calls + 1, updated_at = excluded.updated_at",
+                (key_id, day, datetime.now().isoformat())
+            )
+            return True
+
+        return self._transaction(consume)
+
+    def record_exhausted(self, key_id: str):
+        """Google reported the key's quota exceeded: skip it for the rest of the day"""
+        day = self.quota_day()
+        now = datetime.now().isoformat()
+
+        def mark(conn):
+            conn.execute(
+                "INSERT INTO quota_ledger (key_id, day, calls, exhausted_at, updated_at) VALUES (?, ?, 0, ?, ?) "
+                "ON CONFLICT(key_id, day) DO UPDATE SET "
+                "exhausted_at = COALESCE(exhausted_at, excluded.exhausted_at), updated_at = excluded.updated_at",
+                (key_id, day, now, now)
+            )
+
+        self._transaction(mark)
+
+    def get_today(self, key_id: str) -> Dict[str, Any]:
+        """Calls, exhaustion and remaining quota for key_id today"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT calls, exhausted_at FROM quota_ledger WHERE key_id = ? AND day = ?",
+                (key_id, self.quota_day())
+            ).fetchone()
+        calls, exhausted_at = row if row else (0, None)
+        if exhausted_at:
+            remaining = 0
+        elif self.daily_limit:
+            remaining = max(0, self.daily_limit - calls)
+        else:
+            remaining = None
+        return {'calls': calls, 'exhausted_at': exhausted_at, 'remaining': remaining}
+
+    def is_exhausted(self, key_id: str) -> bool:
+        return self.get_today(key_id)['remaining'] == 0
+
+    def best_key(self, key_ids: List[str], candidates: List[int]) -> Optional[int]:
+        """Index (into key_ids) of the candidate with the most remaining quota today"""
+        best_index, best_remaining = None, -1
+        for index in candidates:
+            remaining = self.get_today(key_ids[index])['remaining']
+            remaining = float('inf') if remaining is None else remaining
+            if remaining > best_remaining:
+                best_index, best_remaining = index, remaining
+        return best_index if best_remaining > 0 else None
+
+    def remaining_total(self, key_ids: List[str]) -> Optional[int]:
+        """Remaining calls today across keys (None = unlimited)"""
+        if not self.daily_limit:
+            return None
+        return sum(self.get_today(key_id)['remaining'] for key_id in key_ids)
+
+    def merge(self, other_path: str) -> int:
+        """Merge another ledger file (e.g. from a parallel batch job); returns rows merged"""
+        other = sqlite3.connect(other_path)
+        try:
+            rows = other.execute(
+                "SELECT key_id, day, calls, exhausted_at, updated_at FROM quota_ledger"
+            ).fetchall()
+        finally:
+            other.close()
+
+        def merge_rows(conn):
+            for key_id, day, calls, exhausted_at, updated_at in rows:
+                conn.execute(
+                    "INSERT INTO quota_ledger (key_id, day, calls, exhausted_at, updated_at) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(key_id, day) DO UPDATE SET "
+                    "calls = MAX(calls, excluded.calls), "
+                    "exhausted_at = CASE WHEN exhausted_at IS NULL THEN excluded.exhausted_at "
+                    "WHEN excluded.exhausted_at IS NULL THEN exhausted_at "
+                    "ELSE MIN(exhausted_at, excluded.exhausted_at) END, "
+                    "updated_at = MAX(updated_at, excluded.updated_at)",
+                    (key_id, day, calls, exhausted_at, updated_at)
+                )
+            return len(rows)
+
+        return self._transaction(merge_rows)
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
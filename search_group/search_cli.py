@@ -17,6 +17,7 @@ FIXED: SearchEngine initialization to include config parameter
 
 import os
 import sys
+import threading
 import csv
 import json
 import time
@@ -25,7 +26,8 @@ import argparse
 import logging
 import shutil
 from pathlib import Path
-from datetime import datetime
+from collections import Counter
+from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 
 # Set UTF-8 encoding for Windows console
@@ -68,6 +70,8 @@ __date__ = "2025-07-01"
 try:
     from search_engine import SearchEngine
     from api_manager import APIManager, AllKeysExhaustedException, QuotaExceededException
+    from async_search import AsyncSearchRunner
+    from pattern_scheduler import PatternScheduler
 except ImportError as e:
     print(f"Error importing search components: {e}")
     print("Make sure search_engine.py and api_manager.py are in the same directory")
@@ -86,6 +90,7 @@ class SearchConfig:
             "version": "3.5.1",
             "search": {
                 "rate_limit_delay": float(os.getenv("SEARCH_RATE_LIMIT_PER_SECOND", "1.0")),
+                "rate_limit_burst": int(os.getenv("SEARCH_RATE_LIMIT_BURST", "3")),
                 "daily_quota": int(os.getenv("SEARCH_DAILY_QUOTA", "100")),
                 "num_results_per_query": 10,
                 "date_restrict": "y1",
@@ -95,7 +100,27 @@ class SearchConfig:
                 "max_backoff_seconds": 300,
                 "enable_debug_logging": True,
                 "comprehensive_search": True,
-                "content_validation": True
+                "content_validation": True,
+                "dedupe_urls_per_run": os.getenv("SEARCH_DEDUPE_URLS_PER_RUN", "false").lower() == "true",
+                # Save multi-company articles under every watchlist company they cover
+                "route_multi_company": os.getenv("SEARCH_ROUTE_MULTI_COMPANY", "true").lower() != "false",
+                # Rank CSE items and skip hopeless ones before fetching
+                "snippet_triage": os.getenv("SEARCH_SNIPPET_TRIAGE", "true").lower() != "false",
+                # Companies OR-ed into one batched query before per-company queries (0 = off)
+                "batch_query_size": int(os.getenv("SEARCH_BATCH_QUERY_SIZE", "0")),
+                "concurrency": int(os.getenv("SEARCH_CONCURRENCY", "1")),
+                "key_partition": os.getenv("SEARCH_KEY_PARTITION", ""),
+                # Adaptive pattern scheduling: yield order + stop once saturated
+                "adaptive_patterns": os.getenv("SEARCH_ADAPTIVE_PATTERNS", "true").lower() != "false",
+                "saturation_results": int(os.getenv("SEARCH_SATURATION_RESULTS", "3")),
+                "saturation_quality": float(os.getenv("SEARCH_SATURATION_QUALITY", "8")),
+                "saturation_recent_days": int(os.getenv("SEARCH_SATURATION_RECENT_DAYS", "90")),
+                "pattern_report_path": "data/reports/factset_query_pattern_summary_latest.csv",
+                # Pattern yield store written by the Process Group
+                "pattern_yield_path": "data/reports/pattern_yield_latest.json",
+                "prune_patterns": os.getenv("SEARCH_PRUNE_PATTERNS", "true").lower() != "false",
+                # Skip companies searched within this many hours (0 = never skip)
+                "freshness_hours": float(os.getenv("SEARCH_FRESHNESS_HOURS", "0"))
             },
             "api": {
                 # Primary API credentials
@@ -150,7 +175,37 @@ class SearchConfig:
             "caching": {
                 "enabled": True,
                 "max_age_hours": 24,
-                "max_cache_size_mb": 100
+                "max_cache_size_mb": int(os.getenv("SEARCH_CACHE_MAX_MB", "100")),
+                "memory_entries": int(os.getenv("SEARCH_CACHE_MEMORY_ENTRIES", "512"))
+            },
+            "fetch": {
+                "max_workers": int(os.getenv("FETCH_MAX_WORKERS", "8")),
+                "per_host_limit": int(os.getenv("FETCH_PER_HOST_LIMIT", "4")),
+                "timeout": float(os.getenv("FETCH_TIMEOUT", "10")),
+                "page_cache": os.getenv("PAGE_CACHE", "true").lower() != "false",
+                "page_cache_path": "cache/search/page_cache.sqlite3",
+                "page_cache_max_age_days": int(os.getenv("PAGE_CACHE_MAX_AGE_DAYS", "30")),
+                # Cached copy replaces a page only on timeouts / connection errors / 429 / 5xx
+                "stale_max_age_hours": float(os.getenv("FETCH_STALE_MAX_AGE_HOURS", "72")),
+                # Per-domain adaptive timeouts (p95 x multiplier, capped at timeout) and circuit breaker
+                "domain_policy": os.getenv("FETCH_DOMAIN_POLICY", "true").lower() != "false",
+                "domain_stats_path": "cache/search/domain_stats.sqlite3",
+                "min_timeout": float(os.getenv("FETCH_MIN_TIMEOUT", "2")),
+                "timeout_multiplier": float(os.getenv("FETCH_TIMEOUT_MULTIPLIER", "2")),
+                # Circuit opens after N failures spanning >= min span; cooldown doubles per failed probe
+                "circuit_failures": int(os.getenv("FETCH_CIRCUIT_FAILURES", "3")),
+                "circuit_min_span_minutes": float(os.getenv("FETCH_CIRCUIT_MIN_SPAN_MINUTES", "5")),
+                "circuit_cooldown_minutes": float(os.getenv("FETCH_CIRCUIT_COOLDOWN_MINUTES", "15")),
+                "circuit_max_cooldown_hours": float(os.getenv("FETCH_CIRCUIT_MAX_COOLDOWN_HOURS", "24")),
+                # Primary sources every pattern targets: never skipped, only adaptive timeouts
+                "circuit_exempt_domains": [
+                    domain for domain in os.getenv("FETCH_CIRCUIT_EXEMPT_DOMAINS", "cnyes.com").split(",") if domain.strip()
+                ]
+            },
+            "content": {
+                "normalize_html": os.getenv("CONTENT_NORMALIZE_HTML", "true").lower() != "false",
+                "archive_raw_html": os.getenv("ARCHIVE_RAW_HTML", "false").lower() == "true",
+                "raw_archive_dir": "cache/raw_html/"
             },
             "files": {
                 "watchlist_path": "StockID_TWSE_TPEX.csv",
@@ -234,12 +289,18 @@ class SearchConfig:
 class SearchCLI:
     """v3.5.1 Search Group CLI with API Key Rotation Support"""
     
-    def __init__(self):
+    def __init__(self, concurrency: Optional[int] = None, batch_query_size: Optional[int] = None):
         self.config = SearchConfig()
+        # Company pipelines run at once (>1 enables the asyncio search mode)
+        self.concurrency = max(1, concurrency if concurrency is not None else self.config.get("search.concurrency", 1))
+        if batch_query_size is not None:
+            self.config.config["search"]["batch_query_size"] = batch_query_size
         self.api_manager = APIManager(self.config)
         # FIXED: Pass both api_manager and config to SearchEngine
         self.search_engine = SearchEngine(self.api_manager, self.config)
         self.logger = self._setup_logger()
+        # Guards progress.json / failures.json when company pipelines run concurrently
+        self._state_lock = threading.Lock()
         
         # Ensure directories exist
         self._ensure_directories()
@@ -364,13 +425,65 @@ class SearchCLI:
         try:
             with open(file_path, 'w', encoding='utf-8') as f:
                 f.write(content)
+            
+            # Keep the raw page in the compressed archive when enabled
+            if metadata.get('raw_content'):
+                archive_path = self.search_engine.archive_raw_content(metadata, filename)
+                if archive_path:
+                    self.logger.debug(f"🗄️ Archived raw HTML: {archive_path}")
             return filename
         except Exception as e:
             self.logger.error(f"Failed to save MD file {filename}: {e}")
             return ""
     
-    def _update_progress_multiple(self, symbol: str, filenames: List[str], results_data: List[Dict]):
-        """Update search progress with key rotation tracking"""
+    def _save_routed_results(self) -> int:
+        """Save articles routed to watchlist companies (other companies' searches or the batched pass)"""
+        saved_total = 0
+        for routed_symbol, routed_results in self.search_engine.take_routed_results().items():
+            saved_files = []
+            for i, result_data in enumerate(routed_results, 1):
+                _, md_content = self.search_engine.generate_md_file_with_md_date(result_data, i)
+                saved_filename = self._save_md_file_indexed(
+                    routed_symbol, result_data['company'], md_content, result_data, i
+                )
+                if saved_filename and saved_filename not in saved_files:
+                    saved_files.append(saved_filename)
+            
+            if saved_files:
+                saved_total += len(saved_files)
+                routed_name = routed_results[0]['company']
+                sources = ', '.join(sorted({r.get('routed_from', '?') for r in routed_results}))
+                print(f"🔀 {routed_symbol} {routed_name}: {len(saved_files)} MD files routed from {sources} search")
+                self.logger.info(f"Routed {len(saved_files)} results from {sources} search to {routed_symbol}: {saved_files}")
+                with self._state_lock:
+                    self._update_progress_multiple(routed_symbol, saved_files, routed_results, routed=True)
+        return saved_total
+    
+    def _run_batched_pass(self, companies: List[Dict[str, str]], min_quality: Optional[int]) -> List[Dict[str, str]]:
+        """Batched multi-symbol queries first; returns companies that still need their own queries"""
+        if self.search_engine.batch_query_size <= 1 or len(companies) < 2:
+            return companies
+        
+        min_quality_threshold = min_quality if min_quality is not None else self.config.get("quality.min_quality_threshold", 3)
+        try:
+            missed = self.search_engine.search_batched(companies, min_quality_threshold)
+        finally:
+            self._save_routed_results()
+        
+        covered = len(companies) - len(missed)
+        print(f"📦 Batched pass: {covered}/{len(companies)} companies covered with "
+              f"{self.search_engine.last_api_calls} API calls, {len(missed)} need their own queries")
+        self.logger.info(f"Batched pass covered {covered}/{len(companies)} companies "
+                         f"({self.search_engine.last_api_calls} API calls)")
+        return missed
+    
+    def _update_progress_multiple(self, symbol: str, filenames: List[str], results_data: List[Dict],
+                                  routed: bool = False):
+        """Update search progress with key rotation tracking
+        
+        routed=True records files routed from other companies' searches: they are merged into
+        routed_filenames / routed_queries and never replace this company's own search stats.
+        """
         progress_file = Path("cache/search/progress.json")
         progress_file.parent.mkdir(parents=True, exist_ok=True)
         
@@ -415,6 +528,26 @@ class SearchCLI:
                 validation_stats['quality_scores_invalid'].append(quality_score)
                 validation_stats['validation_reasons'].append(validation_info.get('reason', 'Unknown'))
         
+        # Files routed here from other companies' searches (kept across own searches)
+        previous = progress.get(symbol) if isinstance(progress.get(symbol), dict) else {}
+        routed_filenames = list(previous.get('routed_filenames', []))
+        routed_queries = Counter(previous.get('routed_queries', {}))
+        if routed:
+            routed_filenames = list(dict.fromkeys(routed_filenames + filenames))
+            routed_queries.update(data.get('search_query', '') for data in results_data if data.get('search_query'))
+            if previous:
+                entry = dict(previous)
+                entry['routed_filenames'] = routed_filenames
+                entry['routed_queries'] = dict(routed_queries)
+                entry['file_count'] = len(set(entry.get('filenames', [])) | set(routed_filenames))
+                entry['routed_at'] = datetime.now().isoformat()
+                progress[symbol] = entry
+                with open(progress_file, 'w', encoding='utf-8') as f:
+                    json.dump(progress, f, indent=2, ensure_ascii=False)
+                return
+            # First entry for this company: no own search yet, so no own filenames / search stats
+            filenames = []
+        
         # Get key rotation stats
         key_status = self.api_manager.get_key_status()
         
@@ -428,15 +561,41 @@ class SearchCLI:
             'unique_content_count': len(set(content_hashes)),
             'validation_stats': validation_stats,
             'total_patterns_executed': getattr(self.search_engine, 'last_patterns_executed', 0),
+            'total_patterns_skipped': getattr(self.search_engine, 'last_patterns_skipped', 0),
+            'pattern_stats': getattr(self.search_engine, 'last_pattern_stats', {}),
+            'productive_queries': dict(Counter(
+                data.get('search_query', '') for data in results_data if data.get('search_query')
+            )),
             'total_api_calls': getattr(self.search_engine, 'last_api_calls', 0),
+            'duplicate_urls_skipped': getattr(self.search_engine, 'last_duplicate_urls_skipped', 0),
             'key_rotations_during_search': self.api_manager.stats.stats['key_rotations'],
             'api_keys_used': key_status['current_key_index'],
             'version': __version__
         }
+        if routed:
+            for key in ('total_patterns_executed', 'total_patterns_skipped', 'total_api_calls',
+                        'duplicate_urls_skipped', 'key_rotations_during_search'):
+                progress[symbol][key] = 0
+            progress[symbol]['pattern_stats'] = {}
+            progress[symbol]['productive_queries'] = {}
+            # Own patterns never ran: not completed until this company's own search is recorded
+            progress[symbol]['routed_at'] = progress[symbol].pop('completed_at')
+        if routed_filenames:
+            progress[symbol]['routed_filenames'] = routed_filenames
+            progress[symbol]['routed_queries'] = dict(routed_queries)
+            progress[symbol]['file_count'] = len(set(filenames) | set(routed_filenames))
         
         with open(progress_file, 'w', encoding='utf-8') as f:
             json.dump(progress, f, indent=2, ensure_ascii=False)
     
+    @staticmethod
+    def _is_search_completed(entry: Any) -> bool:
+        """Progress entry from this company's own search (routed-only entries do not count)"""
+        if not isinstance(entry, dict) or not entry.get('completed_at'):
+            return False
+        # Routed-only entries written before they stopped carrying completed_at
+        return not (entry.get('routed_at') and not entry.get('pattern_stats') and not entry.get('total_api_calls'))
+
     def _is_already_processed(self, symbol: str) -> bool:
         """Check if company already has MD files"""
         output_dir = Path(self.config.get("files.output_dir"))
@@ -449,6 +608,26 @@ class SearchCLI:
         
         return False
     
+    def _skip_fresh_companies(self, companies: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Drop companies whose newest MD file is inside the freshness window"""
+        freshness_hours = float(self.config.get("search.freshness_hours", 0) or 0)
+        if freshness_hours <= 0:
+            return companies
+        
+        cutoff = datetime.now() - timedelta(hours=freshness_hours)
+        output_dir = self.config.get("files.output_dir")
+        remaining = []
+        for company in companies:
+            last_searched = PatternScheduler.last_searched_at(company['symbol'], output_dir)
+            if last_searched is None or last_searched < cutoff:
+                remaining.append(company)
+        
+        skipped = len(companies) - len(remaining)
+        if skipped:
+            print(f"⏭️ Skipping {skipped} companies searched within the last {freshness_hours:g}h")
+            self.logger.info(f"Freshness window: skipped {skipped} companies (< {freshness_hours:g}h old)")
+        return remaining
+    
     def _record_failure(self, symbol: str, error: str):
         """Record search failure with key rotation context"""
         failures_file = Path("cache/search/failures.json")
@@ -559,7 +738,10 @@ class SearchCLI:
             print(f"\n🔍 Comprehensive Search with Key Rotation: {symbol} {name}")
             print(f"📊 Saving {result_count} results, min quality: {min_quality_threshold}")
             print(f"🔑 Starting with API Key #{key_status['current_key_index']} ({key_status['available_keys']} available)")
-            print(f"🚀 All search patterns will execute (no early stopping)")
+            if self.search_engine.pattern_scheduler:
+                print(f"🚀 Patterns ordered by historical yield, early stop when saturated")
+            else:
+                print(f"🚀 All search patterns will execute (no early stopping)")
             print(f"🛡️  Enhanced content validation enabled - detects wrong companies")
             print(f"⚠️  Invalid content (wrong companies) automatically gets score 0")
             
@@ -567,6 +749,7 @@ class SearchCLI:
             
             # Search company and get multiple results
             search_results = self.search_engine.search_comprehensive(symbol, name, result_count, min_quality_threshold)
+            self._save_routed_results()
             
             if search_results and len(search_results) > 0:
                 successful_files = []
@@ -617,7 +800,8 @@ class SearchCLI:
                 # Update progress with unique files only
                 if successful_files:
                     high_quality_results = [r for r in search_results if r.get('quality_score', 0) >= min_quality_threshold]
-                    self._update_progress_multiple(symbol, successful_files, high_quality_results)
+                    with self._state_lock:
+                        self._update_progress_multiple(symbol, successful_files, high_quality_results)
                 
                 # Enhanced summary with key rotation stats
                 total_found = len(search_results)
@@ -669,6 +853,14 @@ class SearchCLI:
                 key_rotations = self.api_manager.stats.stats['key_rotations']
                 final_key_status = self.api_manager.get_key_status()
                 
+                routed_coverage = getattr(self.search_engine, 'last_routed_coverage', 0)
+                if routed_coverage:
+                    # Saved earlier this run from other companies' articles (progress already recorded)
+                    print(f"🔀 {symbol} covered by {routed_coverage} routed articles this run - own patterns skipped")
+                    print(f"📊 Search stats: {patterns_executed} patterns executed, {api_calls_made} API calls")
+                    self.logger.info(f"🔀 {symbol} covered by {routed_coverage} routed articles, own patterns skipped")
+                    return True
+                
                 print(f"❌ {symbol} - no financial data found")
                 print(f"📊 Search stats: {patterns_executed} patterns executed, {api_calls_made} API calls")
                 print(f"🔑 Key rotation: {key_rotations} rotations, ended with key #{final_key_status['current_key_index']}")
@@ -695,6 +887,19 @@ class SearchCLI:
         print(f"🛡️  Enhanced content validation enabled for all companies")
         self.logger.info(f"Starting comprehensive batch search with key rotation for {len(symbols)} companies")
         
+        names = {c['symbol']: c['name'] for c in self._load_watchlist_csv()}
+        companies = self._skip_fresh_companies(
+            [{'symbol': symbol, 'name': names.get(symbol, '')} for symbol in symbols]
+        )
+        companies = self._run_batched_pass(companies, min_quality)
+        symbols = [company['symbol'] for company in companies]
+        self._print_quota_plan(len(symbols))
+        
+        if self.concurrency > 1:
+            successful = AsyncSearchRunner(self, self.concurrency).run(companies, result_count, min_quality)
+            self._print_async_summary("Batch", successful, len(symbols))
+            return True
+        
         successful = 0
         for i, symbol in enumerate(symbols, 1):
             print(f"\n[{i}/{len(symbols)}] Processing {symbol}...")
@@ -707,13 +912,15 @@ class SearchCLI:
         
         print(f"\n📊 Batch completed: {successful}/{len(symbols)} successful")
         print(f"🔑 Total key rotations: {total_rotations}, final key: #{final_key_status['current_key_index']}")
+        print(f"♻️ Duplicate URLs skipped this run: {self.search_engine.run_duplicate_urls_skipped}")
+        self.search_engine.print_run_summary()
         self.logger.info(f"Batch completed: {successful}/{len(symbols)} successful with {total_rotations} key rotations")
         return True
     
     def cmd_search_all(self, result_count: str = '1', min_quality: int = None) -> bool:
         """Search all companies with key rotation support"""
         try:
-            companies = self._load_watchlist_csv()
+            companies = self._run_batched_pass(self._skip_fresh_companies(self._load_watchlist_csv()), min_quality)
             total = len(companies)
             key_status = self.api_manager.get_key_status()
             
@@ -726,6 +933,12 @@ class SearchCLI:
             print(f"🔄 Automatic key rotation on quota exceeded")
             
             self.logger.info(f"Starting comprehensive search with key rotation for {total} companies")
+            self._print_quota_plan(total)
+            
+            if self.concurrency > 1:
+                successful = AsyncSearchRunner(self, self.concurrency).run(companies, result_count, min_quality)
+                self._print_async_summary("Search all", successful, total)
+                return True
             
             successful = 0
             for i, company in enumerate(companies, 1):
@@ -767,6 +980,8 @@ class SearchCLI:
             total_rotations = self.api_manager.stats.stats['key_rotations']
             
             print(f"\n🎉 Comprehensive search with key rotation completed! {successful}/{total} companies successful")
+            print(f"♻️ Duplicate URLs skipped this run: {self.search_engine.run_duplicate_urls_skipped}")
+            self.search_engine.print_run_summary()
             print(f"🔑 Final key status: #{final_key_status['current_key_index']}, {total_rotations} total rotations")
             self.logger.info(f"Search completed: {successful}/{total} successful with {total_rotations} key rotations")
             return True
@@ -794,15 +1009,19 @@ class SearchCLI:
             try:
                 with open(progress_file, 'r', encoding='utf-8') as f:
                     progress = json.load(f)
-                completed = set(progress.keys())
-                print(f"📋 Found {len(completed)} already completed companies")
+                completed = {symbol for symbol, entry in progress.items() if self._is_search_completed(entry)}
+                routed_only = len(progress) - len(completed)
+                print(f"📋 Found {len(completed)} already completed companies"
+                      + (f" ({routed_only} with only routed articles will be searched)" if routed_only else ""))
                 self.logger.info(f"Found {len(completed)} already completed companies")
             except:
                 pass
         
         # Load companies and filter out completed ones
         companies = self._load_watchlist_csv()
-        remaining = [c for c in companies if c['symbol'] not in completed]
+        remaining = self._run_batched_pass(
+            self._skip_fresh_companies([c for c in companies if c['symbol'] not in completed]), min_quality
+        )
         
         if not remaining:
             print("✅ All companies already completed")
@@ -810,8 +1029,14 @@ class SearchCLI:
             return True
         
         print(f"🚀 Resuming with {len(remaining)} remaining companies...")
+        self._print_quota_plan(len(remaining))
         self.logger.info(f"Resuming with {len(remaining)} remaining companies...")
         
+        if self.concurrency > 1:
+            successful = AsyncSearchRunner(self, self.concurrency).run(remaining, result_count, min_quality)
+            self._print_async_summary("Resume", successful, len(remaining))
+            return True
+        
         # Process remaining companies
         successful = 0
         for i, company in enumerate(remaining, 1):
@@ -844,10 +1069,60 @@ class SearchCLI:
         total_rotations = self.api_manager.stats.stats['key_rotations']
         
         print(f"\n🎉 Resume with key rotation completed! {successful}/{len(remaining)} companies successful")
+        print(f"♻️ Duplicate URLs skipped this run: {self.search_engine.run_duplicate_urls_skipped}")
+        self.search_engine.print_run_summary()
         print(f"🔑 Final key status: #{final_key_status['current_key_index']}, {total_rotations} total rotations")
         self.logger.info(f"Resume completed: {successful}/{len(remaining)} successful with {total_rotations} key rotations")
         return True
     
+    def _print_quota_plan(self, company_count: int):
+        """Check today's remaining quota against the calls this run needs"""
+        patterns_per_company = sum(
+            len(patterns) for patterns in self.search_engine._get_all_search_patterns('', '').values()
+        )
+        plan = self.api_manager.get_quota_plan(company_count * patterns_per_company)
+        if plan['remaining_calls'] is None:
+            return
+        
+        print(f"📒 Quota plan: up to {plan['planned_calls']} API calls needed, "
+              f"{plan['remaining_calls']} remaining today across keys")
+        if not plan['sufficient']:
+            print(f"⚠️  Quota may run out before all {company_count} companies are searched "
+                  f"(cached queries do not count)")
+            self.logger.warning(f"Quota plan insufficient: need {plan['planned_calls']}, have {plan['remaining_calls']}")
+    
+    def cmd_quota(self, merge_paths: Optional[List[str]] = None):
+        """Show today's quota ledger; optionally merge ledgers from other batch jobs"""
+        ledger = self.api_manager.quota_ledger
+        for path in merge_paths or []:
+            try:
+                merged = ledger.merge(path)
+                print(f"📥 Merged {merged} ledger rows from {path}")
+            except Exception as e:
+                print(f"❌ Failed to merge ledger {path}: {e}")
+        
+        print(f"\n📒 Quota Ledger ({ledger.quota_day()}, Pacific time) - {ledger.ledger_path}")
+        for key_detail in self.api_manager.get_key_status()['key_details']:
+            status = "🔴 EXHAUSTED" if key_detail['remaining_today'] == 0 else "🟢"
+            preferred = " (preferred)" if key_detail['preferred'] else ""
+            print(f"   Key #{key_detail['key_number']}{preferred}: {key_detail['calls_today']} calls, "
+                  f"{key_detail['remaining_today']} remaining {status}")
+        remaining = ledger.remaining_total(self.api_manager.key_manager.key_ids)
+        if remaining is not None:
+            print(f"   📊 Total remaining today: {remaining}")
+    
+    def _print_async_summary(self, label: str, successful: int, total: int):
+        """Final key/dedup summary after an async (concurrent) run"""
+        final_key_status = self.api_manager.get_key_status()
+        total_rotations = self.api_manager.stats.stats['key_rotations']
+        
+        print(f"🎉 {label} completed! {successful}/{total} companies successful")
+        print(f"♻️ Duplicate URLs skipped this run: {self.search_engine.run_duplicate_urls_skipped}")
+        self.search_engine.print_run_summary()
+        print(f"🔑 Final key status: #{final_key_status['current_key_index']}, {total_rotations} total rotations")
+        self.logger.info(f"{label} completed: {successful}/{total} successful with {total_rotations} key rotations "
+                         f"(concurrency {self.concurrency})")
+    
     def show_status(self):
         """Show current status with key rotation information"""
         print("\n📊 === Search Group Status with Key Rotation ===")
@@ -892,12 +1167,16 @@ class SearchCLI:
                 print(f"      ⏰ Quota Exceeded: {key_detail['quota_exceeded_at']}")
             if key_detail['last_used']:
                 print(f"      🕐 Last Used: {key_detail['last_used']}")
+            if key_detail.get('remaining_today') is not None:
+                print(f"      📒 Ledger Today: {key_detail['calls_today']} calls, {key_detail['remaining_today']} remaining")
         
         # API statistics
         api_stats = self.api_manager.stats.get_summary()
         print(f"\n📞 API Statistics:")
         print(f"   📞 Total API Calls: {api_stats['api_calls']}")
-        print(f"   💾 Cache Hit Rate: {api_stats['cache_hit_rate']}")
+        print(f"   💾 Cache Hit Rate: {api_stats['cache_hit_rate']} "
+              f"(memory {api_stats['cache_memory_hits']}, disk {api_stats['cache_disk_hits']}, "
+              f"evicted {api_stats['cache_evictions']})")
         print(f"   🔄 Key Rotations: {api_stats['key_rotations']}")
         print(f"   ✅ Success Rate: {api_stats['success_rate']}")
         
@@ -913,7 +1192,10 @@ class SearchCLI:
             try:
                 with open(progress_file, 'r', encoding='utf-8') as f:
                     progress = json.load(f)
-                print(f"\n✅ Companies Completed: {len(progress)}")
+                completed_count = sum(1 for entry in progress.values() if self._is_search_completed(entry))
+                print(f"\n✅ Companies Completed: {completed_count}")
+                if len(progress) > completed_count:
+                    print(f"🔀 Covered only by routed articles: {len(progress) - completed_count}")
                 
                 # Quality and validation statistics
                 all_scores = []
@@ -943,10 +1225,10 @@ class SearchCLI:
                 print(f"📁 Total Unique Files: {total_unique_files}")
                 print(f"🎯 Pure Content Hash Efficiency: 100% - no duplicates by design")
                 
-                if total_patterns_executed > 0:
-                    avg_patterns = total_patterns_executed / len(progress)
-                    avg_api_calls = total_api_calls / len(progress)
-                    avg_rotations = total_key_rotations / len(progress)
+                if total_patterns_executed > 0 and completed_count:
+                    avg_patterns = total_patterns_executed / completed_count
+                    avg_api_calls = total_api_calls / completed_count
+                    avg_rotations = total_key_rotations / completed_count
                     print(f"📍 Avg Patterns Executed: {avg_patterns:.1f}/company")
                     print(f"📡 Avg API Calls: {avg_api_calls:.1f}/company")
                     print(f"🔄 Avg Key Rotations: {avg_rotations:.1f}/company")
@@ -968,13 +1250,25 @@ class SearchCLI:
         except:
             pass
     
+    # Same-day quota usage and rate-limit buckets: deleting them would overspend the keys
+    PRESERVED_CACHE_FILES = ('quota_ledger.sqlite3', 'rate_limits.sqlite3')
+
     def clean_cache(self):
-        """Clean temporary files"""
+        """Clean temporary files (quota ledger and rate-limit state are kept)"""
         cache_dir = Path(self.config.get("files.cache_dir"))
         if cache_dir.exists():
-            shutil.rmtree(cache_dir)
-            cache_dir.mkdir(parents=True, exist_ok=True)
+            kept = []
+            for path in cache_dir.iterdir():
+                # SQLite side files (-wal / -shm) belong to the preserved databases too
+                if any(path.name.startswith(name) for name in self.PRESERVED_CACHE_FILES):
+                    kept.append(path.name)
+                elif path.is_dir():
+                    shutil.rmtree(path)
+                else:
+                    path.unlink()
             print("🧹 Cache cleaned")
+            if kept:
+                print(f"📒 Kept quota / rate-limit state: {', '.join(sorted(kept))}")
             self.logger.info("Cache cleaned")
     
     def reset_all(self):
@@ -1008,15 +1302,20 @@ Examples:
   python search_cli.py search --company 2354 --count all    # Search specific company (all results)
   python search_cli.py search --batch 2330,2454,2354 --count 2  # Search batch with rotation
   python search_cli.py search --resume --count all          # Resume interrupted search
+  python search_cli.py search --all --concurrency 4         # 4 company pipelines at once (asyncio)
+  python search_cli.py search --all --batch-queries 5       # 5 symbols per query first, per-company only for misses
   
   python search_cli.py validate                             # Validate setup and key status
   python search_cli.py status                               # Show progress with key rotation info
   python search_cli.py clean                                # Clean cache
+  python search_cli.py quota                                # Today's per-key quota ledger
+  python search_cli.py quota --merge batch1.sqlite3 ...     # Merge ledgers from other batch jobs
 
 API KEY ROTATION FEATURES:
   - Automatic rotation on quota exceeded (429 errors)
   - Support for up to 15 API keys (GOOGLE_SEARCH_API_KEY, GOOGLE_SEARCH_API_KEY1-14)
-  - Randomized start index to distribute load across parallel batches
+  - Shared quota ledger picks the key with the most remaining quota
+  - SEARCH_KEY_PARTITION=batch/total gives parallel batches disjoint preferred keys
   - Intelligent key status tracking and monitoring
   - Enhanced error handling and recovery
   - Comprehensive key usage statistics
@@ -1039,10 +1338,19 @@ API KEY ROTATION FEATURES:
     search_parser.add_argument('--min-quality', type=int, default=None,
                              help='Minimum quality score to save (0-10, default: 3)')
     
+    search_parser.add_argument('--concurrency', type=int, default=None,
+                             help='Company pipelines to run concurrently (default: SEARCH_CONCURRENCY or 1)')
+    
+    search_parser.add_argument('--batch-queries', type=int, default=None, metavar='N',
+                             help='OR N symbols into one query before per-company queries (default: SEARCH_BATCH_QUERY_SIZE or 0 = off)')
+    
     # Utility commands
     subparsers.add_parser('validate', help='Validate setup and key status')
     subparsers.add_parser('status', help='Show status with key rotation information')
     subparsers.add_parser('clean', help='Clean cache')
+    quota_parser = subparsers.add_parser('quota', help="Show today's per-key quota ledger")
+    quota_parser.add_argument('--merge', nargs='+', metavar='LEDGER',
+                              help='Merge quota ledger files from other batch jobs first')
     subparsers.add_parser('reset', help='Reset all data')
     
     return parser
@@ -1057,7 +1365,8 @@ def main():
         return 1
     
     try:
-        cli = SearchCLI()
+        cli = SearchCLI(concurrency=getattr(args, 'concurrency', None),
+                        batch_query_size=getattr(args, 'batch_queries', None))
         
         if args.command == 'search':
             # Parse count parameter
@@ -1068,6 +1377,7 @@ def main():
                 success = cli.cmd_search_all(result_count, min_quality)
             elif args.company:
                 success = cli.cmd_search_company(args.company, result_count, min_quality)
+                cli.search_engine.print_run_summary()
             elif args.batch:
                 symbols = [s.strip() for s in args.batch.split(',')]
                 success = cli.cmd_search_batch(symbols, result_count, min_quality)
@@ -1091,6 +1401,10 @@ def main():
             cli.clean_cache()
             return 0
             
+        elif args.command == 'quota':
+            cli.cmd_quota(args.merge)
+            return 0
+            
         elif args.command == 'reset':
             cli.reset_all()
             return 0
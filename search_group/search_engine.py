@@ -6,6 +6,12 @@ Enhanced search engine with Multi-Layer Content Validation
 - Layer 2: Combined pattern matching (symbol+name together)
 - Layer 3: Proximity check (symbol and name within 200 chars)
 - Layer 4: Context-aware fallback with stricter thresholds
+  (all layers run on one watchlist-wide automaton scan, see company_matcher)
+- Multi-company routing: the same scan finds every watchlist company an
+  article validly covers; it is scored and queued for each of them
+- Batched search (optional): several symbols OR-ed into one query, results
+  routed the same way; only uncovered companies run their own patterns
+- Snippet triage: CSE items are ranked and hopeless ones dropped before fetch
 
 Also includes md_date extraction for reliable date display in reports
 """
@@ -14,18 +20,25 @@ import os
 import re
 import sys
 import hashlib
-import requests
+import json
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Tuple, Union
 from urllib.parse import urljoin, urlparse
-import time
-import random
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(REPO_ROOT) not in sys.path:
     sys.path.append(str(REPO_ROOT))
 
+from company_matcher import CompanyMatcher
+from content_normalizer import ContentNormalizer
+from fetch_policy import FetchPolicy
+from page_fetcher import PageFetcher
+from page_cache import PageCache
+from pattern_scheduler import PatternScheduler
+from snippet_triage import SnippetTriage
+
 try:
     from process_group.md_parser import MDParser
     from process_group.quality_analyzer_simplified import QualityAnalyzerSimplified as QualityAnalyzer
@@ -36,6 +49,9 @@ except Exception:
 class SearchEngine:
     """Enhanced Search Engine with Multi-Layer Validation - v3.6.0"""
 
+    # Bump when validation or quality scoring changes: cached assessments are keyed on it
+    ASSESSMENT_VERSION = "1"
+
     def __init__(self, api_manager, config):
         self.api_manager = api_manager
         self.config = config
@@ -44,6 +60,10 @@ class SearchEngine:
         # Content validation settings
         self.enable_content_validation = True
         self.validation_threshold = 0.7
+        # One automaton over every watchlist code/name: a page is scanned once for all companies
+        self.company_matcher = CompanyMatcher.from_watchlist_csv(
+            self._config_get('files.watchlist_path', 'StockID_TWSE_TPEX.csv')
+        )
         
         # Enhanced date patterns for md_date extraction
         self.date_patterns = [
@@ -79,6 +99,97 @@ class SearchEngine:
             ]
         }
         
+        # Content normalization: store compact article Markdown instead of full page HTML
+        self.normalize_content = bool(self._config_get('content.normalize_html', True))
+        self.archive_raw_html = bool(self._config_get('content.archive_raw_html', False))
+        self.raw_archive_dir = self._config_get('content.raw_archive_dir', 'cache/raw_html/')
+        self.content_normalizer = ContentNormalizer()
+        
+        # URL de-duplication: per company always, across companies when enabled
+        self.dedupe_urls_per_run = bool(self._config_get('search.dedupe_urls_per_run', False))
+        self._run_seen_urls = set()
+        # Check-and-add on the shared set is atomic across company threads
+        self._seen_urls_lock = threading.Lock()
+        self.run_duplicate_urls_skipped = 0
+        
+        # Multi-company routing: one fetched article is scored and saved for every
+        # watchlist company it validly covers; that coverage counts toward the
+        # other companies' saturation later in the same run
+        self.route_multi_company = bool(self._config_get('search.route_multi_company', True))
+        self.run_fresh_coverage = {}
+        self.run_routed_results = 0
+        self._routed_pending = {}
+        self._route_lock = threading.Lock()
+        
+        # Pre-fetch triage on CSE title / snippet / domain signals
+        self.snippet_triage = None
+        if self._config_get('search.snippet_triage', True):
+            self.snippet_triage = SnippetTriage(self.company_matcher, self.route_multi_company)
+        
+        # Batched pass: several companies OR-ed into one query; items are routed
+        # back to companies by content validation (0/1 = per-company queries only)
+        self.batch_query_size = int(self._config_get('search.batch_query_size', 0) or 0)
+        self.batched_search_patterns = [
+            'site:cnyes.com "FactSet" ({symbols})'
+        ]
+        
+        # Adaptive pattern order (historical yield) and early stop once saturated
+        self.pattern_scheduler = None
+        if self._config_get('search.adaptive_patterns', True):
+            self.pattern_scheduler = PatternScheduler(
+                report_path=self._config_get('search.pattern_report_path', None),
+                yield_store_path=self._config_get('search.pattern_yield_path', None),
+                prune_patterns=bool(self._config_get('search.prune_patterns', True)),
+                saturation_results=int(self._config_get('search.saturation_results', 3)),
+                saturation_quality=float(self._config_get('search.saturation_quality', 8.0)),
+                recent_days=int(self._config_get('search.saturation_recent_days', 90))
+            )
+        
+        # Per-call execution stats (last_*) are thread-local so concurrent
+        # company pipelines each read back their own numbers
+        self._call_stats = threading.local()
+        self._stats_lock = threading.Lock()
+        
+        # Persistent page cache (conditional revalidation across runs)
+        self.page_cache = None
+        if self._config_get('fetch.page_cache', True):
+            try:
+                self.page_cache = PageCache(
+                    cache_path=self._config_get('fetch.page_cache_path', None),
+                    max_age_days=int(self._config_get('fetch.page_cache_max_age_days', 30))
+                )
+            except Exception as exc:
+                print(f"⚠️ Page cache init failed: {exc}")
+        
+        # Per-domain adaptive timeouts and circuit breaker (stats persist across runs)
+        fetch_timeout = float(self._config_get('fetch.timeout', 10))
+        self.fetch_policy = None
+        if self._config_get('fetch.domain_policy', True):
+            try:
+                self.fetch_policy = FetchPolicy(
+                    stats_path=self._config_get('fetch.domain_stats_path', None),
+                    max_timeout=fetch_timeout,
+                    min_timeout=float(self._config_get('fetch.min_timeout', 2)),
+                    timeout_multiplier=float(self._config_get('fetch.timeout_multiplier', 2.0)),
+                    failure_threshold=int(self._config_get('fetch.circuit_failures', 3)),
+                    min_failure_span_minutes=float(self._config_get('fetch.circuit_min_span_minutes', 5)),
+                    cooldown_minutes=float(self._config_get('fetch.circuit_cooldown_minutes', 15)),
+                    max_cooldown_hours=float(self._config_get('fetch.circuit_max_cooldown_hours', 24)),
+                    exempt_domains=self._config_get('fetch.circuit_exempt_domains', None)
+                )
+            except Exception as exc:
+                print(f"⚠️ Fetch policy init failed: {exc}")
+        
+        # Page fetching: shared keep-alive session, concurrent per result page
+        self.page_fetcher = PageFetcher(
+            max_workers=int(self._config_get('fetch.max_workers', 8)),
+            per_host_limit=int(self._config_get('fetch.per_host_limit', 4)),
+            timeout=fetch_timeout,
+            page_cache=self.page_cache,
+            fetch_policy=self.fetch_policy,
+            stale_max_age_hours=float(self._config_get('fetch.stale_max_age_hours', 72))
+        )
+        
         self.md_parser = None
         self.quality_analyzer = None
         if MDParser is not None and QualityAnalyzer is not None:
@@ -88,8 +199,82 @@ class SearchEngine:
             except Exception as exc:
                 print(f"⚠️ Quality scoring init failed: {exc}")
 
+        # Cached md_date / validation / quality are only reused for the same scorer and watchlist
+        self.assessment_version = '|'.join([
+            self.version, self.ASSESSMENT_VERSION,
+            getattr(self.md_parser, 'version', ''), self._watchlist_fingerprint()
+        ])
+
         print(f"SearchEngine v{self.version} initialized with md_date extraction")
 
+    @property
+    def last_patterns_executed(self) -> int:
+        return getattr(self._call_stats, 'patterns_executed', 0)
+
+    @last_patterns_executed.setter
+    def last_patterns_executed(self, value: int):
+        self._call_stats.patterns_executed = value
+
+    @property
+    def last_patterns_skipped(self) -> int:
+        return getattr(self._call_stats, 'patterns_skipped', 0)
+    
+    @last_patterns_skipped.setter
+    def last_patterns_skipped(self, value: int):
+        self._call_stats.patterns_skipped = value
+    
+    @property
+    def last_pattern_stats(self) -> Dict[str, Dict[str, int]]:
+        return getattr(self._call_stats, 'pattern_stats', {})
+    
+    @last_pattern_stats.setter
+    def last_pattern_stats(self, value: Dict[str, Dict[str, int]]):
+        self._call_stats.pattern_stats = value
+    
+    @property
+    def last_api_calls(self) -> int:
+        return getattr(self._call_stats, 'api_calls', 0)
+
+    @last_api_calls.setter
+    def last_api_calls(self, value: int):
+        self._call_stats.api_calls = value
+
+    @property
+    def last_duplicate_urls_skipped(self) -> int:
+        return getattr(self._call_stats, 'duplicate_urls_skipped', 0)
+
+    @last_duplicate_urls_skipped.setter
+    def last_duplicate_urls_skipped(self, value: int):
+        self._call_stats.duplicate_urls_skipped = value
+
+    @property
+    def last_routed_results(self) -> int:
+        return getattr(self._call_stats, 'routed_results', 0)
+
+    @last_routed_results.setter
+    def last_routed_results(self, value: int):
+        self._call_stats.routed_results = value
+
+    @property
+    def last_routed_coverage(self) -> int:
+        """Routed articles that saturated this company (own patterns skipped); 0 otherwise"""
+        return getattr(self._call_stats, 'routed_coverage', 0)
+
+    @last_routed_coverage.setter
+    def last_routed_coverage(self, value: int):
+        self._call_stats.routed_coverage = value
+
+    def _config_get(self, key: str, default=None):
+        """Read a dotted config key; tolerates a missing or plain-dict config"""
+        if self.config is not None and hasattr(self.config, 'get'):
+            try:
+                value = self.config.get(key, None)
+                if value is not None:
+                    return value
+            except Exception:
+                pass
+        return default
+
     def search_comprehensive(self, symbol: str, name: str, count: Union[int, str] = 'all', min_quality: int = 4) -> List[Dict[str, Any]]:
         """FIXED: Enhanced comprehensive search with md_date extraction and proper type handling"""
         print(f"🔍 Comprehensive search for {symbol} ({name}) - extracting md_date")
@@ -109,68 +294,255 @@ class SearchEngine:
         
         results = []
         all_patterns = self._get_all_search_patterns(symbol, name)
+        total_patterns = sum(len(patterns) for patterns in all_patterns.values())
         
-        print(f"📋 Total patterns to execute: {len(all_patterns)}")
+        if self.pattern_scheduler:
+            scheduled_patterns = self.pattern_scheduler.schedule(symbol, name, all_patterns)
+            print(f"📋 Total patterns: {total_patterns} (ordered by historical yield, stop when saturated)")
+        else:
+            scheduled_patterns = list(all_patterns.items())
+            print(f"📋 Total patterns to execute: {total_patterns}")
         
         executed_patterns = 0
+        attempted_patterns = 0
+        # Per-query yield (returned / fetched / valid / passed) for the pattern-yield store
+        pattern_stats = {}
+        saturated = False
         total_api_calls = 0
         
-        for category, patterns in all_patterns.items():
+        # Seen URLs (normalized): duplicates are dropped before fetch, validation and scoring
+        seen_urls = self._run_seen_urls if self.dedupe_urls_per_run else set()
+        duplicate_urls_skipped = 0
+        triage_rejected = {}
+        self.last_routed_results = 0
+        self.last_routed_coverage = 0
+        
+        # Articles routed here from other companies' searches count toward saturation
+        covered = self.fresh_coverage(symbol)
+        if covered and self.pattern_scheduler and self.pattern_scheduler.is_saturated(covered):
+            saturated = True
+            scheduled_patterns = []
+            self.last_routed_coverage = len(covered)
+            print(f"🔀 Already covered by {len(covered)} routed articles this run - skipping own patterns")
+        
+        for category, patterns in scheduled_patterns:
             print(f"🎯 Executing {category} patterns...")
             
             for pattern in patterns:
+                attempted_patterns += 1
                 try:
                     search_results = self.api_manager.search(pattern, num_results=10)
                     executed_patterns += 1
                     total_api_calls += 1
                     
+                    query_stats = pattern_stats.setdefault(
+                        pattern, {'returned': 0, 'fetched': 0, 'valid': 0, 'passed': 0, 'routed': 0}
+                    )
+                    
                     if search_results and 'items' in search_results:
+                        query_stats['returned'] += len(search_results['items'])
+                        new_items = []
                         for item in search_results['items']:
-                            try:
-                                # MODIFIED: Enhanced result processing with md_date extraction
-                                processed_result = self._process_search_result_with_md_date(
-                                    item, pattern, symbol, name, min_quality
-                                )
+                            item_url = item.get('link', '') or item.get('url', '')
+                            if not item_url:
+                                continue
+                            url_key = PageCache.normalize_url(item_url)
+                            if self._is_covered(symbol, url_key) or not self._claim_url(seen_urls, url_key):
+                                duplicate_urls_skipped += 1
+                                continue
+                            new_items.append(item)
+                        new_items = self._triage_items(new_items, symbol, min_quality, triage_rejected)
+                        
+                        # Fetch new pages concurrently; with a finite count, in waves of only as many
+                        # pages as results are still missing (no 10 fetches when 1 result is wanted)
+                        pending_items = new_items
+                        while pending_items and len(results) < target_count:
+                            wave_size = (len(pending_items) if target_count == float('inf')
+                                         else max(1, int(target_count) - len(results)))
+                            wave, pending_items = pending_items[:wave_size], pending_items[wave_size:]
+                            pages = self.page_fetcher.fetch_many([
+                                item.get('link', '') or item.get('url', '') for item in wave
+                            ])
+                            
+                            for item in wave:
+                                try:
+                                    page_content = pages.get(item.get('link', '') or item.get('url', ''))
+                                    if not page_content:
+                                        continue
+                                    query_stats['fetched'] += 1
                                 
-                                if processed_result and processed_result.get('quality_score', 0) >= min_quality:
-                                    results.append(processed_result)
+                                    # MODIFIED: Enhanced result processing with md_date extraction
+                                    routed_before = self.last_routed_results
+                                    processed_result = self._process_search_result_with_md_date(
+                                        item, pattern, symbol, name, min_quality, page_content=page_content
+                                    )
+                                    # Results this query produced for other companies (multi-company routing)
+                                    query_stats['routed'] += self.last_routed_results - routed_before
+                                
+                                    if processed_result and processed_result['content_validation'].get('is_valid'):
+                                        query_stats['valid'] += 1
+                                
+                                    if processed_result and processed_result.get('quality_score', 0) >= min_quality:
+                                        query_stats['passed'] += 1
+                                        results.append(processed_result)
                                     
-                                    # FIXED: Check count limit with proper type comparison
-                                    if len(results) >= target_count:
-                                        break
+                                        # FIXED: Check count limit with proper type comparison
+                                        if len(results) >= target_count:
+                                            break
                                         
-                            except Exception as e:
-                                print(f"⚠️ Processing result failed: {e}")
-                                continue
-                    
-                    # Rate limiting
-                    time.sleep(random.uniform(0.5, 1.5))
+                                except Exception as e:
+                                    print(f"⚠️ Processing result failed: {e}")
+                                    continue
+                        
+                        # Count reached before these were fetched: leave them to later searches
+                        with self._seen_urls_lock:
+                            for item in pending_items:
+                                seen_urls.discard(PageCache.normalize_url(item.get('link', '') or item.get('url', '')))
                     
                     # FIXED: Check count limit with proper type comparison
                     if len(results) >= target_count:
                         break
+                    
+                    if self.pattern_scheduler and self.pattern_scheduler.is_saturated(
+                            results + self.fresh_coverage(symbol)):
+                        saturated = True
+                        break
                         
                 except Exception as e:
                     print(f"⚠️ Pattern execution failed: {pattern} - {e}")
                     continue
             
             # FIXED: Check count limit between categories with proper type comparison
-            if len(results) >= target_count:
+            if len(results) >= target_count or saturated:
                 break
         
         # Store execution stats
         self.last_patterns_executed = executed_patterns
+        self.last_patterns_skipped = total_patterns - attempted_patterns
+        self.last_pattern_stats = pattern_stats
         self.last_api_calls = total_api_calls
+        self.last_duplicate_urls_skipped = duplicate_urls_skipped
+        with self._stats_lock:
+            self.run_duplicate_urls_skipped += duplicate_urls_skipped
         
         # FIXED: Return proper count with type conversion
         final_results = results[:int(target_count)] if target_count != float('inf') else results
         
         print(f"✅ Search completed: {len(final_results)} results, {executed_patterns} patterns, {total_api_calls} API calls")
+        if saturated:
+            print(f"🛑 Saturated with high-quality recent results - skipped {total_patterns - attempted_patterns} remaining patterns")
+        if duplicate_urls_skipped:
+            print(f"♻️ Duplicate URLs skipped: {duplicate_urls_skipped} (no fetch, validation or scoring)")
+        if triage_rejected:
+            print(f"🔎 Snippet triage skipped {sum(triage_rejected.values())} items before fetch "
+                  f"({SnippetTriage.describe(triage_rejected)})")
+        if self.last_routed_results:
+            print(f"🔀 Routed {self.last_routed_results} results to other watchlist companies covered by the same articles")
         
         return final_results
 
+    def print_run_summary(self):
+        """Fetcher / circuit / normalizer totals for the whole run (shared by all companies and threads)"""
+        fetch_stats = self.page_fetcher.get_stats()
+        print(f"🌐 Pages fetched this run: {fetch_stats['requests']} ({fetch_stats['failures']} failed, "
+              f"{fetch_stats['not_modified']} not modified, {fetch_stats['cache_hits']} served from cache)")
+        if fetch_stats['circuit_skipped']:
+            print(f"🔌 Skipped {fetch_stats['circuit_skipped']} fetches to domains with an open circuit: "
+                  f"{', '.join(self.fetch_policy.open_circuits()) or 'none open now'}")
+        if self.normalize_content:
+            norm_stats = self.content_normalizer.get_stats()
+            if norm_stats['raw_bytes']:
+                print(f"🗜️ Content normalized: {norm_stats['normalized']} pages "
+                      f"({norm_stats['fallback_raw']} kept raw), size ratio {norm_stats['size_ratio']:.1%}")
+
+    def search_batched(self, companies: List[Dict[str, str]], min_quality: int = 4) -> List[Dict[str, str]]:
+        """Batched multi-symbol queries; returns the companies still without coverage"""
+        group_size = max(1, self.batch_query_size)
+        groups = [companies[i:i + group_size] for i in range(0, len(companies), group_size)]
+        print(f"📦 Batched search: {len(companies)} companies in {len(groups)} groups of up to {group_size}")
+        
+        for company in companies:
+            self.company_matcher.add_company(company['symbol'], company.get('name', ''))
+        
+        seen_urls = self._run_seen_urls if self.dedupe_urls_per_run else set()
+        self.last_routed_results = 0
+        total_api_calls = 0
+        pages_routed = 0
+        triage_rejected = {}
+        
+        for group in groups:
+            symbols_clause = ' OR '.join(f'"{company["symbol"]}"' for company in group)
+            for template in self.batched_search_patterns:
+                query = template.format(symbols=symbols_clause)
+                try:
+                    search_results = self.api_manager.search(query, num_results=10)
+                    total_api_calls += 1
+                except Exception as e:
+                    print(f"⚠️ Batched query failed: {query} - {e}")
+                    if "exhausted" in str(e).lower() or "quota" in str(e).lower():
+                        self.last_api_calls = total_api_calls
+                        return [c for c in companies if not self.fresh_coverage(c['symbol'])]
+                    continue
+                
+                if not search_results or 'items' not in search_results:
+                    continue
+                
+                new_items = []
+                for item in search_results['items']:
+                    item_url = item.get('link', '') or item.get('url', '')
+                    if not item_url:
+                        continue
+                    if not self._claim_url(seen_urls, PageCache.normalize_url(item_url)):
+                        continue
+                    new_items.append(item)
+                new_items = self._triage_items(new_items, None, min_quality, triage_rejected)
+                
+                pages = self.page_fetcher.fetch_many([
+                    item.get('link', '') or item.get('url', '') for item in new_items
+                ])
+                for item in new_items:
+                    page_content = pages.get(item.get('link', '') or item.get('url', ''))
+                    if page_content and self._route_search_result(item, query, page_content, min_quality):
+                        pages_routed += 1
+        
+        self.last_api_calls = total_api_calls
+        missed = [c for c in companies if not self.fresh_coverage(c['symbol'])]
+        print(f"📦 Batched search completed: {total_api_calls} API calls, {pages_routed} pages routed, "
+              f"{self.last_routed_results} results, {len(companies) - len(missed)}/{len(companies)} companies covered")
+        if triage_rejected:
+            print(f"🔎 Snippet triage skipped {sum(triage_rejected.values())} items before fetch "
+                  f"({SnippetTriage.describe(triage_rejected)})")
+        return missed
+
+    def _triage_items(self, items: List[Dict], symbol: Optional[str], min_quality: int,
+                      rejected: Dict[str, int]) -> List[Dict]:
+        """Rank items by snippet signals and drop the ones that cannot validate or pass min_quality"""
+        if not self.snippet_triage or not items:
+            return items
+        kept, item_rejected = self.snippet_triage.triage(items, symbol, min_quality)
+        for reason, count in item_rejected.items():
+            rejected[reason] = rejected.get(reason, 0) + count
+        return kept
+
+    def _route_search_result(self, item: Dict, query: str, page_content: str, min_quality: int) -> bool:
+        """Route a page found by a batched query to every company it validly covers"""
+        url = item.get('link', '') or item.get('url', '')
+        title = item.get('title', '')
+        if not url or not title or not self.enable_content_validation:
+            return False
+        try:
+            content = self.content_normalizer.normalize(page_content) if self.normalize_content else page_content
+            page_scan = self.company_matcher.scan(page_content)
+            routed_before = self.last_routed_results
+            self._route_to_covered_companies(url, title, query, page_content, content, '', page_scan, None, min_quality)
+            return self.last_routed_results > routed_before
+        except Exception as e:
+            print(f"⚠️ Routing batched result failed: {e}")
+            return False
+
     def _process_search_result_with_md_date(self, item: Dict, query: str, symbol: str, 
-                                          name: str, min_quality: int) -> Optional[Dict[str, Any]]:
+                                          name: str, min_quality: int,
+                                          page_content: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """MODIFIED: Enhanced result processing with md_date extraction"""
         try:
             url = item.get('link', '') or item.get('url', '')
@@ -179,46 +551,174 @@ class SearchEngine:
             if not url or not title:
                 return None
             
-            # Fetch page content
-            content = self._fetch_page_content(url)
-            if not content:
+            # Fetch page content (unless already fetched with the rest of the result page)
+            raw_content = page_content if page_content is not None else self._fetch_page_content(url)
+            if not raw_content:
                 return None
             
-            # ENHANCED: Extract md_date from content during search
-            md_date = self._extract_content_date_for_metadata(content)
+            # Normalize page HTML to compact article Markdown (what gets stored)
+            content = self.content_normalizer.normalize(raw_content) if self.normalize_content else raw_content
             
-            # Content validation
-            validation_result = self._validate_content(content, symbol, name)
+            # One watchlist-wide scan serves validation and multi-company routing
+            page_scan = None
+            if self.route_multi_company and self.enable_content_validation:
+                try:
+                    page_scan = self._scan_page(raw_content, symbol, name)
+                except Exception as e:
+                    print(f"⚠️ Page scan failed: {e}")
             
-            # Quality assessment
-            quality_score = self._assess_quality(content, title, url, symbol, name)
+            md_date, validation_result, quality_score = self._assess_for_company(
+                url, title, raw_content, content, symbol, name, page_scan=page_scan
+            )
             
-            # Apply validation penalty if needed
             if not validation_result['is_valid']:
-                quality_score = 0
                 print(f"⚠️ Content validation failed: {validation_result['reason']}")
             
-            # ENHANCED: Create result with md_date in metadata
-            result = {
-                'url': url,
-                'title': title,
-                'quality_score': quality_score,
-                'company': name,
-                'stock_code': symbol,
-                'md_date': md_date,  # NEW: Extracted content date
-                'extracted_date': datetime.now().isoformat(),  # Search timestamp
-                'search_query': query,
-                'content_validation': validation_result,
-                'version': self.version,
-                'content': content
-            }
+            if page_scan is not None:
+                self._route_to_covered_companies(
+                    url, title, query, raw_content, content, md_date, page_scan, symbol, min_quality
+                )
             
-            return result
+            return self._build_result(url, title, query, symbol, name, raw_content, content,
+                                      md_date, validation_result, quality_score)
             
         except Exception as e:
             print(f"⚠️ Error processing search result: {e}")
             return None
 
+    def _claim_url(self, seen_urls: set, url_key: str) -> bool:
+        """Mark a URL as taken; False if another search (or thread) already took it"""
+        with self._seen_urls_lock:
+            if url_key in seen_urls:
+                return False
+            seen_urls.add(url_key)
+            return True
+
+    def _watchlist_fingerprint(self) -> str:
+        """Watchlist fingerprint as in the Process Group parse cache (md5 of sorted code/name pairs)
+
+        Covers both the matcher used for validation here and MDParser's own watchlist.
+        """
+        payload = json.dumps(sorted(self.company_matcher.companies.items()), ensure_ascii=False)
+        fingerprint = hashlib.md5(payload.encode('utf-8')).hexdigest()
+        parser_fingerprint = getattr(self.md_parser, 'watch_list_fingerprint', None)
+        return f"{fingerprint}+{parser_fingerprint}" if parser_fingerprint else fingerprint
+
+    def _assess_for_company(self, url: str, title: str, raw_content: str, content: str,
+                            symbol: str, name: str, page_scan=None,
+                            validation_result: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, Any], float]:
+        """md_date, validation and quality of one page for one company (page-cache aware)"""
+        # Already-seen content: reuse md_date / validation / quality from the page cache
+        processed_hash = PageCache.hash_content(f"{name}\n{title}\n{raw_content}")
+        processed_version = f"{self.assessment_version}|{'markdown' if content is not raw_content else 'html'}"
+        cached = None
+        if self.page_cache:
+            cached = self.page_cache.get_processed(url, symbol, processed_hash, processed_version)
+        
+        if cached:
+            return cached['md_date'], cached['content_validation'], cached['quality_score']
+        
+        # ENHANCED: Extract md_date from content during search
+        md_date = self._extract_content_date_for_metadata(content)
+        
+        # Content validation (raw page: title check needs <title>/og:title)
+        if validation_result is None:
+            validation_result = self._validate_content(raw_content, symbol, name, page_scan=page_scan)
+        
+        # Quality assessment (same content the Process Group will parse)
+        quality_score = self._assess_quality(content, title, url, symbol, name)
+        
+        # Apply validation penalty if needed
+        if not validation_result['is_valid']:
+            quality_score = 0
+        
+        if self.page_cache:
+            self.page_cache.put_processed(url, symbol, processed_hash, processed_version, {
+                'md_date': md_date,
+                'content_validation': validation_result,
+                'quality_score': quality_score
+            })
+        return md_date, validation_result, quality_score
+
+    def _build_result(self, url: str, title: str, query: str, symbol: str, name: str,
+                      raw_content: str, content: str, md_date: str,
+                      validation_result: Dict[str, Any], quality_score: float) -> Dict[str, Any]:
+        """Result dict consumed by generate_md_file_with_md_date"""
+        # ENHANCED: Create result with md_date in metadata
+        result = {
+            'url': url,
+            'title': title,
+            'quality_score': quality_score,
+            'company': name,
+            'stock_code': symbol,
+            'md_date': md_date,  # NEW: Extracted content date
+            'extracted_date': datetime.now().isoformat(),  # Search timestamp
+            'search_query': query,
+            'content_validation': validation_result,
+            'version': self.version,
+            'content_format': 'html' if content is raw_content else 'markdown',
+            'content': content
+        }
+        
+        if self.archive_raw_html and content is not raw_content:
+            result['raw_content'] = raw_content
+        
+        return result
+
+    # -- multi-company routing ----------------------------------------------
+
+    def _route_to_covered_companies(self, url: str, title: str, query: str, raw_content: str,
+                                    content: str, md_date: str, page_scan, symbol: Optional[str],
+                                    min_quality: int):
+        """Score the page for every other watchlist company it validly covers and queue the results"""
+        url_key = PageCache.normalize_url(url)
+        for other_symbol, other_name, validation_result in self.company_matcher.covered_companies(page_scan):
+            if other_symbol == symbol or self._is_covered(other_symbol, url_key):
+                continue
+            try:
+                other_md_date, validation_result, quality_score = self._assess_for_company(
+                    url, title, raw_content, content, other_symbol, other_name,
+                    validation_result=validation_result
+                )
+            except Exception as e:
+                print(f"⚠️ Routing to {other_symbol} failed: {e}")
+                continue
+            if quality_score < min_quality:
+                continue
+            
+            result = self._build_result(url, title, query, other_symbol, other_name, raw_content,
+                                        content, other_md_date or md_date, validation_result, quality_score)
+            result['routed_from'] = symbol or 'batched'
+            with self._route_lock:
+                coverage = self.run_fresh_coverage.setdefault(other_symbol, {})
+                if url_key in coverage:
+                    continue
+                coverage[url_key] = {
+                    'url': url,
+                    'title': title,
+                    'quality_score': quality_score,
+                    'md_date': result['md_date']
+                }
+                self._routed_pending.setdefault(other_symbol, []).append(result)
+                self.run_routed_results += 1
+            self.last_routed_results += 1
+
+    def _is_covered(self, symbol: str, url_key: str) -> bool:
+        """URL already routed to this company during the run"""
+        with self._route_lock:
+            return url_key in self.run_fresh_coverage.get(symbol, {})
+
+    def fresh_coverage(self, symbol: str) -> List[Dict[str, Any]]:
+        """Articles routed to this company during the run (url, title, quality_score, md_date)"""
+        with self._route_lock:
+            return list(self.run_fresh_coverage.get(symbol, {}).values())
+
+    def take_routed_results(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Hand over (and clear) results routed to other companies, keyed by stock code"""
+        with self._route_lock:
+            pending, self._routed_pending = self._routed_pending, {}
+        return pending
+
     def _extract_content_date_for_metadata(self, content: str) -> str:
         """ENHANCED: Extract content date specifically for md_date metadata field"""
         
@@ -365,7 +865,8 @@ class SearchEngine:
             'search_query': result['search_query'],
             'result_index': result_index,
             'content_validation': result['content_validation'],
-            'version': result['version']
+            'version': result['version'],
+            'content_format': result.get('content_format', 'html')
         }
         
         # Generate YAML frontmatter
@@ -389,6 +890,13 @@ class SearchEngine:
         
         return filename, md_content
 
+    def archive_raw_content(self, result: Dict[str, Any], md_filename: str) -> str:
+        """Archive the raw page HTML (gzip) for a saved, normalized result"""
+        raw_content = result.get('raw_content')
+        if not raw_content:
+            return ""
+        return self.content_normalizer.archive_raw(raw_content, self.raw_archive_dir, md_filename)
+
     def save_md_file(self, filename: str, content: str, output_dir: str = "data/md") -> str:
         """Save MD file with enhanced metadata"""
         os.makedirs(output_dir, exist_ok=True)
@@ -427,224 +935,22 @@ class SearchEngine:
         return all_patterns
 
     def _fetch_page_content(self, url: str) -> Optional[str]:
-        """Fetch page content with error handling"""
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            return response.text
-            
-        except Exception as e:
-            print(f"⚠️ Failed to fetch content from {url}: {e}")
-            return None
+        """Fetch page content with error handling (shared pooled session)"""
+        return self.page_fetcher.fetch(url)
 
-    def _validate_content(self, content: str, symbol: str, name: str) -> Dict[str, Any]:
+    def _scan_page(self, content: str, symbol: str, name: str):
+        """Watchlist-wide automaton scan of one page (searched company included)"""
+        self.company_matcher.add_company(symbol, name)
+        return self.company_matcher.scan(content)
+
+    def _validate_content(self, content: str, symbol: str, name: str, page_scan=None) -> Dict[str, Any]:
         """Multi-Layer Validation with title check, combined patterns, and proximity - v3.6.0"""
         if not self.enable_content_validation:
             return {'is_valid': True, 'reason': 'Validation disabled'}
 
         try:
-            # Convert to lowercase for case-insensitive matching
-            content_lower = content.lower()
-            symbol_lower = symbol.lower()
-            name_lower = name.lower()
-
-            # ========================================
-            # LAYER 1: TITLE VALIDATION (Highest Priority)
-            # ========================================
-            # Extract title from HTML and check if it mentions wrong company
-            title_text = ""
-            title_match = re.search(r'<title>(.*?)</title>', content, re.IGNORECASE | re.DOTALL)
-            if title_match:
-                title_text = title_match.group(1).lower()
-
-            # Also check meta og:title for better accuracy
-            meta_title_match = re.search(r'<meta\s+property=["\']og:title["\']\s+content=["\'](.*?)["\']', content, re.IGNORECASE)
-            if meta_title_match:
-                title_text = meta_title_match.group(1).lower()
-
-            # Check if title mentions a DIFFERENT company code in format (XXXX-TW)
-            other_company_pattern = r'\((\d{4})[-\s]*tw\)'
-            title_company_matches = re.findall(other_company_pattern, title_text)
-            if title_company_matches:
-                # Found company codes in title - verify they match our symbol
-                found_symbols = [m for m in title_company_matches]
-                if symbol not in found_symbols and len(found_symbols) > 0:
-                    wrong_symbol = found_symbols[0]
-                    return {
-                        'is_valid': False,
-                        'reason': f"Title mentions different company ({wrong_symbol}-TW) instead of {symbol}",
-                        'confidence': 0,
-                        'symbol_found': False,
-                        'name_found': False,
-                        'false_positive': True,
-                        'validation_layer': 'title_check'
-                    }
-
-            # ========================================
-            # LAYER 2: COMBINED PATTERN CHECK
-            # ========================================
-            # Look for symbol and name appearing together in common patterns
-            combined_patterns = [
-                rf'{name_lower}[^\)]*\({symbol}[-\s]*tw\)',  # 聯發科(2454-TW)
-                rf'\({symbol}[-\s]*tw\)[^\)]*{name_lower}',  # (2454-TW) 聯發科
-                rf'{symbol}[-\s]*tw[^\)]*{name_lower}',      # 2454-TW 聯發科
-                rf'{name_lower}[^\d]{{0,20}}{symbol}[-\s]*tw',  # 聯發科...2454-TW (within 20 chars)
-                rf'代號[:：\s]*{symbol}[^\)]*{name_lower}',   # 代號: 2454 聯發科
-            ]
-
-            has_combined_match = False
-            combined_match_pattern = ""
-            for pattern in combined_patterns:
-                match = re.search(pattern, content_lower)
-                if match:
-                    has_combined_match = True
-                    combined_match_pattern = pattern
-                    break
-
-            if has_combined_match:
-                # Strong signal - symbol and name appear together
-                return {
-                    'is_valid': True,
-                    'reason': f"Valid content - symbol and name found together in pattern",
-                    'confidence': 1.2,
-                    'symbol_found': True,
-                    'symbol_in_context': True,
-                    'name_found': True,
-                    'false_positive': False,
-                    'validation_layer': 'combined_pattern'
-                }
-
-            # ========================================
-            # LAYER 3: PROXIMITY CHECK
-            # ========================================
-            # Check if symbol and name appear close to each other
-            symbol_positions = [m.start() for m in re.finditer(symbol, content_lower)]
-            name_positions = [m.start() for m in re.finditer(name_lower, content_lower)]
-
-            proximity_threshold = 200  # characters
-            has_proximity_match = False
-            min_distance = float('inf')
-
-            for sym_pos in symbol_positions:
-                for name_pos in name_positions:
-                    distance = abs(sym_pos - name_pos)
-                    if distance <= proximity_threshold:
-                        has_proximity_match = True
-                        min_distance = min(min_distance, distance)
-
-            if has_proximity_match:
-                # Good signal - symbol and name appear near each other
-                # Confidence based on proximity (closer = higher confidence)
-                proximity_confidence = 1.0 - (min_distance / proximity_threshold) * 0.2  # 0.8 to 1.0
-                return {
-                    'is_valid': True,
-                    'reason': f"Valid content - symbol and name found within {min_distance} characters",
-                    'confidence': proximity_confidence,
-                    'symbol_found': True,
-                    'symbol_in_context': True,
-                    'name_found': True,
-                    'false_positive': False,
-                    'validation_layer': 'proximity_check',
-                    'proximity_distance': min_distance
-                }
-
-            # ========================================
-            # LAYER 4: CONTEXT-AWARE FALLBACK
-            # ========================================
-            # Original context-aware validation with stricter requirements
-
-            # Check for symbol in proper stock code contexts
-            symbol_contexts = [
-                rf'\b{symbol}[-\s]*tw\b',  # 2330-TW or 2330 TW
-                rf'{symbol}[-\s]*台股',     # 2330-台股
-                rf'\({symbol}[-\s]*tw\)',  # (2330-TW)
-                rf'代號[:：\s]*{symbol}\b',  # 代號: 2330
-                rf'{symbol}[-\s]+[^\d]',   # 2330 followed by non-digit (not a price like "2330元")
-            ]
-
-            symbol_in_context = False
-            for pattern in symbol_contexts:
-                if re.search(pattern, content_lower):
-                    symbol_in_context = True
-                    break
-
-            # Detect false positives - symbol appearing as price/target
-            false_positive_patterns = [
-                rf'目標價[為是]\s*{symbol}元',      # 目標價為2330元
-                rf'目標價[:：]\s*{symbol}元',       # 目標價:2330元
-                rf'預估目標價[為是]?\s*{symbol}元',  # 預估目標價為2330元
-                rf'{symbol}\s*元\s*目標價',         # 2330元目標價
-                rf'升至\s*{symbol}元',              # 升至2330元
-                rf'調升至\s*{symbol}元',            # 調升至2330元
-            ]
-
-            is_false_positive = False
-            false_positive_reason = ""
-            for pattern in false_positive_patterns:
-                if re.search(pattern, content_lower):
-                    is_false_positive = True
-                    false_positive_reason = f"Symbol {symbol} appears as price/target value, not stock code"
-                    break
-
-            if is_false_positive:
-                return {
-                    'is_valid': False,
-                    'reason': false_positive_reason,
-                    'confidence': 0,
-                    'symbol_found': False,
-                    'name_found': False,
-                    'false_positive': True,
-                    'validation_layer': 'price_detection'
-                }
-
-            # Check for company name presence (partial matching)
-            name_words = name_lower.split()
-            name_matches = sum(1 for word in name_words if len(word) > 1 and word in content_lower)
-            name_found = name_matches >= max(1, len(name_words) // 2)
-
-            # Calculate confidence with REDUCED weight for fallback layer
-            confidence = 0
-
-            if symbol_in_context:
-                confidence += 0.5  # Reduced from 0.7
-            elif symbol_lower in content_lower:
-                confidence += 0.2  # Reduced from 0.3
-
-            if name_found:
-                confidence += 0.3  # Reduced from 0.4
-
-            # STRICTER threshold for fallback validation (0.7 instead of 0.8)
-            # Most valid content should pass Layer 1-3, so fallback needs higher standards
-            is_valid = (symbol_in_context or (symbol_lower in content_lower)) and name_found and confidence >= 0.7
-
-            if is_valid:
-                reason = f"Valid content about {symbol} ({name}) - fallback validation"
-                if symbol_in_context and name_found:
-                    reason += " (symbol in context, name found separately)"
-            else:
-                reason = f"Content validation failed for {symbol} ({name}) - confidence: {confidence:.2f}"
-                if not symbol_in_context and symbol_lower in content_lower:
-                    reason += " (symbol found but not in proper context)"
-                if not name_found:
-                    reason += " (company name not found)"
-                reason += " - failed all validation layers"
-
-            return {
-                'is_valid': is_valid,
-                'reason': reason,
-                'confidence': confidence,
-                'symbol_found': symbol_in_context or (symbol_lower in content_lower),
-                'symbol_in_context': symbol_in_context,
-                'name_found': name_found,
-                'false_positive': not is_valid,
-                'validation_layer': 'fallback'
-            }
-
+            if page_scan is None:
+                page_scan = self._scan_page(content, symbol, name)
         except Exception as e:
             return {
                 'is_valid': False,
@@ -653,6 +959,7 @@ class SearchEngine:
                 'false_positive': False,
                 'validation_layer': 'error'
             }
+        return self.company_matcher.validate(page_scan, symbol, name)
 
     def _assess_quality(self, content: str, title: str, url: str, symbol: str, name: str) -> float:
         """Assess content quality (0-10 scale)"""
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Snippet Triage - FactSet Pipeline v3.6.0
+Rank CSE items and drop hopeless ones before any page is fetched.
+
+- Uses what APIManager._process_search_result already computed per item
+  (relevance_score, has_factset_content, has_financial_content, domain)
+- Title check mirrors validation Layer 1: a title tagging only other
+  `(XXXX-TW)` codes can never validate for the searched company; it is kept
+  (ranked last) only when one of those codes is a watchlist company the
+  multi-company routing stage could save it under
+- Items with no FactSet / financial signal in title or snippet, outside the
+  known financial domains, cannot reach a non-zero quality score
+- Kept items are ordered by relevance so the best pages are processed first
+"""
+
+from typing import Dict, Any, List, Optional, Tuple
+
+from company_matcher import TITLE_CODE_PATTERN
+
+FINANCIAL_DOMAINS = (
+    'factset.com', 'cnyes.com', 'moneydj.com', 'wealth.com.tw', 'bloomberg.com',
+    'reuters.com', 'marketwatch.com', 'yahoo.com', 'investing.com'
+)
+
+
+class SnippetTriage:
+    """Pre-fetch ranking and rejection of search result items"""
+
+    REASON_WRONG_TITLE = 'wrong_company_title'
+    REASON_NO_SIGNAL = 'no_financial_signal'
+
+    def __init__(self, company_matcher=None, route_multi_company: bool = True):
+        # Companies the routing stage can save pages under (None = any code)
+        self.company_matcher = company_matcher
+        self.route_multi_company = route_multi_company
+
+    def triage(self, items: List[Dict[str, Any]], symbol: Optional[str],
+               min_quality: float) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """Return (items worth fetching, best first) and rejected counts per reason
+
+        symbol=None (batched queries): only pages no watchlist company can claim are rejected.
+        """
+        ranked = []
+        rejected: Dict[str, int] = {}
+        for index, item in enumerate(items):
+            reason, routed_only = self._reject_reason(item, symbol, min_quality)
+            if reason:
+                rejected[reason] = rejected.get(reason, 0) + 1
+                continue
+            ranked.append((routed_only, -self._relevance(item), index, item))
+
+        ranked.sort(key=lambda entry: entry[:3])
+        return [entry[3] for entry in ranked], rejected
+
+    def _reject_reason(self, item: Dict[str, Any], symbol: Optional[str],
+                       min_quality: float) -> Tuple[Optional[str], bool]:
+        title_codes = TITLE_CODE_PATTERN.findall((item.get('title') or '').lower())
+        routed_only = False
+        if title_codes and (symbol is None or symbol not in title_codes):
+            routable = self.route_multi_company or symbol is None
+            if not routable or not self._any_watchlist_code(title_codes):
+                return self.REASON_WRONG_TITLE, False
+            routed_only = symbol is not None
+
+        if min_quality > 0 and not self._has_signal(item):
+            return self.REASON_NO_SIGNAL, False
+        return None, routed_only
+
+    def _any_watchlist_code(self, codes: List[str]) -> bool:
+        if self.company_matcher is None:
+            return True
+        return any(self.company_matcher.has_company(code) for code in codes)
+
+    @staticmethod
+    def _has_signal(item: Dict[str, Any]) -> bool:
+        # Items without precomputed flags (raw CSE format) are never rejected
+        if item.get('has_factset_content', True) or item.get('has_financial_content', True):
+            return True
+        domain = (item.get('domain') or item.get('displayLink') or '').lower()
+        return any(site in domain for site in FINANCIAL_DOMAINS)
+
+    @staticmethod
+    def _relevance(item: Dict[str, Any]) -> float:
+        try:
+            return float(item.get('relevance_score', 0) or 0)
+        except (TypeError, ValueError):
+            return 0.0
+
+    @staticmethod
+    def describe(rejected: Dict[str, int]) -> str:
+        return ', '.join(f"{count} {reason.replace('_', ' ')}" for reason, count in sorted(rejected.items()))